@@ -0,0 +1,131 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { ObjectId } from 'mongodb';
+import { connectToDatabase } from '@/utils/mongodb';
+import { runCorsMiddleware, handleApiError } from '@/utils/middleware';
+
+// Milliseconds to wait for new events before re-checking the connection
+const MAX_AWAIT_MS = 1000;
+
+// Milliseconds between SSE comments that keep idle connections open
+const HEARTBEAT_MS = 15000;
+
+/**
+ * API handler that streams new-data events for a chain as Server-Sent Events.
+ *
+ * The daemon writes one small document to the capped block_events collection
+ * per committed write batch. Events are followed with a change stream when
+ * MongoDB runs as a replica set, and with a tailable cursor otherwise, so
+ * clients learn about new blocks without polling blockchain_data.
+ * @param req Next.js request object
+ * @param res Next.js response object
+ */
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  try {
+    // Run the middleware
+    await runCorsMiddleware(req, res);
+
+    // Only allow GET requests
+    if (req.method !== 'GET') {
+      return res.status(405).json({
+        success: false,
+        error: 'Method Not Allowed'
+      });
+    }
+
+    // Get the chain_id from the URL
+    const { chain_id } = req.query;
+
+    if (!chain_id || typeof chain_id !== 'string') {
+      return res.status(400).json({
+        success: false,
+        error: 'Bad Request',
+        message: 'Chain ID is required'
+      });
+    }
+
+    const { db } = await connectToDatabase();
+    const events = db.collection('block_events');
+
+    res.writeHead(200, {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache, no-transform',
+      Connection: 'keep-alive'
+    });
+    res.write(': connected\n\n');
+
+    let closed = false;
+    const heartbeat = setInterval(() => res.write(': heartbeat\n\n'), HEARTBEAT_MS);
+
+    const send = (event: { _id: ObjectId }) => {
+      // The event _id lets EventSource resume with Last-Event-ID
+      res.write(`id: ${event._id.toHexString()}\nevent: block\ndata: ${JSON.stringify(event)}\n\n`);
+    };
+
+    const lastEventId = req.headers['last-event-id'];
+    let afterId: ObjectId | null =
+      typeof lastEventId === 'string' && ObjectId.isValid(lastEventId) ? new ObjectId(lastEventId) : null;
+
+    const changeStream = afterId
+      ? null
+      : events.watch(
+          [{ $match: { operationType: 'insert', 'fullDocument.chain_id': chain_id } }],
+          { maxAwaitTimeMS: MAX_AWAIT_MS }
+        );
+
+    req.on('close', () => {
+      closed = true;
+      clearInterval(heartbeat);
+      if (changeStream) {
+        changeStream.close().catch(() => undefined);
+      }
+    });
+
+    if (changeStream) {
+      try {
+        while (!closed && (await changeStream.hasNext())) {
+          const change = await changeStream.next();
+          if (change.operationType === 'insert') {
+            send(change.fullDocument as { _id: ObjectId });
+          }
+        }
+        return;
+      } catch (error) {
+        if (closed) {
+          return;
+        }
+        // Standalone servers do not support change streams
+        const newest = await events.find().sort({ $natural: -1 }).limit(1).next();
+        afterId = newest ? (newest._id as ObjectId) : ObjectId.createFromTime(Math.floor(Date.now() / 1000));
+      }
+    }
+
+    // Follow the capped collection with a tailable cursor
+    while (!closed) {
+      const cursor = events
+        .find({ chain_id, _id: { $gt: afterId as ObjectId } }, { tailable: true, awaitData: true })
+        .maxAwaitTimeMS(MAX_AWAIT_MS);
+      try {
+        while (!closed && (await cursor.hasNext())) {
+          const event = await cursor.next();
+          if (event) {
+            afterId = event._id as ObjectId;
+            send(event as { _id: ObjectId });
+          }
+        }
+      } finally {
+        await cursor.close();
+      }
+      // A tailable cursor ends when it finds nothing to start from
+      await new Promise((resolve) => setTimeout(resolve, MAX_AWAIT_MS));
+    }
+  } catch (error) {
+    if (res.headersSent) {
+      res.end();
+      return;
+    }
+    handleApiError(error as Error, res);
+  }
+}
@@ -1,5 +1,5 @@
 import { NextApiRequest, NextApiResponse } from 'next';
-import { getCollection } from '@/utils/mongodb';
+import { getLatestDocument } from '@/utils/mongodb';
 import { runCorsMiddleware, handleApiError } from '@/utils/middleware';
 
 /**
@@ -34,19 +34,10 @@ export default async function handler(
       });
     }
     
-    // Get the blockchain_data collection
-    const collection = await getCollection('blockchain_data');
+    // Get the latest block from the materialized chain_latest collection
+    const latestBlock = await getLatestDocument(chain_id, 'block');
     
-    // Get the latest block
-    const latestBlock = await collection.find({
-      chain_id,
-      endpoint: 'block'
-    })
-    .sort({ block_height: -1 })
-    .limit(1)
-    .toArray();
-    
-    if (latestBlock.length === 0) {
+    if (!latestBlock) {
       return res.status(404).json({
         success: false,
         error: 'Not Found',
@@ -57,7 +48,7 @@ export default async function handler(
     // Return the latest block
     return res.status(200).json({
       success: true,
-      data: latestBlock[0]
+      data: latestBlock
     });
   } catch (error) {
     handleApiError(error as Error, res);
@@ -1,5 +1,5 @@
 // API Route handler for Symphony-specific endpoints
-import { connectToDatabase } from '../../../utils/mongodb';
+import { getCollection, getLatestDocument } from '../../../utils/mongodb';
 import Cors from 'cors';
 
 // Initialize CORS middleware
@@ -47,8 +47,8 @@ export default async function handler(req, res) {
   }
 
   try {
-    // Connect to MongoDB
-    const { db } = await connectToDatabase();
+    // These are chain-scoped endpoints; every poll is a document in chain_samples
+    const collection = await getCollection('chain_samples');
 
     // Extract query parameters
     const { limit = 100, offset = 0, startTime, endTime, latest } = req.query;
@@ -73,29 +73,32 @@ export default async function handler(req, res) {
     }
 
     let results;
-
-    // If latest is true, get only the most recent record
-    if (latest === 'true') {
-      results = await db
-        .collection('blockchain_data')
+    let totalDocuments;
+
+    // If latest is true without a time range, read the materialized latest document
+    if (latest === 'true' && !startTime && !endTime) {
+      const latestDocument = await getLatestDocument('symphony-testnet-4', endpoint);
+      results = latestDocument ? [latestDocument] : [];
+      totalDocuments = results.length;
+    } else if (latest === 'true') {
+      // Most recent record within the requested time range
+      results = await collection
         .find(query)
         .sort({ timestamp: -1 })
         .limit(1)
         .toArray();
+      totalDocuments = await collection.countDocuments(query);
     } else {
       // Paginated query
-      results = await db
-        .collection('blockchain_data')
+      results = await collection
         .find(query)
         .sort({ timestamp: -1 })
         .skip(parseInt(offset))
         .limit(parseInt(limit))
         .toArray();
+      totalDocuments = await collection.countDocuments(query);
     }
 
-    // Count total documents for pagination
-    const totalDocuments = await db.collection('blockchain_data').countDocuments(query);
-
     // Format response
     const response = {
       endpoint,
@@ -7,6 +7,9 @@ dotenv.config();
 const MONGODB_URI = process.env.MONGODB_URI || 'mongodb://localhost:27017';
 const MONGODB_DB_NAME = process.env.MONGODB_DB_NAME || 'cosmosdata';
 
+// Raw data layout written by the daemon, see STORAGE_LAYOUT in its .env
+const STORAGE_LAYOUT = process.env.STORAGE_LAYOUT || 'shared';
+
 // Connection cache
 let cachedClient: MongoClient | null = null;
 let cachedDb: Db | null = null;
@@ -42,4 +45,61 @@ export async function connectToDatabase() {
 export async function getCollection(collectionName: string) {
   const { db } = await connectToDatabase();
   return db.collection(collectionName);
-} 
\ No newline at end of file
+}
+
+/**
+ * Returns the name of the collection holding raw documents of a chain and endpoint
+ * @param chainId Chain identifier
+ * @param endpoint Endpoint type (e.g. 'block')
+ * @returns Collection name for the configured storage layout
+ */
+export function dataCollectionName(chainId: string, endpoint: string) {
+  switch (STORAGE_LAYOUT) {
+    case 'chain':
+      return `blockchain_data.${chainId}`;
+    case 'chain_endpoint':
+      return `blockchain_data.${chainId}.${endpoint}`;
+    default:
+      return 'blockchain_data';
+  }
+}
+
+/**
+ * Returns the collection holding raw documents of a chain and endpoint
+ * @param chainId Chain identifier
+ * @param endpoint Endpoint type (e.g. 'block')
+ * @returns Collection instance
+ */
+export async function getDataCollection(chainId: string, endpoint: string) {
+  return getCollection(dataCollectionName(chainId, endpoint));
+}
+
+/**
+ * Returns the latest stored document for a chain and endpoint.
+ *
+ * The daemon maintains one document per (chain_id, endpoint) in the
+ * chain_latest collection, so this is a primary key lookup. Databases that
+ * have not been migrated yet fall back to sorting the raw data collection.
+ * @param chainId Chain identifier
+ * @param endpoint Endpoint type (e.g. 'block')
+ * @returns The latest document, or null if none is stored
+ */
+export async function getLatestDocument(chainId: string, endpoint: string) {
+  const { db } = await connectToDatabase();
+  const latest = await db
+    .collection<{ _id: string }>('chain_latest')
+    .findOne({ _id: `${chainId}:${endpoint}` });
+
+  if (latest) {
+    return latest;
+  }
+
+  const fallback = await db
+    .collection(dataCollectionName(chainId, endpoint))
+    .find({ chain_id: chainId, endpoint })
+    .sort({ block_height: -1 })
+    .limit(1)
+    .toArray();
+
+  return fallback.length > 0 ? fallback[0] : null;
+}
@@ -4,13 +4,170 @@ Configuration module for the CosmosData daemon.
 This module handles loading configuration for chains, MongoDB, and general settings.
 """
 import os
+import logging
 import yaml
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# MongoClient option sets for different write workloads. "live" favours
+# durability for data served by the API, "bulk" favours throughput for
+# backfills that can simply be re-fetched if lost, and "default" keeps the
+# driver defaults as a benchmark baseline.
+MONGO_WRITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "live": {
+        "maxPoolSize": 50,
+        "compressors": "zstd,snappy,zlib",
+        "w": "majority",
+        "journal": True,
+        "retryWrites": True,
+        "socketTimeoutMS": 30000,
+        "connectTimeoutMS": 10000,
+        "serverSelectionTimeoutMS": 10000,
+    },
+    "bulk": {
+        "maxPoolSize": 100,
+        "compressors": "zstd,snappy,zlib",
+        "w": 1,
+        "journal": False,
+        "retryWrites": True,
+        "socketTimeoutMS": 120000,
+        "connectTimeoutMS": 10000,
+        "serverSelectionTimeoutMS": 10000,
+    },
+}
+
+# Environment variables that override individual profile options
+MONGO_OPTION_OVERRIDES = {
+    "MONGODB_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGODB_COMPRESSORS": ("compressors", str),
+    "MONGODB_WRITE_CONCERN": ("w", lambda value: int(value) if value.isdigit() else value),
+    "MONGODB_JOURNAL": ("journal", lambda value: value.lower() == "true"),
+    "MONGODB_RETRY_WRITES": ("retryWrites", lambda value: value.lower() == "true"),
+    "MONGODB_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+}
+
+def _parse_chain_ids(value: Optional[str]) -> Optional[Set[str]]:
+    """
+    Parse a CHAIN_IDS setting, a comma-separated list of chain IDs.
+
+    Args:
+        value: Setting value, None when the variable is not set
+
+    Returns:
+        Chain IDs to load (possibly none), or None to load every chain
+    """
+    if value is None:
+        return None
+    return {chain_id.strip() for chain_id in value.split(",") if chain_id.strip()}
+
+class RetentionPolicy:
+    """Retention rule for the stored data of a single endpoint."""
+    
+    ACTIONS = ("ttl", "rollup")
+    GRANULARITIES = {"hourly": 3600, "daily": 86400}
+    
+    def __init__(self,
+                 endpoint: str,
+                 action: str,
+                 max_age: int,
+                 granularity: str = "hourly"):
+        """
+        Initialize a retention policy.
+        
+        Args:
+            endpoint: Endpoint type the policy applies to (e.g., 'status')
+            action: 'ttl' to delete old documents, 'rollup' to summarize them
+            max_age: Age in seconds after which raw documents are processed
+            granularity: Rollup bucket size, 'hourly' or 'daily'
+            
+        Raises:
+            ValueError: If the action or granularity is not supported
+        """
+        if action not in self.ACTIONS:
+            raise ValueError(f"Unsupported retention action '{action}' for endpoint {endpoint}")
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"Unsupported rollup granularity '{granularity}' for endpoint {endpoint}")
+        
+        self.endpoint = endpoint
+        self.action = action
+        self.max_age = max_age
+        self.granularity = granularity
+    
+    @property
+    def bucket_seconds(self) -> int:
+        """
+        Get the rollup bucket size.
+        
+        Returns:
+            Bucket size in seconds
+        """
+        return self.GRANULARITIES[self.granularity]
+    
+    def __eq__(self, other: object) -> bool:
+        """Policies are equal when all their settings match."""
+        return isinstance(other, RetentionPolicy) and vars(self) == vars(other)
+
+class EndpointSpec:
+    """Declarative definition of an endpoint collected by the generic collector."""
+    
+    SCOPES = ("height", "chain")
+    APIS = ("rest", "rpc")
+    
+    def __init__(self,
+                 name: str,
+                 path: str,
+                 params: Optional[Any] = None,
+                 scope: str = "chain",
+                 interval: int = 60,
+                 every: int = 1,
+                 api: str = "rest",
+                 cache_ttl: Optional[int] = None,
+                 enabled: bool = True):
+        """
+        Initialize an endpoint definition.
+        
+        Args:
+            name: Endpoint type stored with the data (e.g., 'market_params')
+            path: REST path, or RPC method name when api is 'rpc'. May contain
+                a {height} placeholder for height-scoped endpoints
+            params: Query parameters (REST) or positional parameters (RPC);
+                string values may contain a {height} placeholder
+            scope: 'height' to fetch for every collected block height, or
+                'chain' to poll current chain state on its own interval
+            interval: Seconds between polls of a chain-scoped endpoint
+            every: Fetch a height-scoped endpoint only at heights divisible by this
+            api: 'rest' or 'rpc'
+            cache_ttl: REST response cache lifetime in seconds
+            enabled: Whether the endpoint is collected
+            
+        Raises:
+            ValueError: If the scope or api is not supported
+        """
+        if scope not in self.SCOPES:
+            raise ValueError(f"Unsupported scope '{scope}' for endpoint {name}")
+        if api not in self.APIS:
+            raise ValueError(f"Unsupported api '{api}' for endpoint {name}")
+        
+        self.name = name
+        self.path = path
+        self.params = params
+        self.scope = scope
+        self.interval = interval
+        self.every = max(1, every)
+        self.api = api
+        self.cache_ttl = cache_ttl
+        self.enabled = enabled
+    
+    def __eq__(self, other: object) -> bool:
+        """Endpoint definitions are equal when all their settings match."""
+        return isinstance(other, EndpointSpec) and vars(self) == vars(other)
+
 class ChainConfig:
     """Configuration for a single Cosmos SDK chain."""
     
@@ -20,7 +177,10 @@ class ChainConfig:
                  rest_base_url: str, 
                  rpc_base_url: str,
                  enabled_endpoints: List[str],
-                 monitoring_frequency: int):
+                 monitoring_frequency: int,
+                 retention: Optional[Dict[str, RetentionPolicy]] = None,
+                 cache_ttls: Optional[Dict[str, int]] = None,
+                 endpoints: Optional[Dict[str, EndpointSpec]] = None):
         """
         Initialize chain configuration.
         
@@ -31,6 +191,10 @@ class ChainConfig:
             rpc_base_url: Base URL for RPC endpoints
             enabled_endpoints: List of enabled endpoint types
             monitoring_frequency: How often to query this chain (in seconds)
+            retention: Retention policies, keyed by endpoint type
+            cache_ttls: REST response cache lifetimes in seconds, keyed by
+                endpoint path
+            endpoints: Declared endpoints for the generic collector, keyed by name
         """
         self.chain_id = chain_id
         self.name = name
@@ -38,20 +202,76 @@ class ChainConfig:
         self.rpc_base_url = rpc_base_url
         self.enabled_endpoints = enabled_endpoints
         self.monitoring_frequency = monitoring_frequency
+        self.retention = retention or {}
+        self.cache_ttls = cache_ttls or {}
+        self.endpoints = endpoints or {}
+    
+    def declared_endpoints(self, scope: str) -> List[EndpointSpec]:
+        """
+        Get the enabled declared endpoints of a scope.
+        
+        Args:
+            scope: 'height' or 'chain'
+            
+        Returns:
+            List of endpoint definitions
+        """
+        return [spec for spec in self.endpoints.values() if spec.enabled and spec.scope == scope]
+    
+    def __eq__(self, other: object) -> bool:
+        """Chain configurations are equal when all their settings match."""
+        return isinstance(other, ChainConfig) and vars(self) == vars(other)
+
+class ConfigDiff:
+    """Differences between two sets of chain configurations."""
+    
+    def __init__(self, added: List[str], removed: List[str], changed: List[str]):
+        """
+        Initialize the diff.
+        
+        Args:
+            added: Chain IDs present only in the new configuration
+            removed: Chain IDs present only in the old configuration
+            changed: Chain IDs present in both with different settings
+        """
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+    
+    def __bool__(self) -> bool:
+        """A diff is truthy when any chain was added, removed or changed."""
+        return bool(self.added or self.removed or self.changed)
+    
+    def __repr__(self) -> str:
+        return f"ConfigDiff(added={self.added}, removed={self.removed}, changed={self.changed})"
 
 class Config:
     """Main configuration for the CosmosData daemon."""
     
-    def __init__(self, config_path: str = "config/chains.yaml"):
+    def __init__(self, config_path: Optional[str] = None):
         """
         Initialize configuration from YAML and environment variables.
         
         Args:
-            config_path: Path to the configuration YAML file
+            config_path: Path to the configuration YAML file (falls back to
+                CHAINS_CONFIG_PATH, then config/chains.yaml)
         """
+        self.config_path = config_path or os.environ.get("CHAINS_CONFIG_PATH", "config/chains.yaml")
+        
+        # Storage backend: "mongodb", or "sqlite" for a single embedded file
+        self.storage_backend = os.environ.get("STORAGE_BACKEND", "mongodb")
+        self.sqlite_path = os.environ.get("SQLITE_PATH", "data/cosmodata.db")
+        self.sqlite_synchronous = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+        
         # MongoDB configuration from environment variables
         self.mongodb_uri = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
         self.mongodb_db_name = os.environ.get("MONGODB_DB_NAME", "cosmosdata")
+        self.mongodb_write_profile = os.environ.get("MONGODB_WRITE_PROFILE", "live")
+        self.mongodb_backfill_write_profile = os.environ.get("MONGODB_BACKFILL_WRITE_PROFILE", "bulk")
+        self.write_batch_size = int(os.environ.get("WRITE_BATCH_SIZE", "100"))
+        self.backfill_lag_threshold = int(os.environ.get("BACKFILL_LAG_THRESHOLD", "100"))
+        # Raw data collections: "shared", "chain" or "chain_endpoint"
+        self.storage_layout = os.environ.get("STORAGE_LAYOUT", "shared")
         
         # General settings
         self.log_level = os.environ.get("LOG_LEVEL", "INFO")
@@ -60,9 +280,101 @@ class Config:
         self.request_timeout = int(os.environ.get("REQUEST_TIMEOUT", "30"))
         self.max_retries = int(os.environ.get("MAX_RETRIES", "3"))
         self.retry_backoff_factor = float(os.environ.get("RETRY_BACKOFF_FACTOR", "0.5"))
+        self.validator_page_size = int(os.environ.get("VALIDATOR_PAGE_SIZE", "100"))
+        self.validator_page_workers = int(os.environ.get("VALIDATOR_PAGE_WORKERS", "4"))
+        self.response_cache_size = int(os.environ.get("RESPONSE_CACHE_SIZE", "256"))
+        
+        # Block pipeline settings
+        self.pipeline_fetch_workers = int(os.environ.get("PIPELINE_FETCH_WORKERS", "4"))
+        self.pipeline_transform_workers = int(os.environ.get("PIPELINE_TRANSFORM_WORKERS", "2"))
+        self.pipeline_queue_size = int(os.environ.get("PIPELINE_QUEUE_SIZE", "16"))
+        
+        # In-flight payload budget: estimated decoded bytes of responses held
+        # at once (0 for no limit, usage is still measured)
+        self.payload_budget_bytes = int(os.environ.get("PAYLOAD_BUDGET_BYTES", "1073741824"))
+        self.payload_memory_factor = float(os.environ.get("PAYLOAD_MEMORY_FACTOR", "4"))
+        self.payload_budget_wait = int(os.environ.get("PAYLOAD_BUDGET_WAIT", "30"))
+        
+        # Lag-aware scheduling: block fetches shared by all chains, and heights
+        # collected per cycle for each fetcher a chain is given
+        self.fetch_budget = int(os.environ.get("FETCH_BUDGET", "16"))
+        self.blocks_per_worker = int(os.environ.get("BLOCKS_PER_WORKER", "100"))
+        
+        # Adaptive polling: wake each chain just after its next expected block,
+        # estimated from the last BLOCK_INTERVAL_SAMPLES stored headers, and
+        # back off while it produces none; when disabled each chain is polled
+        # every monitoring_frequency seconds
+        self.adaptive_polling = os.environ.get("ADAPTIVE_POLLING", "true").lower() == "true"
+        self.block_interval_samples = int(os.environ.get("BLOCK_INTERVAL_SAMPLES", "20"))
+        self.poll_margin = float(os.environ.get("POLL_MARGIN", "0.5"))
+        self.poll_min_interval = float(os.environ.get("POLL_MIN_INTERVAL", "1"))
+        self.poll_max_interval = float(os.environ.get("POLL_MAX_INTERVAL", "300"))
+        
+        # Status sample settings
+        self.status_retention = int(os.environ.get("STATUS_RETENTION", "2592000"))
+        self.status_capped_size = int(os.environ.get("STATUS_CAPPED_SIZE", "104857600"))
+        
+        # Size of the capped block_events notification collection
+        self.block_events_capped_size = int(os.environ.get("BLOCK_EVENTS_CAPPED_SIZE", "16777216"))
+        
+        # Declared endpoint polling settings
+        self.endpoint_poll_tick = int(os.environ.get("ENDPOINT_POLL_TICK", "5"))
+        
+        # Retention settings
+        self.retention_interval = int(os.environ.get("RETENTION_INTERVAL", "300"))
+        self.retention_batch_size = int(os.environ.get("RETENTION_BATCH_SIZE", "1000"))
+        
+        # Block analytics settings
+        self.block_stats_interval = int(os.environ.get("BLOCK_STATS_INTERVAL", "300"))
+        self.block_stats_window = int(os.environ.get("BLOCK_STATS_WINDOW", "1000"))
+        self.block_stats_rolling = int(os.environ.get("BLOCK_STATS_ROLLING", "100"))
+        
+        # Write spool settings (an empty SPOOL_PATH disables spooling)
+        self.spool_path = os.environ.get("SPOOL_PATH", "spool/cosmodata-spool.db")
+        self.spool_max_bytes = int(os.environ.get("SPOOL_MAX_BYTES", "536870912"))
+        self.spool_replay_interval = int(os.environ.get("SPOOL_REPLAY_INTERVAL", "10"))
+        self.spool_replay_batch = int(os.environ.get("SPOOL_REPLAY_BATCH", "1000"))
+        self.spool_backpressure_timeout = int(os.environ.get("SPOOL_BACKPRESSURE_TIMEOUT", "60"))
+        
+        # Multi-process mode: worker processes the chains are split across
+        # (0 collects all chains in this process). CHAIN_IDS is set by the
+        # supervisor for each worker and limits it to its share of the chains.
+        self.chain_processes = int(os.environ.get("CHAIN_PROCESSES", "0"))
+        self.chain_ids = _parse_chain_ids(os.environ.get("CHAIN_IDS"))
+        
+        # Hot reload settings
+        self.config_watch = os.environ.get("CONFIG_WATCH", "true").lower() == "true"
         
         # Load chain configurations
-        self.chains = self._load_chains(config_path)
+        self._config_mtime = self._get_config_mtime()
+        self.chains = self._load_chains(self.config_path)
+    
+    def mongo_client_options(self, profile: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get MongoClient options for a write profile.
+        
+        Args:
+            profile: Profile name (falls back to MONGODB_WRITE_PROFILE)
+            
+        Returns:
+            Keyword arguments for MongoClient, with environment overrides applied
+            
+        Raises:
+            ValueError: If the profile is not defined
+        """
+        profile = profile or self.mongodb_write_profile
+        if profile not in MONGO_WRITE_PROFILES:
+            raise ValueError(
+                f"Unknown MongoDB write profile '{profile}', "
+                f"expected one of: {', '.join(MONGO_WRITE_PROFILES)}"
+            )
+        
+        options = dict(MONGO_WRITE_PROFILES[profile])
+        for env_name, (option, parse) in MONGO_OPTION_OVERRIDES.items():
+            value = os.environ.get(env_name)
+            if value:
+                options[option] = parse(value)
+        return options
     
     def _load_chains(self, config_path: str) -> Dict[str, ChainConfig]:
         """
@@ -75,25 +387,196 @@ class Config:
             Dictionary of chain configurations, keyed by chain_id
         """
         try:
-            with open(config_path, 'r') as f:
-                chains_data = yaml.safe_load(f)
-            
-            chains = {}
-            for chain_data in chains_data.get('chains', []):
-                chain_config = ChainConfig(
-                    chain_id=chain_data['chain_id'],
-                    name=chain_data['name'],
-                    rest_base_url=chain_data['rest_base_url'],
-                    rpc_base_url=chain_data['rpc_base_url'],
-                    enabled_endpoints=chain_data.get('enabled_endpoints', ['block', 'status']),
-                    monitoring_frequency=chain_data.get('monitoring_frequency', self.default_monitoring_frequency)
-                )
-                chains[chain_config.chain_id] = chain_config
-            
-            return chains
+            return self._read_chains(config_path)
         except Exception as e:
             print(f"Error loading chain configurations: {e}")
             return {}
+    
+    def _read_chains(self, config_path: str) -> Dict[str, ChainConfig]:
+        """
+        Read and parse chain configurations from YAML file.
+        
+        Args:
+            config_path: Path to the configuration YAML file
+            
+        Returns:
+            Dictionary of chain configurations, keyed by chain_id
+            
+        Raises:
+            Exception: If the file cannot be read or contains invalid settings
+        """
+        with open(config_path, 'r') as f:
+            chains_data = yaml.safe_load(f)
+        
+        chains = {}
+        for chain_data in chains_data.get('chains', []):
+            chain_config = ChainConfig(
+                chain_id=chain_data['chain_id'],
+                name=chain_data['name'],
+                rest_base_url=chain_data['rest_base_url'],
+                rpc_base_url=chain_data['rpc_base_url'],
+                enabled_endpoints=chain_data.get('enabled_endpoints', ['block', 'status']),
+                monitoring_frequency=chain_data.get('monitoring_frequency', self.default_monitoring_frequency),
+                retention=self._parse_retention(chain_data['chain_id'], chain_data.get('retention', {})),
+                cache_ttls={
+                    path.lstrip('/'): int(ttl)
+                    for path, ttl in (chain_data.get('cache_ttl') or {}).items()
+                },
+                endpoints=self._parse_endpoints(chain_data['chain_id'], chain_data.get('endpoints', []))
+            )
+            if self.chain_ids is not None and chain_config.chain_id not in self.chain_ids:
+                continue
+            chains[chain_config.chain_id] = chain_config
+        
+        return chains
+    
+    def _get_config_mtime(self) -> Optional[float]:
+        """
+        Get the modification time of the configuration file.
+        
+        Returns:
+            Modification time, or None if the file does not exist
+        """
+        try:
+            return os.path.getmtime(self.config_path)
+        except OSError:
+            return None
+    
+    def file_changed(self) -> bool:
+        """
+        Check whether the configuration file changed since it was last loaded.
+        
+        Returns:
+            True if the file's modification time differs from the loaded one
+        """
+        return self._get_config_mtime() != self._config_mtime
+    
+    def reload(self) -> ConfigDiff:
+        """
+        Reload chain configurations from the YAML file.
+        
+        Only the chain set is reloaded; environment settings keep their values.
+        If the file cannot be parsed the current chains are kept unchanged.
+        
+        Returns:
+            Diff between the previous and the reloaded chain configurations
+        """
+        self._config_mtime = self._get_config_mtime()
+        try:
+            new_chains = self._read_chains(self.config_path)
+        except Exception as e:
+            logger.error(f"Failed to reload chain configurations, keeping current ones: {e}")
+            return ConfigDiff([], [], [])
+        
+        old_chains = self.chains
+        diff = ConfigDiff(
+            added=[chain_id for chain_id in new_chains if chain_id not in old_chains],
+            removed=[chain_id for chain_id in old_chains if chain_id not in new_chains],
+            changed=[
+                chain_id for chain_id in new_chains
+                if chain_id in old_chains and new_chains[chain_id] != old_chains[chain_id]
+            ]
+        )
+        
+        # Unchanged chains keep their existing objects
+        self.chains = {
+            chain_id: old_chains[chain_id] if chain_id in old_chains and chain_id not in diff.changed else chain_config
+            for chain_id, chain_config in new_chains.items()
+        }
+        return diff
+    
+    def _parse_endpoints(self, chain_id: str, endpoints_data: List[Dict[str, Any]]) -> Dict[str, EndpointSpec]:
+        """
+        Parse the endpoints section of a chain configuration.
+        
+        Invalid definitions are logged and skipped, so one bad entry does not
+        drop the chain or the rest of the configuration.
+        
+        Args:
+            chain_id: Chain the section belongs to, for error messages
+            endpoints_data: List of endpoint definitions
+            
+        Returns:
+            Dictionary of endpoint definitions, keyed by name
+        """
+        endpoints = {}
+        for index, endpoint_data in enumerate(endpoints_data or []):
+            if not isinstance(endpoint_data, dict):
+                logger.error(f"Skipping invalid endpoint #{index + 1} of chain {chain_id}: expected a mapping")
+                continue
+            name = endpoint_data.get('name', f'#{index + 1}')
+            try:
+                spec = EndpointSpec(
+                    name=endpoint_data['name'],
+                    path=endpoint_data['path'],
+                    params=endpoint_data.get('params'),
+                    scope=endpoint_data.get('scope', 'chain'),
+                    interval=int(endpoint_data.get('interval', self.default_monitoring_frequency)),
+                    every=int(endpoint_data.get('every', 1)),
+                    api=endpoint_data.get('api', 'rest'),
+                    cache_ttl=endpoint_data.get('cache_ttl'),
+                    enabled=endpoint_data.get('enabled', True)
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Skipping invalid endpoint {name} of chain {chain_id}: {e!r}")
+                continue
+            endpoints[spec.name] = spec
+        return endpoints
+    
+    def _parse_retention(self, chain_id: str, retention_data: Dict[str, Any]) -> Dict[str, RetentionPolicy]:
+        """
+        Parse the retention section of a chain configuration.
+        
+        Invalid rules are logged and skipped; the endpoint's data is then kept
+        until the rule is fixed.
+        
+        Args:
+            chain_id: Chain the section belongs to, for error messages
+            retention_data: Mapping of endpoint type to retention settings
+            
+        Returns:
+            Dictionary of retention policies, keyed by endpoint type
+        """
+        policies = {}
+        for endpoint, rule in (retention_data or {}).items():
+            if not isinstance(rule, dict):
+                logger.error(f"Skipping invalid retention rule for {endpoint} of chain {chain_id}: expected a mapping")
+                continue
+            try:
+                policies[endpoint] = RetentionPolicy(
+                    endpoint=endpoint,
+                    action=rule.get('action', 'ttl'),
+                    max_age=int(rule['max_age']),
+                    granularity=rule.get('granularity', 'hourly')
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Skipping invalid retention rule for {endpoint} of chain {chain_id}: {e!r}")
+        return policies
+
+# Singleton instance, created on first use
+_config: Optional[Config] = None
 
-# Singleton instance
-config = Config() 
\ No newline at end of file
+def init_config(config_path: Optional[str] = None) -> Config:
+    """
+    Explicitly (re)initialize the configuration singleton.
+    
+    Args:
+        config_path: Path to the configuration YAML file
+        
+    Returns:
+        The new configuration instance
+    """
+    global _config
+    _config = Config(config_path)
+    return _config
+
+def get_config() -> Config:
+    """
+    Get the configuration singleton, loading it on first use.
+    
+    Returns:
+        The configuration instance
+    """
+    if _config is None:
+        return init_config()
+    return _config 
\ No newline at end of file
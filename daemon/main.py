@@ -3,222 +3,538 @@ Main daemon module for CosmosData.
 
 This module contains the main monitoring loop and orchestrates the data collection.
 """
+import os
+import argparse
 import logging
 import time
 import signal
 import sys
+import threading
+import multiprocessing
 import concurrent.futures
-from typing import Dict, Any, List, Set
+from typing import Dict, Any, List, Optional, Set
 
-from daemon.config.config import config
+from daemon.config.config import Config, init_config, get_config
 from daemon.services.client_factory import get_client_for_chain
-from daemon.services.mongo_service import mongo_service
-from daemon.models.blockchain_data import Block, Validators
-
-# Set up logging
-logging.basicConfig(
-    level=getattr(logging, config.log_level),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+from daemon.services.cosmos_client import CosmosClient
+from daemon.services.mongo_service import get_mongo_service
+from daemon.services.storage import get_storage, close_storage
+from daemon.services.migrations import apply_migrations
+from daemon.services.retention_service import RetentionService
+from daemon.services.block_analytics import BlockStatsService
+from daemon.services.endpoint_registry import EndpointPoller
+from daemon.services.pipeline import BlockPipeline
+from daemon.services.scheduler import get_scheduler
+from daemon.services.payload_budget import get_payload_budget
+from daemon.services.background import PeriodicTask
+from daemon.services.supervisor import WorkerSupervisor, assign_chains, worker_environment
+from daemon.models.blockchain_data import Status, parse_block_time
+from daemon.utils.profiling import init_profiler, get_profiler
+
 logger = logging.getLogger(__name__)
 
 # Flag for graceful shutdown
 running = True
 
+# Flag for reloading the chain configuration at the start of the next cycle
+reload_requested = False
+
+# Chain clients are kept across cycles so their HTTP connection pools stay warm
+_clients: Dict[str, CosmosClient] = {}
+_clients_lock = threading.Lock()
+
 def signal_handler(sig, frame):
     """Handle termination signals for graceful shutdown."""
     global running
     logger.info("Shutdown signal received, exiting gracefully...")
     running = False
 
-def collect_chain_data(chain_id: str) -> None:
+def reload_signal_handler(sig, frame):
+    """Handle SIGHUP by scheduling a configuration reload."""
+    global reload_requested
+    logger.info("Reload signal received, configuration will be reloaded")
+    reload_requested = True
+
+def get_chain_client(chain_id: str) -> CosmosClient:
+    """
+    Get the cached client for a chain, creating it on first use.
+    
+    Args:
+        chain_id: Chain identifier
+        
+    Returns:
+        Client for the chain
+    """
+    with _clients_lock:
+        client = _clients.get(chain_id)
+        if client is None:
+            client = _clients[chain_id] = get_client_for_chain(chain_id)
+        return client
+
+def close_chain_client(chain_id: str) -> None:
+    """
+    Close and forget the cached client for a chain.
+    
+    Args:
+        chain_id: Chain identifier
+    """
+    with _clients_lock:
+        client = _clients.pop(chain_id, None)
+    if client:
+        client.close()
+
+def reload_configuration() -> None:
+    """
+    Reload the chain configuration and apply the differences.
+    
+    Clients of removed or changed chains are closed, and new ones are created
+    on their next collection. Unchanged chains keep their clients.
+    """
+    diff = get_config().reload()
+    if not diff:
+        logger.info("Configuration reloaded, no chain changes")
+        return
+    
+    for chain_id in diff.removed + diff.changed:
+        close_chain_client(chain_id)
+    for chain_id in diff.removed:
+        get_scheduler().forget(chain_id)
+    
+    logger.info(
+        f"Configuration reloaded: added={diff.added}, "
+        f"removed={diff.removed}, changed={diff.changed}"
+    )
+
+def collect_chain_data(chain_id: str, cycle: int = 0) -> None:
     """
     Collect and store data for a specific chain.
     
+    Args:
+        chain_id: Chain identifier
+        cycle: Monitoring cycle number, used to select cycles for cProfile
+    """
+    with get_profiler().cycle_profile(cycle, chain_id):
+        _collect_chain_data(chain_id)
+
+def _collect_chain_data(chain_id: str) -> None:
+    """
+    Collect and store data for a specific chain, timing each stage.
+    
     Args:
         chain_id: Chain identifier
     """
     logger.info(f"Collecting data for chain: {chain_id}")
+    config = get_config()
+    storage = get_storage()
     chain_config = config.chains[chain_id]
+    profiler = get_profiler()
+    scheduler = get_scheduler()
     
     try:
-        client = get_client_for_chain(chain_id)
+        client = get_chain_client(chain_id)
         
         # Get current block height and node status
-        status_data = client.get_status()
-        latest_block_height = int(status_data.get("sync_info", {}).get("latest_block_height", 0))
+        with profiler.stage("fetch_status", chain_id):
+            status_data = client.get_status()
+        sync_info = status_data.get("sync_info", {})
+        latest_block_height = int(sync_info.get("latest_block_height", 0))
+        scheduler.record_tip(chain_id, latest_block_height, parse_block_time(sync_info.get("latest_block_time", "")))
         current_time = int(time.time())
         
-        # Store status data
-        mongo_service.store_blockchain_data(
-            chain_id=chain_id,
-            block_height=latest_block_height,
-            endpoint="status",
-            data=status_data,
-            timestamp=current_time
-        )
+        # Store the status sample
+        with profiler.stage("store_status", chain_id):
+            storage.store_status(Status(chain_id, latest_block_height, status_data, current_time))
         
         # Determine which block heights to query
-        stored_height = mongo_service.get_latest_block_height(chain_id)
+        with profiler.stage("stored_height", chain_id):
+            stored_height = storage.get_latest_block_height(chain_id)
+        scheduler.record_lag(chain_id, latest_block_height, stored_height)
         heights_to_query = []
+        backfill = False
         
         if stored_height is None:
             # First run, just get the latest block
             heights_to_query = [latest_block_height]
         elif stored_height < latest_block_height:
-            # Get new blocks since last run
-            # Limit to avoid overloading if we've been offline for a while
-            max_blocks = min(100, latest_block_height - stored_height)
+            # Get new blocks since last run, as many as the chain's share
+            # of the fetch budget allows this cycle
+            max_blocks = min(scheduler.max_blocks(chain_id), latest_block_height - stored_height)
             heights_to_query = list(range(stored_height + 1, stored_height + max_blocks + 1))
-        
-        # Collect data for each block height
-        for height in heights_to_query:
-            # Only process if we're still running (not shutting down)
-            if not running:
-                break
-                
-            logger.debug(f"Processing block {height} for {chain_id}")
-            
-            # Get block data
-            block_data = client.get_block(height)
-            
-            # Create a Block model and store it
-            block = Block(chain_id, height, block_data, current_time)
-            mongo_service.store_blockchain_data(
-                chain_id=block.chain_id,
-                block_height=block.block_height,
-                endpoint=block.endpoint,
-                data=block.data,
-                timestamp=block.timestamp
-            )
             
-            # Get validators for this block if enabled
-            if "validators" in chain_config.enabled_endpoints:
-                validators_data = client.get_validators(height)
-                validators = Validators(chain_id, height, validators_data, current_time)
-                mongo_service.store_blockchain_data(
-                    chain_id=validators.chain_id,
-                    block_height=validators.block_height,
-                    endpoint=validators.endpoint,
-                    data=validators.data,
-                    timestamp=validators.timestamp
-                )
-            
-            # Process Symphony-specific endpoints
-            if chain_id == "symphony-testnet-4":
-                # Market params
-                if "market_params" in chain_config.enabled_endpoints and hasattr(client, "get_market_params"):
-                    try:
-                        market_params_data = client.get_market_params()
-                        mongo_service.store_blockchain_data(
-                            chain_id=chain_id,
-                            block_height=height,
-                            endpoint="market_params",
-                            data=market_params_data,
-                            timestamp=current_time
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to get market params data for {chain_id}: {e}")
-                
-                # Exchange requirements
-                if "exchange_requirements" in chain_config.enabled_endpoints and hasattr(client, "get_exchange_requirements"):
-                    try:
-                        exchange_req_data = client.get_exchange_requirements()
-                        mongo_service.store_blockchain_data(
-                            chain_id=chain_id,
-                            block_height=height,
-                            endpoint="exchange_requirements",
-                            data=exchange_req_data,
-                            timestamp=current_time
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to get exchange requirements data for {chain_id}: {e}")
-                
-                # Tax rate
-                if "tax_rate" in chain_config.enabled_endpoints and hasattr(client, "get_tax_rate"):
-                    try:
-                        tax_rate_data = client.get_tax_rate()
-                        mongo_service.store_blockchain_data(
-                            chain_id=chain_id,
-                            block_height=height,
-                            endpoint="tax_rate",
-                            data=tax_rate_data,
-                            timestamp=current_time
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to get tax rate data for {chain_id}: {e}")
-                
-                # Note supply
-                if "note_supply" in chain_config.enabled_endpoints and hasattr(client, "get_note_supply"):
-                    try:
-                        note_supply_data = client.get_note_supply()
-                        mongo_service.store_blockchain_data(
-                            chain_id=chain_id,
-                            block_height=height,
-                            endpoint="note_supply",
-                            data=note_supply_data,
-                            timestamp=current_time
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to get note supply data for {chain_id}: {e}")
-                
-        client.close()
-        logger.info(f"Completed data collection for {chain_id}")
+            # Far behind the tip: trade write durability for throughput
+            backfill = latest_block_height - stored_height > config.backfill_lag_threshold
+        
+        # Fetch, model building and storage overlap in a staged pipeline
+        pipeline = BlockPipeline(
+            client,
+            chain_config,
+            storage,
+            current_time,
+            backfill=backfill,
+            fetch_workers=scheduler.workers_for(chain_id),
+            should_stop=lambda: not running
+        )
+        last_height = pipeline.run(heights_to_query)
+        
+        # Remaining lag decides whether the chain is polled again right away
+        scheduler.record_lag(chain_id, latest_block_height, last_height if last_height is not None else stored_height)
+        if config.adaptive_polling and last_height is not None:
+            with profiler.stage("block_interval", chain_id):
+                interval = storage.recent_block_interval(chain_id, last_height, config.block_interval_samples)
+            scheduler.record_block_interval(chain_id, interval)
+        
+        logger.info(f"Completed data collection for {chain_id} (stored through {last_height})")
+        logger.debug(f"Response cache for {chain_id}: {client.cache.stats()}")
     
     except Exception as e:
         logger.error(f"Error collecting data for {chain_id}: {e}")
+        scheduler.record_failure(chain_id)
 
 def monitoring_loop() -> None:
-    """Main monitoring loop that orchestrates data collection for all chains."""
+    """
+    Main monitoring loop that orchestrates data collection for all chains.
+    
+    Each chain is collected whenever it is due, and the scheduler sets its
+    next due time when the collection finishes: right away while it lags,
+    otherwise just after its next block is expected (see LagScheduler).
+    """
+    global reload_requested
     logger.info("Starting monitoring loop")
+    config = get_config()
+    profiler = get_profiler()
+    scheduler = get_scheduler()
+    cycle = 0
     
-    while running:
-        start_time = time.time()
-        chain_ids = list(config.chains.keys())
-        
-        logger.info(f"Collecting data for {len(chain_ids)} chains")
-        
-        # Use ThreadPoolExecutor to collect data for multiple chains in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=config.max_workers) as executor:
-            futures = {executor.submit(collect_chain_data, chain_id): chain_id for chain_id in chain_ids}
+    # Unix time each chain is due for collection
+    next_poll: Dict[str, float] = {}
+    in_flight: Dict[concurrent.futures.Future, str] = {}
+    next_report = time.time() + config.default_monitoring_frequency
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=config.max_workers) as executor:
+        while running or in_flight:
+            # Reload once no collection is in flight
+            reload_pending = reload_requested or (config.config_watch and config.file_changed())
+            if reload_pending and not in_flight:
+                reload_requested = False
+                reload_configuration()
+                for chain_id in set(next_poll) - set(config.chains):
+                    del next_poll[chain_id]
+            
+            now = time.time()
+            accepting = running and not reload_pending
+            busy = set(in_flight.values())
+            due = [
+                chain_id for chain_id in config.chains
+                if chain_id not in busy and next_poll.get(chain_id, 0) <= now
+            ] if accepting else []
+            if due:
+                # Lagging chains get more concurrent fetches, based on their last lag
+                scheduler.plan_cycle(list(config.chains))
+                logger.debug(f"Collecting data for {len(due)} chains")
+                for chain_id in due:
+                    in_flight[executor.submit(collect_chain_data, chain_id, cycle)] = chain_id
+                cycle += 1
+            
+            if now >= next_report:
+                next_report = now + config.default_monitoring_frequency
+                logger.info(f"Payload budget: {get_payload_budget().stats(reset_peak=True)}")
+                if profiler.enabled:
+                    logger.info(f"Stage timings:\n{profiler.report()}")
+            
+            # Wake on the next finished collection, the next due chain, or
+            # after a second to notice shutdown and reload requests
+            timeout = 1.0
+            if accepting:
+                busy = set(in_flight.values())
+                upcoming = [next_poll.get(chain_id, now) for chain_id in config.chains if chain_id not in busy]
+                timeout = min([timeout] + [max(0.0, due_time - now) for due_time in upcoming])
+            if not in_flight:
+                time.sleep(timeout)
+                continue
             
-            for future in concurrent.futures.as_completed(futures):
-                chain_id = futures[future]
+            done, _ = concurrent.futures.wait(
+                in_flight, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                chain_id = in_flight.pop(future)
                 try:
                     future.result()
                 except Exception as e:
                     logger.error(f"Chain {chain_id} data collection failed: {e}")
+                if chain_id in config.chains:
+                    delay = scheduler.poll_delay(chain_id, config.chains[chain_id].monitoring_frequency)
+                    next_poll[chain_id] = time.time() + delay
+                    logger.debug(f"Next poll of {chain_id} in {delay:.1f}s")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+    
+    Args:
+        argv: Arguments to parse (defaults to sys.argv)
+        
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="CosmoData collection daemon")
+    parser.add_argument("--profile", action="store_true",
+                        help="Log wall and CPU time per chain and stage after every cycle")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="Directory for cProfile and trace output (default: profiles)")
+    parser.add_argument("--pstats-every", type=int, default=0,
+                        help="Dump a cProfile of each chain collection every N cycles (0 disables)")
+    parser.add_argument("--trace", action="store_true",
+                        help="Write stage spans as Chrome trace JSON on shutdown (implies --profile)")
+    parser.add_argument("--processes", type=int,
+                        help="Split chains across N worker processes (default: CHAIN_PROCESSES, 0 for one process)")
+    return parser.parse_args(argv)
+
+def _setup_logging(config: Config, worker: bool = False) -> None:
+    """
+    Configure logging for the daemon or one of its worker processes.
+    
+    Args:
+        config: Loaded configuration
+        worker: Include the process name, to tell the workers' output apart
+    """
+    process = "%(processName)s - " if worker else ""
+    logging.basicConfig(
+        level=getattr(logging, config.log_level),
+        format=f"%(asctime)s - {process}%(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
+
+def _setup_profiling(args: argparse.Namespace) -> None:
+    """
+    Enable the profiler if any profiling flag is given.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    if args.profile or args.trace or args.pstats_every:
+        init_profiler(
+            enabled=True,
+            output_dir=args.profile_dir,
+            pstats_every=args.pstats_every,
+            trace=args.trace
+        )
+        logger.info(f"Profiling enabled, output in {args.profile_dir}")
+
+def start_maintenance_tasks(config: Config) -> List[PeriodicTask]:
+    """
+    Start the background tasks that work on the stored data of all chains.
+    
+    Args:
+        config: Loaded configuration
         
-        # Calculate sleep time to maintain the desired monitoring frequency
-        elapsed_time = time.time() - start_time
-        sleep_time = max(1, config.default_monitoring_frequency - elapsed_time)
+    Returns:
+        The started tasks
+    """
+    tasks = [
+        # Retention runs in the background so it never delays a collection cycle
+        PeriodicTask("retention", RetentionService().run_once, config.retention_interval),
+        PeriodicTask("block_stats", BlockStatsService().run_once, config.block_stats_interval),
+    ]
+    for task in tasks:
+        task.start()
+    return tasks
+
+def start_spool_replay(config: Config) -> PeriodicTask:
+    """
+    Start the background task that replays this process's write spool.
+    
+    Args:
+        config: Loaded configuration
         
-        logger.info(f"Monitoring cycle completed in {elapsed_time:.2f}s, sleeping for {sleep_time:.2f}s")
+    Returns:
+        The started task
+    """
+    # Documents spooled while MongoDB was unavailable are written back here
+    task = PeriodicTask("spool_replay", lambda: get_storage().replay_spool(), config.spool_replay_interval)
+    task.start()
+    return task
+
+def start_collection_tasks(config: Config) -> List[PeriodicTask]:
+    """
+    Start the background tasks that belong to a collecting process.
+    
+    Args:
+        config: Loaded configuration
         
-        # Sleep in small increments to allow for graceful shutdown
-        for _ in range(int(sleep_time)):
-            if not running:
-                break
+    Returns:
+        The started tasks
+    """
+    # Chain-state endpoints are polled on their own intervals, not per block
+    endpoint_task = PeriodicTask("endpoint_poller", EndpointPoller(get_chain_client).run_once, config.endpoint_poll_tick)
+    endpoint_task.start()
+    return [endpoint_task, start_spool_replay(config)]
+
+def _shutdown(tasks: List[PeriodicTask]) -> None:
+    """
+    Stop background tasks and release clients and connections.
+    
+    Args:
+        tasks: Background tasks to stop
+    """
+    logger.info("Cleaning up resources")
+    for task in tasks:
+        task.stop()
+    for chain_id in list(_clients):
+        close_chain_client(chain_id)
+    close_storage()
+    get_profiler().write_trace()
+
+def run_worker(index: int, groups: int, argv: List[str], environment: Dict[str, str]) -> None:
+    """
+    Entry point of a chain group worker process.
+    
+    The worker collects only the chains of its group, with its own clients,
+    MongoDB connection and write spool.
+    
+    Args:
+        index: Group index of the worker
+        groups: Number of worker groups
+        argv: Command line arguments of the daemon
+        environment: Settings for this worker, see worker_environment()
+    """
+    os.environ.update(environment)
+    args = parse_args(argv)
+    
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGHUP, reload_signal_handler)
+    
+    config = init_config()
+    _setup_logging(config, worker=True)
+    _setup_profiling(args)
+    logger.info(f"Worker {index + 1}/{groups} collecting {sorted(config.chains)}")
+    
+    # Exit with the supervisor instead of collecting unsupervised
+    parent = multiprocessing.parent_process()
+    def check_parent() -> None:
+        global running
+        if parent is not None and not parent.is_alive():
+            logger.error("Supervisor process is gone, shutting down")
+            running = False
+    
+    parent_task = PeriodicTask("parent_watch", check_parent, 5)
+    parent_task.start()
+    tasks = start_collection_tasks(config) + [parent_task]
+    try:
+        monitoring_loop()
+    except Exception as e:
+        logger.error(f"Fatal error in monitoring loop: {e}")
+    finally:
+        _shutdown(tasks)
+        logger.info("Worker shutdown complete")
+
+def supervise(config: Config, argv: List[str]) -> None:
+    """
+    Run the chain group workers until shutdown, restarting any that exit.
+    
+    The supervising process itself only runs the tasks that work on the
+    stored data of all chains, and replays spool files left by a
+    single-process run.
+    
+    Args:
+        config: Loaded configuration
+        argv: Command line arguments, passed on to the workers
+    """
+    global reload_requested
+    groups = config.chain_processes
+    supervisor = WorkerSupervisor(
+        run_worker,
+        groups,
+        lambda index: (index, groups, argv, worker_environment(index, groups, config))
+    )
+    logger.info(f"Collecting {len(config.chains)} chains in {groups} worker processes")
+    supervisor.start()
+    
+    def reload_assignment() -> List[int]:
+        # Workers whose share of the chains changed restart with the new share
+        before = assign_chains(config.chains, groups)
+        reload_configuration()
+        after = assign_chains(config.chains, groups)
+        restarted = []
+        for index in range(groups):
+            if after[index] != before[index]:
+                logger.info(f"Worker {index} now collects {after[index]}, restarting it")
+                supervisor.restart(index)
+                restarted.append(index)
+        return restarted
+    
+    try:
+        while running:
+            if reload_requested:
+                reload_requested = False
+                # Restarted workers already read the new configuration, and
+                # SIGHUP would kill them before their handler is installed
+                restarted = reload_assignment()
+                supervisor.signal_all(signal.SIGHUP, skip=restarted)
+            elif config.config_watch and config.file_changed():
+                # Workers notice changes to their own chains on their own
+                reload_assignment()
+            supervisor.check()
             time.sleep(1)
+    finally:
+        logger.info("Stopping worker processes")
+        supervisor.stop()
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
     """Main entry point for the daemon."""
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGHUP, reload_signal_handler)
+    
+    # Configuration and database are initialized explicitly here rather than
+    # at import time, so importing daemon modules stays cheap
+    config = init_config()
+    if args.processes is not None:
+        config.chain_processes = args.processes
     
+    _setup_logging(config)
     logger.info("CosmoData daemon starting up")
+    _setup_profiling(args)
+    
+    # Worker processes would all write to the one SQLite file, taking turns
+    # on its write lock, which defeats the point of running them
+    if config.storage_backend == "sqlite" and config.chain_processes > 0:
+        logger.error("STORAGE_BACKEND=sqlite does not support multi-process mode, set CHAIN_PROCESSES=0")
+        sys.exit(1)
+    
+    # Fails on an unknown STORAGE_BACKEND before anything is started
+    get_storage()
+    
+    tasks: List[PeriodicTask] = []
+    if config.storage_backend == "mongodb":
+        # One-time schema setup; a single lookup when already up to date
+        try:
+            apply_migrations(get_mongo_service().db)
+        except Exception as e:
+            logger.error(f"Failed to apply database migrations: {e}")
+        
+        tasks = start_maintenance_tasks(config)
+    else:
+        logger.info(f"Using the {config.storage_backend} backend; retention and block statistics are disabled")
     
     try:
-        # Start the monitoring loop
-        monitoring_loop()
+        if config.chain_processes > 0:
+            # Replays a spool file left by a single-process run
+            tasks.append(start_spool_replay(config))
+            supervise(config, argv)
+        else:
+            tasks += start_collection_tasks(config)
+            # Start the monitoring loop
+            monitoring_loop()
     except Exception as e:
         logger.error(f"Fatal error in monitoring loop: {e}")
     finally:
         # Clean up resources
-        logger.info("Cleaning up resources")
-        mongo_service.close()
+        _shutdown(tasks)
         logger.info("Daemon shutdown complete")
 
 if __name__ == "__main__":
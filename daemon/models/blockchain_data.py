@@ -3,9 +3,45 @@ Blockchain data models for the CosmoData daemon.
 
 This module defines data models for various blockchain data types.
 """
+import re
 import time
+import json
+import hashlib
+from datetime import datetime
 from typing import Dict, Any, Optional, List, Union
 
+BLOCK_TIME_PATTERN = re.compile(
+    r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d+))?(Z|[+-]\d{2}:\d{2})?$"
+)
+
+
+def parse_block_time(value: str) -> Optional[float]:
+    """
+    Parse a Tendermint RFC 3339 block time into a Unix timestamp.
+    
+    Block times carry nanosecond precision (e.g. '2023-09-01T00:00:00.123456789Z'),
+    which datetime cannot parse directly, so the fraction is truncated to
+    microseconds first.
+    
+    Args:
+        value: Block time string
+        
+    Returns:
+        Unix timestamp in seconds, or None if the value cannot be parsed
+    """
+    match = BLOCK_TIME_PATTERN.match(value or "")
+    if not match:
+        return None
+    
+    base, fraction, offset = match.groups()
+    fraction = (fraction or "0")[:6].ljust(6, "0")
+    if offset in (None, "Z"):
+        offset = "+00:00"
+    try:
+        return datetime.fromisoformat(f"{base}.{fraction}{offset}").timestamp()
+    except ValueError:
+        return None
+
 
 class BlockchainData:
     """Base class for blockchain data."""
@@ -66,6 +102,8 @@ class Block(BlockchainData):
             timestamp: Unix timestamp (defaults to current time)
         """
         super().__init__(chain_id, block_height, "block", data, timestamp)
+        # Extracted header fields, filled on the first header_summary() call
+        self._header_summary: Optional[Dict[str, Any]] = None
     
     @property
     def proposer(self) -> str:
@@ -92,6 +130,94 @@ class Block(BlockchainData):
             return self.data.get("block", {}).get("header", {}).get("time", "")
         except (KeyError, AttributeError):
             return ""
+    
+    @property
+    def block_hash(self) -> str:
+        """
+        Get the hash of this block.
+        
+        Returns:
+            Block hash as a string
+        """
+        try:
+            return self.data.get("block_id", {}).get("hash", "")
+        except (KeyError, AttributeError):
+            return ""
+    
+    @property
+    def last_block_hash(self) -> str:
+        """
+        Get the hash of the previous block, as recorded in this block's header.
+        
+        Returns:
+            Previous block hash as a string
+        """
+        try:
+            return self.data.get("block", {}).get("header", {}).get("last_block_id", {}).get("hash", "")
+        except (KeyError, AttributeError):
+            return ""
+    
+    @property
+    def tx_count(self) -> int:
+        """
+        Get the number of transactions in the block.
+        
+        Returns:
+            Transaction count as an integer
+        """
+        try:
+            return len(self.data.get("block", {}).get("data", {}).get("txs", None) or [])
+        except (KeyError, AttributeError):
+            return 0
+    
+    @property
+    def commit_round(self) -> int:
+        """
+        Get the consensus round in which the previous block was committed.
+        
+        A round above zero means the proposer of round zero failed to get its
+        proposal committed.
+        
+        Returns:
+            Commit round as an integer
+        """
+        try:
+            return int(self.data.get("block", {}).get("last_commit", {}).get("round", 0) or 0)
+        except (KeyError, AttributeError, ValueError):
+            return 0
+    
+    def header_summary(self) -> Dict[str, Any]:
+        """
+        Get the extracted header fields stored in the block_headers collection.
+        
+        The fields are extracted once and cached, so the pipeline can extract
+        them in a transformer thread and the writer reuses the result.
+        
+        Returns:
+            Dictionary of header fields used for analytics and integrity checks
+        """
+        if self._header_summary is None:
+            self._header_summary = self._extract_header_summary()
+        return self._header_summary
+    
+    def _extract_header_summary(self) -> Dict[str, Any]:
+        """
+        Extract the header fields of the block.
+        
+        Returns:
+            Dictionary of header fields
+        """
+        return {
+            "chain_id": self.chain_id,
+            "block_height": self.block_height,
+            "time": self.timestamp_utc,
+            "time_unix": parse_block_time(self.timestamp_utc),
+            "proposer": self.proposer,
+            "hash": self.block_hash,
+            "last_block_hash": self.last_block_hash,
+            "tx_count": self.tx_count,
+            "commit_round": self.commit_round
+        }
 
 
 class Validators(BlockchainData):
@@ -145,4 +271,137 @@ class Validators(BlockchainData):
             )
             return sorted_validators[:limit]
         except (KeyError, AttributeError):
-            return [] 
\ No newline at end of file
+            return []
+    
+    @property
+    def total_voting_power(self) -> int:
+        """
+        Get the summed voting power of the validator set.
+        
+        Returns:
+            Total voting power as an integer
+        """
+        try:
+            return sum(int(v.get("voting_power", 0)) for v in self.data.get("validators", []))
+        except (KeyError, AttributeError, ValueError):
+            return 0
+    
+    def summary(self, limit: int = 10) -> Dict[str, Any]:
+        """
+        Get the validator set summary stored in the validator_summaries collection.
+        
+        Args:
+            limit: Number of top validators by voting power to include
+            
+        Returns:
+            Dictionary with the set size, total voting power and top validators
+        """
+        total = self.total_voting_power
+        return {
+            "chain_id": self.chain_id,
+            "block_height": self.block_height,
+            "validator_count": self.validator_count,
+            "total_voting_power": total,
+            "top_validators": [
+                {
+                    "address": v.get("address", ""),
+                    "voting_power": int(v.get("voting_power", 0)),
+                    "share": int(v.get("voting_power", 0)) / total if total else 0.0
+                }
+                for v in self.get_validators_by_voting_power(limit)
+            ]
+        }
+
+
+class Status(BlockchainData):
+    """Node status data model."""
+    
+    def __init__(self, 
+                 chain_id: str, 
+                 block_height: int, 
+                 data: Dict[str, Any],
+                 timestamp: Optional[int] = None):
+        """
+        Initialize status data.
+        
+        Args:
+            chain_id: Chain identifier
+            block_height: Latest block height reported by the node
+            data: Status data
+            timestamp: Unix timestamp (defaults to current time)
+        """
+        super().__init__(chain_id, block_height, "status", data, timestamp)
+    
+    @property
+    def sync_info(self) -> Dict[str, Any]:
+        """
+        Get the sync information reported by the node.
+        
+        Returns:
+            Sync info as a dictionary
+        """
+        try:
+            return self.data.get("sync_info", {}) or {}
+        except (KeyError, AttributeError):
+            return {}
+    
+    @property
+    def node_info(self) -> Dict[str, Any]:
+        """
+        Get the static node information.
+        
+        Returns:
+            Node info as a dictionary
+        """
+        try:
+            return self.data.get("node_info", {}) or {}
+        except (KeyError, AttributeError):
+            return {}
+    
+    @property
+    def node_info_hash(self) -> str:
+        """
+        Get a stable hash of the node information, used to detect changes.
+        
+        Returns:
+            SHA-256 hex digest of the canonical node info JSON
+        """
+        canonical = json.dumps(self.node_info, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    def to_sample(self) -> Dict[str, Any]:
+        """
+        Get the fields that change between polls.
+        
+        Returns:
+            Dictionary with the sync heights, block times and catching_up flag
+        """
+        sync_info = self.sync_info
+        return {
+            "latest_block_height": int(sync_info.get("latest_block_height", 0) or 0),
+            "latest_block_time": sync_info.get("latest_block_time", ""),
+            "earliest_block_height": int(sync_info.get("earliest_block_height", 0) or 0),
+            "earliest_block_time": sync_info.get("earliest_block_time", ""),
+            "catching_up": bool(sync_info.get("catching_up", False))
+        }
+
+def model_from_dict(document: Dict[str, Any]) -> BlockchainData:
+    """
+    Rebuild a data model from a stored blockchain_data document.
+    
+    Args:
+        document: Document with chain_id, block_height, endpoint, data and timestamp
+        
+    Returns:
+        Model of the class matching the document's endpoint
+    """
+    chain_id = document["chain_id"]
+    block_height = document["block_height"]
+    endpoint = document["endpoint"]
+    data = document["data"]
+    timestamp = document.get("timestamp")
+    if endpoint == "block":
+        return Block(chain_id, block_height, data, timestamp)
+    if endpoint == "validators":
+        return Validators(chain_id, block_height, data, timestamp)
+    return BlockchainData(chain_id, block_height, endpoint, data, timestamp)
@@ -0,0 +1,71 @@
+"""
+Background task support for the CosmosData daemon.
+
+This module provides a small helper for running maintenance work periodically
+in a separate thread alongside the monitoring loop.
+"""
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """Runs a callable at a fixed interval in a daemon thread."""
+
+    def __init__(self, name: str, func: Callable[[], None], interval: int):
+        """
+        Initialize the periodic task.
+
+        Args:
+            name: Task name used for the thread and in log messages
+            func: Callable to run on every tick
+            interval: Seconds to wait between runs
+        """
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start the task thread."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Started background task: {self.name}")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the task thread.
+
+        Args:
+            timeout: Seconds to wait for a running tick to finish
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            logger.info(f"Stopped background task: {self.name}")
+
+    @property
+    def stopped(self) -> bool:
+        """
+        Check whether the task has been asked to stop.
+
+        Returns:
+            True if stop() has been called
+        """
+        return self._stop_event.is_set()
+
+    def _run(self) -> None:
+        """Thread body: run the callable until stopped."""
+        while not self._stop_event.is_set():
+            try:
+                self.func()
+            except Exception as e:
+                logger.error(f"Background task {self.name} failed: {e}")
+
+            self._stop_event.wait(self.interval)
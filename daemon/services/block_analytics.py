@@ -0,0 +1,288 @@
+"""
+Block analytics for the CosmosData daemon.
+
+This module computes block time, proposer and throughput statistics from the
+extracted headers in the block_headers collection. Headers are loaded a height
+window at a time into NumPy arrays and reduced in vectorized form, and the
+results are stored as one block_stats document per window, so dashboards read
+precomputed numbers instead of scanning raw blocks.
+"""
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from pymongo import DESCENDING, ASCENDING
+from pymongo.database import Database
+
+from daemon.config.config import get_config
+from daemon.services.mongo_service import get_mongo_service
+
+logger = logging.getLogger(__name__)
+
+class HeaderWindow:
+    """Header fields of a range of blocks, as parallel NumPy arrays."""
+
+    def __init__(self,
+                 chain_id: str,
+                 heights: np.ndarray,
+                 times: np.ndarray,
+                 proposers: np.ndarray,
+                 tx_counts: np.ndarray,
+                 commit_rounds: np.ndarray):
+        """
+        Initialize the header window.
+
+        Args:
+            chain_id: Chain identifier
+            heights: Block heights (int64), ascending
+            times: Block times as Unix seconds (float64, NaN when unknown)
+            proposers: Proposer addresses (object)
+            tx_counts: Transactions per block (int64)
+            commit_rounds: Commit round of the previous block (int64)
+        """
+        self.chain_id = chain_id
+        self.heights = heights
+        self.times = times
+        self.proposers = proposers
+        self.tx_counts = tx_counts
+        self.commit_rounds = commit_rounds
+
+    def __len__(self) -> int:
+        return len(self.heights)
+
+def load_header_window(db: Database, chain_id: str, start_height: int, end_height: int) -> HeaderWindow:
+    """
+    Load the stored headers of a height range.
+
+    Args:
+        db: Database holding the block_headers collection
+        chain_id: Chain identifier
+        start_height: First height of the range (inclusive)
+        end_height: Last height of the range (inclusive)
+
+    Returns:
+        Header window with the blocks found in the range
+    """
+    rows = list(db.block_headers.find(
+        {"chain_id": chain_id, "block_height": {"$gte": start_height, "$lte": end_height}},
+        {"_id": 0, "block_height": 1, "time_unix": 1, "proposer": 1, "tx_count": 1, "commit_round": 1}
+    ).sort("block_height", ASCENDING))
+
+    count = len(rows)
+    return HeaderWindow(
+        chain_id=chain_id,
+        heights=np.fromiter((row["block_height"] for row in rows), dtype=np.int64, count=count),
+        times=np.fromiter(
+            (row.get("time_unix") if row.get("time_unix") is not None else np.nan for row in rows),
+            dtype=np.float64, count=count
+        ),
+        proposers=np.array([row.get("proposer", "") for row in rows], dtype=object),
+        tx_counts=np.fromiter((row.get("tx_count", 0) for row in rows), dtype=np.int64, count=count),
+        commit_rounds=np.fromiter((row.get("commit_round", 0) for row in rows), dtype=np.int64, count=count)
+    )
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Compute a trailing rolling mean.
+
+    Args:
+        values: Input series
+        window: Number of samples per mean
+
+    Returns:
+        Array of len(values) - window + 1 means (empty if the series is shorter)
+    """
+    if window <= 0 or len(values) < window:
+        return np.empty(0, dtype=np.float64)
+    cumulative = np.cumsum(np.insert(values.astype(np.float64), 0, 0.0))
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+def block_intervals(window: HeaderWindow) -> np.ndarray:
+    """
+    Get the time between consecutive blocks in a window.
+
+    Intervals are only taken between adjacent heights with known times, so
+    gaps in the stored range do not show up as long blocks.
+
+    Args:
+        window: Header window
+
+    Returns:
+        Block intervals in seconds
+    """
+    if len(window) < 2:
+        return np.empty(0, dtype=np.float64)
+    intervals = np.diff(window.times)
+    valid = (np.diff(window.heights) == 1) & np.isfinite(intervals)
+    return intervals[valid]
+
+def recent_block_interval(db: Database, chain_id: str, latest_height: int, samples: int) -> Optional[float]:
+    """
+    Estimate a chain's current block interval from its latest stored headers.
+
+    The median is used so a single slow block (e.g. after a missed proposal)
+    does not shift the estimate.
+
+    Args:
+        db: Database holding the block_headers collection
+        chain_id: Chain identifier
+        latest_height: Height to look back from
+        samples: Number of blocks to look back over
+
+    Returns:
+        Median seconds between blocks, or None if too few headers are stored
+    """
+    intervals = block_intervals(load_header_window(db, chain_id, latest_height - samples, latest_height))
+    intervals = intervals[intervals > 0]
+    if len(intervals) == 0:
+        return None
+    return float(np.median(intervals))
+
+def compute_window_stats(window: HeaderWindow, rolling_window: int = 100, top_proposers: int = 20) -> Dict[str, Any]:
+    """
+    Compute block time, proposer and throughput statistics for a window.
+
+    Args:
+        window: Header window with at least one block
+        rolling_window: Number of blocks per rolling block time sample
+        top_proposers: Number of most frequent proposers to include
+
+    Returns:
+        Dictionary of statistics for the window
+    """
+    intervals = block_intervals(window)
+    known_times = window.times[np.isfinite(window.times)]
+    span = float(known_times[-1] - known_times[0]) if len(known_times) > 1 else 0.0
+
+    block_time: Optional[Dict[str, float]] = None
+    if len(intervals):
+        block_time = {
+            "mean": float(intervals.mean()),
+            "median": float(np.median(intervals)),
+            "p95": float(np.percentile(intervals, 95)),
+            "min": float(intervals.min()),
+            "max": float(intervals.max())
+        }
+
+    # Rolling mean sampled once per rolling window to keep the document small
+    rolling = rolling_mean(intervals, rolling_window)[::rolling_window] if rolling_window else np.empty(0)
+
+    proposers, counts = np.unique(window.proposers.astype(str), return_counts=True)
+    order = np.argsort(counts)[::-1][:top_proposers]
+
+    return {
+        "block_count": int(len(window)),
+        "first_height": int(window.heights[0]),
+        "last_height": int(window.heights[-1]),
+        "start_time": float(known_times[0]) if len(known_times) else None,
+        "end_time": float(known_times[-1]) if len(known_times) else None,
+        "block_time": block_time,
+        "rolling_block_time": [float(value) for value in rolling],
+        "rolling_window": rolling_window,
+        "tx_count": int(window.tx_counts.sum()),
+        # Transactions in blocks after the first, over the time they took
+        "txs_per_sec": float(window.tx_counts[1:].sum() / span) if span > 0 else None,
+        "missed_proposer_share": float((window.commit_rounds > 0).mean()),
+        "proposer_count": int(len(proposers)),
+        "top_proposers": [
+            {
+                "proposer": str(proposers[i]),
+                "blocks": int(counts[i]),
+                "share": float(counts[i] / len(window))
+            }
+            for i in order
+        ]
+    }
+
+class BlockStatsService:
+    """Service that maintains incremental per-window block statistics."""
+
+    def __init__(self, window_size: int = None, rolling_window: int = None, max_windows: int = 50):
+        """
+        Initialize the block stats service.
+
+        Args:
+            window_size: Number of heights per window (falls back to config)
+            rolling_window: Blocks per rolling block time sample (falls back to config)
+            max_windows: Maximum windows computed per chain in a single run
+        """
+        config = get_config()
+        self.window_size = window_size or config.block_stats_window
+        self.rolling_window = rolling_window or config.block_stats_rolling
+        self.max_windows = max_windows
+
+    def run_once(self) -> None:
+        """Compute any newly completed windows for every configured chain."""
+        for chain_id in list(get_config().chains):
+            try:
+                computed = self.update_chain(chain_id)
+                if computed:
+                    logger.info(f"Computed {computed} block stats windows for {chain_id}")
+            except Exception as e:
+                logger.error(f"Failed to compute block stats for {chain_id}: {e}")
+
+    def update_chain(self, chain_id: str) -> int:
+        """
+        Compute the completed windows after the last stored one.
+
+        A window is only computed once the stored headers reach its last
+        height, so every window is computed exactly once.
+
+        Args:
+            chain_id: Chain identifier
+
+        Returns:
+            Number of windows computed
+        """
+        db = get_mongo_service().db
+        size = self.window_size
+
+        latest = db.block_headers.find_one(
+            {"chain_id": chain_id}, {"block_height": 1}, sort=[("block_height", DESCENDING)]
+        )
+        if not latest:
+            return 0
+
+        last_window = db.block_stats.find_one(
+            {"chain_id": chain_id, "window_size": size},
+            {"window_start": 1},
+            sort=[("window_start", DESCENDING)]
+        )
+        if last_window:
+            start = last_window["window_start"] + size
+        else:
+            first = db.block_headers.find_one(
+                {"chain_id": chain_id}, {"block_height": 1}, sort=[("block_height", ASCENDING)]
+            )
+            start = first["block_height"] - first["block_height"] % size
+
+        computed = 0
+        while start + size - 1 <= latest["block_height"] and computed < self.max_windows:
+            window = load_header_window(db, chain_id, start, start + size - 1)
+            stats = compute_window_stats(window, self.rolling_window) if len(window) else {"block_count": 0}
+            stats.update({"chain_id": chain_id, "window_size": size, "window_start": start})
+            db.block_stats.update_one(
+                {"chain_id": chain_id, "window_size": size, "window_start": start},
+                {"$set": stats},
+                upsert=True
+            )
+            start += size
+            computed += 1
+
+        return computed
+
+    def get_stats(self, chain_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get the most recent stored windows for a chain.
+
+        Args:
+            chain_id: Chain identifier
+            limit: Maximum number of windows
+
+        Returns:
+            List of block_stats documents, newest first
+        """
+        return list(get_mongo_service().db.block_stats.find(
+            {"chain_id": chain_id, "window_size": self.window_size},
+            {"_id": 0}
+        ).sort("window_start", DESCENDING).limit(limit))
@@ -0,0 +1,116 @@
+"""
+New-data notifications for the CosmosData daemon.
+
+Every committed write batch is announced by a small document in the capped
+block_events collection: the chain, the height range and the endpoints that
+were written. Consumers watch that collection instead of polling the large
+blockchain_data collection; watch_block_events() uses a change stream where
+the server supports it (replica sets) and a tailable cursor otherwise.
+"""
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterator, List, Optional
+
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.database import Database
+from pymongo.errors import OperationFailure, PyMongoError
+
+from daemon.models.blockchain_data import BlockchainData
+
+logger = logging.getLogger(__name__)
+
+def build_events(items: List[BlockchainData]) -> List[Dict[str, Any]]:
+    """
+    Summarize a committed batch as one event per chain.
+
+    Args:
+        items: Data models of the batch
+
+    Returns:
+        Event documents
+    """
+    by_chain: Dict[str, List[BlockchainData]] = {}
+    for item in items:
+        by_chain.setdefault(item.chain_id, []).append(item)
+
+    now = datetime.now(tz=timezone.utc)
+    events = []
+    for chain_id, chain_items in by_chain.items():
+        heights = [item.block_height for item in chain_items]
+        block_heights = [item.block_height for item in chain_items if item.endpoint == "block"]
+        events.append({
+            "chain_id": chain_id,
+            "from_height": min(heights),
+            "to_height": max(heights),
+            "latest_block_height": max(block_heights) if block_heights else None,
+            "endpoints": sorted({item.endpoint for item in chain_items}),
+            "count": len(chain_items),
+            "time": now
+        })
+    return events
+
+def publish_batch(db: Database, items: List[BlockchainData]) -> None:
+    """
+    Announce a committed batch in block_events.
+
+    Failures are logged and otherwise ignored; the data itself is already
+    stored and consumers can catch up from it.
+
+    Args:
+        db: Target database
+        items: Data models of the batch
+    """
+    if not items:
+        return
+    try:
+        db.block_events.insert_many(build_events(items), ordered=False)
+    except PyMongoError as e:
+        logger.warning(f"Failed to publish block events: {e}")
+
+def watch_block_events(db: Database,
+                       chain_id: Optional[str] = None,
+                       after_id: Optional[ObjectId] = None,
+                       max_await_ms: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Yield block events as they are published.
+
+    Args:
+        db: Database holding the block_events collection
+        chain_id: Only yield events of this chain
+        after_id: Only yield events newer than this event _id (for resuming);
+            by default only events published from now on are yielded
+        max_await_ms: Longest a single wait for new events may block
+
+    Yields:
+        Event documents
+    """
+    query: Dict[str, Any] = {"chain_id": chain_id} if chain_id else {}
+
+    if after_id is None:
+        change_filter: Dict[str, Any] = {"operationType": "insert"}
+        if chain_id:
+            change_filter["fullDocument.chain_id"] = chain_id
+        try:
+            with db.block_events.watch([{"$match": change_filter}], max_await_time_ms=max_await_ms) as stream:
+                for change in stream:
+                    yield change["fullDocument"]
+            return
+        except OperationFailure as e:
+            # Standalone servers do not support change streams
+            logger.info(f"Change streams unavailable ({e}), tailing block_events instead")
+        newest = db.block_events.find_one(sort=[("$natural", -1)])
+        after_id = newest["_id"] if newest else ObjectId.from_datetime(datetime.now(tz=timezone.utc))
+
+    while True:
+        cursor = db.block_events.find(
+            {**query, "_id": {"$gt": after_id}},
+            cursor_type=CursorType.TAILABLE_AWAIT
+        ).max_await_time_ms(max_await_ms)
+        while cursor.alive:
+            for event in cursor:
+                after_id = event["_id"]
+                yield event
+        # A tailable cursor dies when it finds nothing to start from
+        time.sleep(max_await_ms / 1000)
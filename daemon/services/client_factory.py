@@ -6,7 +6,7 @@ This module provides a factory for creating appropriate clients for different ch
 import logging
 from typing import Dict, Type
 
-from daemon.config.config import config, ChainConfig
+from daemon.config.config import get_config, ChainConfig
 from daemon.services.cosmos_client import CosmosClient
 from daemon.services.symphony_client import SymphonyClient
 
@@ -31,6 +31,7 @@ def get_client_for_chain(chain_id: str) -> CosmosClient:
     Raises:
         ValueError: If the chain_id is not found in the configuration
     """
+    config = get_config()
     if chain_id not in config.chains:
         raise ValueError(f"Chain {chain_id} not found in configuration")
     
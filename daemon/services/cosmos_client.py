@@ -3,17 +3,25 @@ Base CosmosSDK API client.
 
 This module provides a base class for interacting with CosmosSDK chains.
 """
+import json
 import logging
 import time
+import concurrent.futures
 import requests
 from typing import Dict, Any, Optional, List, Union
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
-from daemon.config.config import config, ChainConfig
+from daemon.config.config import get_config, ChainConfig, EndpointSpec
+from daemon.services.response_cache import ResponseCache
+from daemon.services.payload_budget import get_payload_budget
+from daemon.utils.profiling import get_profiler
 
 logger = logging.getLogger(__name__)
 
+# Read size for response bodies without a Content-Length
+STREAM_CHUNK_SIZE = 1024 * 1024
+
 class CosmosClient:
     """Base client for interacting with CosmosSDK chains."""
     
@@ -25,7 +33,9 @@ class CosmosClient:
             chain_config: Configuration for the chain
         """
         self.chain_config = chain_config
+        self.config = get_config()
         self.session = self._setup_session()
+        self.cache = ResponseCache(self.config.response_cache_size)
     
     def _setup_session(self) -> requests.Session:
         """
@@ -37,8 +47,8 @@ class CosmosClient:
         session = requests.Session()
         
         retry_strategy = Retry(
-            total=config.max_retries,
-            backoff_factor=config.retry_backoff_factor,
+            total=self.config.max_retries,
+            backoff_factor=self.config.retry_backoff_factor,
             status_forcelist=[429, 500, 502, 503, 504],
         )
         
@@ -48,13 +58,22 @@ class CosmosClient:
         
         return session
     
-    def _make_rest_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _make_rest_request(self,
+                           endpoint: str,
+                           params: Optional[Dict[str, Any]] = None,
+                           cache_ttl: Optional[float] = None) -> Dict[str, Any]:
         """
         Make a request to a REST API endpoint.
         
+        Responses of endpoints with a cache TTL are served from the response
+        cache while fresh. Once expired they are revalidated with
+        If-None-Match when the gateway sent an ETag.
+        
         Args:
             endpoint: API endpoint path (without the base URL)
             params: Query parameters
+            cache_ttl: Seconds to cache the response (falls back to the chain's
+                cache_ttl setting for the endpoint; 0 disables caching)
             
         Returns:
             Response data as a dictionary
@@ -62,20 +81,96 @@ class CosmosClient:
         Raises:
             RequestException: If the request fails
         """
-        url = f"{self.chain_config.rest_base_url}/{endpoint.lstrip('/')}"
+        path = endpoint.lstrip('/')
+        url = f"{self.chain_config.rest_base_url}/{path}"
+        
+        if cache_ttl is None:
+            cache_ttl = self.chain_config.cache_ttls.get(path, 0)
+        
+        cache_key = None
+        cached = None
+        headers = None
+        if cache_ttl > 0:
+            cache_key = f"{url}?{sorted((params or {}).items())}"
+            cached, fresh = self.cache.lookup(cache_key)
+            if fresh:
+                return cached.data
+            if cached and cached.etag:
+                headers = {"If-None-Match": cached.etag}
         
+        profiler = get_profiler()
         try:
-            response = self.session.get(
-                url,
-                params=params,
-                timeout=config.request_timeout
-            )
-            response.raise_for_status()
-            return response.json()
+            with profiler.stage("http", self.chain_config.chain_id):
+                response = self.session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=self.config.request_timeout,
+                    stream=True
+                )
+            with response:
+                if response.status_code == 304 and cached:
+                    self.cache.refresh(cache_key, cache_ttl)
+                    return cached.data
+                
+                response.raise_for_status()
+                data = self._read_json(response)
+            
+            if cache_key:
+                self.cache.put(cache_key, data, response.headers.get("ETag"), cache_ttl)
+            return data
         except requests.exceptions.RequestException as e:
             logger.error(f"REST request failed: {url} - {e}")
             raise
     
+    def _read_json(self, response: requests.Response) -> Any:
+        """
+        Read and decode a streamed JSON response within the payload budget.
+        
+        The body is accounted for up front when the server sends its length,
+        and chunk by chunk as it is read otherwise (including compressed
+        bodies, whose Content-Length is not the decoded size). The bytes stay held until
+        the request returns, or until the caller's ledger is released.
+        
+        Args:
+            response: Response opened with stream=True
+            
+        Returns:
+            Decoded response body
+            
+        Raises:
+            JSONDecodeError: If the body is not valid JSON
+        """
+        chain_id = self.chain_config.chain_id
+        profiler = get_profiler()
+        budget = get_payload_budget()
+        held = 0
+        try:
+            with profiler.stage("read_body", chain_id):
+                length = response.headers.get("Content-Length", "")
+                if length.isdigit() and not response.headers.get("Content-Encoding"):
+                    held += budget.hold(int(length))
+                    body = response.content
+                else:
+                    chunks = []
+                    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                        held += budget.hold(len(chunk), held)
+                        chunks.append(chunk)
+                    body = b"".join(chunks)
+            
+            with profiler.stage("json_decode", chain_id):
+                try:
+                    return json.loads(body)
+                except ValueError as e:
+                    # Raise a RequestException, as response.json() does, so
+                    # non-JSON bodies (e.g. proxy error pages) are handled
+                    # like any other failed request
+                    raise requests.exceptions.JSONDecodeError(
+                        getattr(e, "msg", str(e)), getattr(e, "doc", ""), getattr(e, "pos", 0)
+                    ) from e
+        finally:
+            budget.settle(held)
+    
     def _make_rpc_request(self, method: str, params: Optional[List[Any]] = None) -> Dict[str, Any]:
         """
         Make a request to an RPC endpoint.
@@ -98,14 +193,18 @@ class CosmosClient:
             "params": params or []
         }
         
+        profiler = get_profiler()
         try:
-            response = self.session.post(
-                url,
-                json=payload,
-                timeout=config.request_timeout
-            )
-            response.raise_for_status()
-            result = response.json()
+            with profiler.stage("http", self.chain_config.chain_id):
+                response = self.session.post(
+                    url,
+                    json=payload,
+                    timeout=self.config.request_timeout,
+                    stream=True
+                )
+            with response:
+                response.raise_for_status()
+                result = self._read_json(response)
             
             if "error" in result:
                 error = result["error"]
@@ -138,6 +237,27 @@ class CosmosClient:
         """
         return self._make_rpc_request("block", [height])
     
+    def get_block_header(self, height: int) -> Dict[str, Any]:
+        """
+        Get only the header of a block.
+        
+        Uses the lighter blockchain method (block metadata without
+        transactions), falling back to the full block on nodes that reject it.
+        
+        Args:
+            height: Block height
+            
+        Returns:
+            Block header data
+        """
+        try:
+            metas = self._make_rpc_request("blockchain", [str(height), str(height)]).get("block_metas", [])
+            if metas:
+                return metas[0].get("header", {})
+        except requests.exceptions.RequestException:
+            pass
+        return self.get_block(height).get("block", {}).get("header", {})
+    
     def get_status(self) -> Dict[str, Any]:
         """
         Get node status information.
@@ -149,17 +269,111 @@ class CosmosClient:
     
     def get_validators(self, height: Optional[int] = None) -> Dict[str, Any]:
         """
-        Get validators at a specific height.
+        Get the complete validator set at a specific height.
+        
+        The endpoint is paginated. The first page asks for the total count;
+        when the node reports it, the remaining pages are fetched concurrently
+        by offset, in steps of the first page's size. Otherwise, or when the
+        offset pages do not add up to the total, pages are chained through
+        pagination.next_key.
         
         Args:
             height: Block height (latest if not specified)
             
         Returns:
-            Validators data
+            Validators data with all pages merged into a single validator list
+        """
+        page_size = self.config.validator_page_size
+        first_page = self._make_rest_request(
+            f"cosmos/base/tendermint/v1beta1/validatorsets/{height or 'latest'}",
+            {"pagination.limit": page_size, "pagination.count_total": "true"}
+        )
+        
+        validators = list(first_page.get("validators", []))
+        pagination = first_page.get("pagination") or {}
+        total = int(pagination.get("total") or 0)
+        next_key = pagination.get("next_key")
+        
+        # Pin the remaining pages to the height of the first one, so "latest"
+        # cannot move between pages
+        endpoint = f"cosmos/base/tendermint/v1beta1/validatorsets/{first_page.get('block_height') or height or 'latest'}"
+        
+        # Step by the size of the first page, not the configured one: nodes
+        # cap pagination.limit, and larger steps would skip validators
+        step = len(validators)
+        if total > len(validators) and step:
+            offsets = list(range(step, total, step))
+            workers = max(1, min(len(offsets), self.config.validator_page_workers))
+            budget = get_payload_budget()
+            ledger = budget.current_ledger()
+            
+            def fetch_page(offset: int) -> Dict[str, Any]:
+                # Charge the page to the caller's ledger, so its bytes stay
+                # held until the height is written
+                with budget.carry(ledger):
+                    return self._make_rest_request(
+                        endpoint,
+                        {"pagination.limit": page_size, "pagination.offset": offset}
+                    )
+            
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                pages = executor.map(fetch_page, offsets)
+                for page in pages:
+                    validators.extend(page.get("validators", []))
+        
+        if total and len(validators) != total and next_key:
+            logger.warning(
+                f"Validator pages for {self.chain_config.chain_id} at height {height or 'latest'} "
+                f"returned {len(validators)} of {total} entries, following next_key instead"
+            )
+            validators = list(first_page.get("validators", []))
+        
+        if not total or len(validators) < total:
+            while next_key:
+                page = self._make_rest_request(
+                    endpoint,
+                    {"pagination.limit": page_size, "pagination.key": next_key}
+                )
+                validators.extend(page.get("validators", []))
+                next_key = (page.get("pagination") or {}).get("next_key")
+        
+        if total and len(validators) != total:
+            logger.warning(
+                f"Validator set for {self.chain_config.chain_id} at height {height or 'latest'} "
+                f"has {len(validators)} entries, node reported {total}"
+            )
+        
+        result = dict(first_page)
+        result["validators"] = validators
+        result["pagination"] = {"next_key": None, "total": str(len(validators))}
+        return result
+    
+    def fetch_endpoint(self, spec: EndpointSpec, height: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fetch a declared endpoint.
+        
+        Any {height} placeholder in the path or in string parameters is
+        replaced with the given height.
+        
+        Args:
+            spec: Endpoint definition
+            height: Block height for height-scoped endpoints
+            
+        Returns:
+            Endpoint data
         """
-        if height:
-            return self._make_rest_request(f"cosmos/base/tendermint/v1beta1/validatorsets/{height}")
-        return self._make_rest_request("cosmos/base/tendermint/v1beta1/validatorsets/latest")
+        def substitute(value: Any) -> Any:
+            if isinstance(value, str) and height is not None:
+                return value.replace("{height}", str(height))
+            return value
+        
+        path = substitute(spec.path)
+        if spec.api == "rpc":
+            params = [substitute(value) for value in (spec.params or [])]
+            return self._make_rpc_request(path, params)
+        
+        params = {key: substitute(value) for key, value in (spec.params or {}).items()}
+        return self._make_rest_request(path, params or None, cache_ttl=spec.cache_ttl)
     
     def close(self) -> None:
         """Close the client session."""
@@ -179,6 +393,7 @@ def get_client_for_chain(chain_id: str) -> CosmosClient:
     Raises:
         ValueError: If the chain_id is not found in the configuration
     """
+    config = get_config()
     if chain_id not in config.chains:
         raise ValueError(f"Chain {chain_id} not found in configuration")
     
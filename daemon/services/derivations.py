@@ -0,0 +1,70 @@
+"""
+Derived collections for the CosmosData daemon.
+
+A derivation turns the raw documents of one endpoint into documents of a
+derived collection (for example, block headers extracted from blocks). The
+same derivations run on live writes and when stored raw data is reprocessed
+with ``python -m daemon.utils.reprocess``, so a fixed or extended model only
+needs a reprocess run instead of re-fetching history.
+"""
+from typing import Callable, Dict, Any, List
+
+from pymongo import UpdateOne
+
+from daemon.models.blockchain_data import BlockchainData, Block, Validators
+
+class Derivation:
+    """Maps raw documents of one endpoint to documents of a derived collection."""
+
+    def __init__(self,
+                 name: str,
+                 collection: str,
+                 endpoint: str,
+                 model: type,
+                 build: Callable[[BlockchainData], Dict[str, Any]]):
+        """
+        Initialize the derivation.
+
+        Args:
+            name: Derivation name used on the command line
+            collection: Target collection
+            endpoint: Endpoint of the raw documents it reads
+            model: Model class the raw documents are loaded as
+            build: Returns the derived document for a model; must include
+                chain_id and block_height, which key the derived document
+        """
+        self.name = name
+        self.collection = collection
+        self.endpoint = endpoint
+        self.model = model
+        self.build = build
+
+    def operations(self, items: List[BlockchainData]) -> List[UpdateOne]:
+        """
+        Build the upserts for the items this derivation applies to.
+
+        Args:
+            items: Data models, of any endpoint
+
+        Returns:
+            Upsert operations for the target collection
+        """
+        operations = []
+        for item in items:
+            if item.endpoint != self.endpoint or not isinstance(item, self.model):
+                continue
+            operations.append(UpdateOne(
+                {"chain_id": item.chain_id, "block_height": item.block_height},
+                {"$set": self.build(item)},
+                upsert=True
+            ))
+        return operations
+
+# Registered derivations by name
+DERIVATIONS: Dict[str, Derivation] = {
+    derivation.name: derivation
+    for derivation in [
+        Derivation("block_headers", "block_headers", "block", Block, Block.header_summary),
+        Derivation("validator_summaries", "validator_summaries", "validators", Validators, Validators.summary),
+    ]
+}
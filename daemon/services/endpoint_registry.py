@@ -0,0 +1,128 @@
+"""
+Declared endpoint collection for the CosmosData daemon.
+
+Endpoints declared in the chain configuration are collected generically here
+instead of through per-chain code. Height-scoped endpoints are fetched with
+each collected block; chain-scoped endpoints (current chain state such as
+parameters or supply) are polled by a background poller, each on its own
+interval, independently of the block loop, and every poll is kept as its own
+chain sample.
+"""
+import logging
+import time
+import threading
+import concurrent.futures
+from typing import Callable, Dict, List, Tuple
+
+from daemon.config.config import get_config, ChainConfig, EndpointSpec
+from daemon.models.blockchain_data import BlockchainData
+from daemon.services.cosmos_client import CosmosClient
+from daemon.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+def collect_height_endpoints(client: CosmosClient,
+                             chain_config: ChainConfig,
+                             height: int,
+                             timestamp: int) -> List[BlockchainData]:
+    """
+    Fetch the height-scoped declared endpoints for one block height.
+
+    Failures are logged per endpoint so one broken endpoint does not stop
+    the others or the block itself from being stored.
+
+    Args:
+        client: Client for the chain
+        chain_config: Configuration of the chain
+        height: Block height
+        timestamp: Unix timestamp of the collection
+
+    Returns:
+        Data models for the endpoints that were fetched
+    """
+    items = []
+    for spec in chain_config.declared_endpoints("height"):
+        if height % spec.every:
+            continue
+        try:
+            data = client.fetch_endpoint(spec, height)
+            items.append(BlockchainData(chain_config.chain_id, height, spec.name, data, timestamp))
+        except Exception as e:
+            logger.error(f"Failed to get {spec.name} data for {chain_config.chain_id} at {height}: {e}")
+    return items
+
+class EndpointPoller:
+    """Polls chain-scoped declared endpoints, each on its own interval."""
+
+    def __init__(self, client_getter: Callable[[str], CosmosClient], max_workers: int = None):
+        """
+        Initialize the poller.
+
+        Args:
+            client_getter: Returns the (cached) client for a chain ID
+            max_workers: Maximum concurrent endpoint fetches (falls back to config)
+        """
+        self.client_getter = client_getter
+        self.max_workers = max_workers or get_config().max_workers
+        self._last_run: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def due_endpoints(self, now: float) -> List[Tuple[ChainConfig, EndpointSpec]]:
+        """
+        Get the chain-scoped endpoints whose interval has elapsed.
+
+        Args:
+            now: Current monotonic time
+
+        Returns:
+            List of (chain configuration, endpoint definition) pairs
+        """
+        due = []
+        with self._lock:
+            for chain_config in list(get_config().chains.values()):
+                for spec in chain_config.declared_endpoints("chain"):
+                    last_run = self._last_run.get((chain_config.chain_id, spec.name))
+                    if last_run is None or now - last_run >= spec.interval:
+                        self._last_run[(chain_config.chain_id, spec.name)] = now
+                        due.append((chain_config, spec))
+        return due
+
+    def run_once(self) -> None:
+        """Fetch and store every due endpoint."""
+        due = self.due_endpoints(time.monotonic())
+        if not due:
+            return
+
+        workers = min(self.max_workers, len(due))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.poll, chain_config, spec): (chain_config.chain_id, spec.name)
+                for chain_config, spec in due
+            }
+            for future in concurrent.futures.as_completed(futures):
+                chain_id, name = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Failed to get {name} data for {chain_id}: {e}")
+
+    def poll(self, chain_config: ChainConfig, spec: EndpointSpec) -> None:
+        """
+        Fetch one chain-scoped endpoint and store it as a new chain sample.
+
+        Samples are told apart by their poll time; the latest known block
+        height is only recorded alongside.
+
+        Args:
+            chain_config: Configuration of the chain
+            spec: Endpoint definition
+        """
+        chain_id = chain_config.chain_id
+        storage = get_storage()
+
+        data = self.client_getter(chain_id).fetch_endpoint(spec)
+        height = storage.get_latest_block_height(chain_id) or 0
+        storage.store_chain_samples([
+            BlockchainData(chain_id, height, spec.name, data, int(time.time()))
+        ])
+        logger.debug(f"Polled {spec.name} for {chain_id} at height {height}")
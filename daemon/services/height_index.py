@@ -0,0 +1,167 @@
+"""
+Time to height lookups for the CosmosData daemon.
+
+Block times are known for every ingested block (block_headers) and for every
+height probed by an earlier lookup (height_times). A lookup first narrows the
+answer down to the closest known heights on either side of the requested
+time. When they are not adjacent, the gap is searched over RPC, alternating
+interpolation and bisection steps so a lookup needs O(log n) header requests
+even when block times are uneven. Every probed header is stored in
+height_times, so later lookups near the same time need few or no requests.
+"""
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.database import Database
+
+from daemon.models.blockchain_data import parse_block_time
+from daemon.services.cosmos_client import CosmosClient
+
+logger = logging.getLogger(__name__)
+
+# Collections holding known (block_height, time_unix) pairs
+TIME_COLLECTIONS = ("block_headers", "height_times")
+
+class HeightIndex:
+    """Maps block times to heights for one chain, probing the node when needed."""
+
+    def __init__(self, db: Database, client: CosmosClient):
+        """
+        Initialize the index.
+
+        Args:
+            db: Database holding block_headers and height_times
+            client: Client for the chain, used for probes
+        """
+        self.db = db
+        self.client = client
+        self.chain_id = client.chain_config.chain_id
+        self.probes = 0
+
+    def _known(self, query: Dict[str, Any], direction: int) -> Optional[Tuple[int, float]]:
+        """
+        Get the known height closest to a time bound.
+
+        Args:
+            query: Condition on time_unix
+            direction: DESCENDING for the latest before, ASCENDING for the earliest after
+
+        Returns:
+            Tuple of (height, time), or None if nothing is known on that side
+        """
+        best = None
+        for name in TIME_COLLECTIONS:
+            document = self.db[name].find_one(
+                {"chain_id": self.chain_id, "time_unix": query},
+                {"_id": 0, "block_height": 1, "time_unix": 1},
+                sort=[("time_unix", direction)]
+            )
+            if not document:
+                continue
+            candidate = (document["block_height"], document["time_unix"])
+            if best is None or (candidate[1] > best[1] if direction == DESCENDING else candidate[1] < best[1]):
+                best = candidate
+        return best
+
+    def time_of(self, height: int) -> float:
+        """
+        Get the time of a block, probing the node if it is not known.
+
+        Args:
+            height: Block height
+
+        Returns:
+            Block time as Unix seconds
+        """
+        for name in TIME_COLLECTIONS:
+            document = self.db[name].find_one(
+                {"chain_id": self.chain_id, "block_height": height},
+                {"_id": 0, "time_unix": 1}
+            )
+            if document and document.get("time_unix") is not None:
+                return document["time_unix"]
+        return self._probe(height)
+
+    def _probe(self, height: int) -> float:
+        """
+        Fetch a block header over RPC and remember its time.
+
+        Args:
+            height: Block height
+
+        Returns:
+            Block time as Unix seconds
+
+        Raises:
+            ValueError: If the header has no parsable time
+        """
+        header = self.client.get_block_header(height)
+        block_time = parse_block_time(header.get("time", ""))
+        if block_time is None:
+            raise ValueError(f"Block {height} of {self.chain_id} has no valid time")
+
+        self.probes += 1
+        self.db.height_times.bulk_write([UpdateOne(
+            {"chain_id": self.chain_id, "block_height": height},
+            {"$set": {"time_unix": block_time, "time": header.get("time")}},
+            upsert=True
+        )])
+        return block_time
+
+    def _node_bounds(self) -> Tuple[Tuple[int, float], Tuple[int, float]]:
+        """
+        Get the earliest and latest block the node can serve.
+
+        Returns:
+            Tuples of (height, time) for the earliest and latest available block
+        """
+        sync_info = self.client.get_status().get("sync_info", {})
+        earliest = max(int(sync_info.get("earliest_block_height", 1) or 1), 1)
+        latest = int(sync_info.get("latest_block_height", 0))
+        return (earliest, self.time_of(earliest)), (latest, self.time_of(latest))
+
+    def height_at(self, timestamp: float) -> Optional[int]:
+        """
+        Get the last block at or before a time.
+
+        Args:
+            timestamp: Unix seconds
+
+        Returns:
+            Block height, or None if the time is before the earliest block
+            the node can serve
+        """
+        low = self._known({"$lte": timestamp}, DESCENDING)
+        high = self._known({"$gt": timestamp}, ASCENDING)
+
+        if low is None or high is None:
+            earliest, latest = self._node_bounds()
+            if timestamp < earliest[1]:
+                return None
+            if timestamp >= latest[1]:
+                return latest[0]
+            if low is None or low[0] < earliest[0]:
+                low = earliest
+            if high is None:
+                high = latest
+
+        # low is at or before the time, high is after it
+        interpolate = True
+        while high[0] - low[0] > 1:
+            if interpolate and high[1] > low[1]:
+                fraction = (timestamp - low[1]) / (high[1] - low[1])
+                guess = low[0] + int(fraction * (high[0] - low[0]))
+            else:
+                guess = (low[0] + high[0]) // 2
+            guess = min(max(guess, low[0] + 1), high[0] - 1)
+            # Alternating with plain bisection bounds the worst case
+            interpolate = not interpolate
+
+            guess_time = self.time_of(guess)
+            if guess_time <= timestamp:
+                low = (guess, guess_time)
+            else:
+                high = (guess, guess_time)
+
+        return low[0]
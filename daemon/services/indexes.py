@@ -0,0 +1,102 @@
+"""
+Index definitions for the CosmosData daemon.
+
+Every index the daemon, the API and the utilities rely on is declared here,
+keyed by collection, so partitioned data collections and the benchmarks get
+the same set as a fully migrated database. The blockchain_data indexes follow
+the queries actually run against it:
+
+- (chain_id, block_height, endpoint), unique: the upsert key and height lookups
+- (chain_id, endpoint, block_height desc): the latest document of an endpoint
+  and height ranges of endpoints (reprocessing, chain_latest seeding)
+- (chain_id, endpoint, timestamp, block_height): time ranges of an endpoint,
+  including the retention batches, which sort on timestamp then block_height
+
+Migration steps keep their own frozen copies of the indexes they create, so
+changing a definition here also needs a new migration step.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.database import Database
+
+IndexKeys = List[Tuple[str, int]]
+
+# Keys of the blockchain_data index that serves latest-by-height reads
+DATA_HEIGHT_INDEX: IndexKeys = [("chain_id", ASCENDING), ("endpoint", ASCENDING), ("block_height", DESCENDING)]
+
+# Keys of the blockchain_data index that serves time range reads
+DATA_TIME_INDEX: IndexKeys = [
+    ("chain_id", ASCENDING),
+    ("endpoint", ASCENDING),
+    ("timestamp", ASCENDING),
+    ("block_height", ASCENDING)
+]
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "chains": [
+        IndexModel([("chain_id", ASCENDING)], unique=True),
+    ],
+    "blockchain_data": [
+        IndexModel([("chain_id", ASCENDING), ("block_height", ASCENDING), ("endpoint", ASCENDING)], unique=True),
+        IndexModel(DATA_HEIGHT_INDEX),
+        IndexModel(DATA_TIME_INDEX),
+    ],
+    "chain_samples": [
+        IndexModel([
+            ("chain_id", ASCENDING),
+            ("endpoint", ASCENDING),
+            ("timestamp", ASCENDING),
+            ("block_height", ASCENDING)
+        ]),
+    ],
+    "blockchain_data_rollups": [
+        IndexModel([
+            ("chain_id", ASCENDING),
+            ("endpoint", ASCENDING),
+            ("granularity", ASCENDING),
+            ("bucket_start", ASCENDING)
+        ], unique=True),
+    ],
+    "chain_status": [
+        IndexModel([("chain_id", ASCENDING), ("time", DESCENDING)]),
+    ],
+    "chain_node_info": [
+        IndexModel([("chain_id", ASCENDING), ("time", DESCENDING)]),
+    ],
+    "block_headers": [
+        IndexModel([("chain_id", ASCENDING), ("block_height", ASCENDING)], unique=True),
+        IndexModel([("chain_id", ASCENDING), ("time_unix", ASCENDING)]),
+        # Covers the chain integrity audit
+        IndexModel([
+            ("chain_id", ASCENDING),
+            ("block_height", ASCENDING),
+            ("hash", ASCENDING),
+            ("last_block_hash", ASCENDING)
+        ]),
+    ],
+    "block_stats": [
+        IndexModel([("chain_id", ASCENDING), ("window_size", ASCENDING), ("window_start", ASCENDING)], unique=True),
+    ],
+    "validator_summaries": [
+        IndexModel([("chain_id", ASCENDING), ("block_height", ASCENDING)], unique=True),
+    ],
+    "block_events": [
+        IndexModel([("chain_id", ASCENDING), ("_id", ASCENDING)]),
+    ],
+    "height_times": [
+        IndexModel([("chain_id", ASCENDING), ("block_height", ASCENDING)], unique=True),
+        IndexModel([("chain_id", ASCENDING), ("time_unix", ASCENDING)]),
+    ],
+}
+
+def ensure_indexes(db: Database, collections: Optional[Iterable[str]] = None) -> None:
+    """
+    Create the declared indexes that do not exist yet.
+
+    Args:
+        db: Target database
+        collections: Collections to index (default: all declared collections)
+    """
+    for name in collections if collections is not None else INDEXES:
+        db[name].create_indexes(INDEXES[name])
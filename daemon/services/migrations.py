@@ -0,0 +1,324 @@
+"""
+Database migrations for the CosmosData daemon.
+
+This module holds the one-time schema setup steps (collections and indexes).
+Applied migrations are recorded in the schema_migrations collection, so running
+them again at startup costs a single lookup once the database is up to date.
+"""
+import logging
+from typing import Callable, List, Tuple
+
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+
+from daemon.config.config import get_config
+from daemon.services.storage_layout import group_endpoints
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_DOCUMENT_ID = "cosmodata"
+
+def _create_base_indexes(db: Database) -> None:
+    """
+    Create the indexes for the chains, blockchain_data and rollup collections.
+
+    Args:
+        db: Target database
+    """
+    # Create indexes for the chains collection
+    db.chains.create_indexes([
+        IndexModel([("chain_id", ASCENDING)], unique=True)
+    ])
+
+    # Create indexes for the blockchain_data collection
+    db.blockchain_data.create_indexes([
+        IndexModel([
+            ("chain_id", ASCENDING),
+            ("block_height", ASCENDING),
+            ("endpoint", ASCENDING)
+        ], unique=True),
+        IndexModel([("timestamp", ASCENDING)]),
+        IndexModel([("chain_id", ASCENDING), ("endpoint", ASCENDING)]),
+        IndexModel([("chain_id", ASCENDING), ("endpoint", ASCENDING), ("timestamp", ASCENDING)]),
+    ])
+
+    # Create indexes for the retention rollups collection
+    db.blockchain_data_rollups.create_indexes([
+        IndexModel([
+            ("chain_id", ASCENDING),
+            ("endpoint", ASCENDING),
+            ("granularity", ASCENDING),
+            ("bucket_start", ASCENDING)
+        ], unique=True),
+    ])
+
+def _create_status_collections(db: Database) -> None:
+    """
+    Create the collections used for node status samples.
+
+    Status samples go to a time-series collection that expires old samples
+    on its own. Servers older than MongoDB 5.0 do not support time-series
+    collections, so a capped collection is used there instead.
+
+    Args:
+        db: Target database
+    """
+    config = get_config()
+
+    if "chain_status" not in db.list_collection_names():
+        try:
+            db.create_collection(
+                "chain_status",
+                timeseries={
+                    "timeField": "time",
+                    "metaField": "chain_id",
+                    "granularity": "seconds"
+                },
+                expireAfterSeconds=config.status_retention
+            )
+            logger.info("Created time-series collection chain_status")
+        except OperationFailure as e:
+            logger.warning(f"Time-series collections unavailable ({e}), using a capped collection")
+            db.create_collection(
+                "chain_status",
+                capped=True,
+                size=config.status_capped_size
+            )
+
+    db.chain_status.create_indexes([
+        IndexModel([("chain_id", ASCENDING), ("time", DESCENDING)])
+    ])
+    db.chain_node_info.create_indexes([
+        IndexModel([("chain_id", ASCENDING), ("time", DESCENDING)])
+    ])
+
+def _populate_chain_latest(db: Database) -> None:
+    """
+    Seed chain_latest from the newest existing document per chain and endpoint.
+
+    Args:
+        db: Target database
+    """
+    db.blockchain_data.aggregate([
+        {"$sort": {"chain_id": 1, "endpoint": 1, "block_height": -1}},
+        {"$group": {
+            "_id": {"$concat": ["$chain_id", ":", "$endpoint"]},
+            "document": {"$first": "$$ROOT"}
+        }},
+        {"$replaceWith": {"$mergeObjects": ["$document", {"_id": "$_id"}]}},
+        {"$merge": {"into": "chain_latest", "whenMatched": "keepExisting"}}
+    ], allowDiskUse=True)
+
+def _create_analytics_indexes(db: Database) -> None:
+    """
+    Create the indexes for the block_headers and block_stats collections.
+
+    Args:
+        db: Target database
+    """
+    db.block_headers.create_indexes([
+        IndexModel([("chain_id", ASCENDING), ("block_height", ASCENDING)], unique=True),
+        IndexModel([("chain_id", ASCENDING), ("time_unix", ASCENDING)]),
+    ])
+    db.block_stats.create_indexes([
+        IndexModel([
+            ("chain_id", ASCENDING),
+            ("window_size", ASCENDING),
+            ("window_start", ASCENDING)
+        ], unique=True),
+    ])
+
+def _create_validator_summary_indexes(db: Database) -> None:
+    """
+    Create the indexes for the validator_summaries collection.
+
+    Args:
+        db: Target database
+    """
+    db.validator_summaries.create_indexes([
+        IndexModel([("chain_id", ASCENDING), ("block_height", ASCENDING)], unique=True),
+    ])
+
+def _create_block_events(db: Database) -> None:
+    """
+    Create the capped collection for new-data notifications.
+
+    Capped collections keep insertion order and support tailable cursors,
+    so consumers can follow them without change streams.
+
+    Args:
+        db: Target database
+    """
+    if "block_events" not in db.list_collection_names():
+        db.create_collection(
+            "block_events",
+            capped=True,
+            size=get_config().block_events_capped_size
+        )
+    db.block_events.create_indexes([
+        IndexModel([("chain_id", ASCENDING), ("_id", ASCENDING)])
+    ])
+
+def _create_audit_index(db: Database) -> None:
+    """
+    Create the block_headers index that covers the chain integrity audit.
+
+    Args:
+        db: Target database
+    """
+    db.block_headers.create_indexes([
+        IndexModel([
+            ("chain_id", ASCENDING),
+            ("block_height", ASCENDING),
+            ("hash", ASCENDING),
+            ("last_block_hash", ASCENDING)
+        ]),
+    ])
+
+def _create_height_time_indexes(db: Database) -> None:
+    """
+    Create the indexes for the height_times collection of probed block times.
+
+    Args:
+        db: Target database
+    """
+    db.height_times.create_indexes([
+        IndexModel([("chain_id", ASCENDING), ("block_height", ASCENDING)], unique=True),
+        IndexModel([("chain_id", ASCENDING), ("time_unix", ASCENDING)]),
+    ])
+
+def _redesign_data_indexes(db: Database) -> None:
+    """
+    Replace the blockchain_data indexes with ones shaped to its queries.
+
+    The new indexes are built before the replaced ones are dropped, so reads
+    always have an index to use. The replaced indexes are the timestamp index
+    (every query on timestamp also filters on chain_id and endpoint) and the
+    (chain_id, endpoint) and (chain_id, endpoint, timestamp) prefixes of the
+    new ones.
+
+    Args:
+        db: Target database
+    """
+    db.blockchain_data.create_indexes([
+        IndexModel([("chain_id", ASCENDING), ("endpoint", ASCENDING), ("block_height", DESCENDING)]),
+        IndexModel([
+            ("chain_id", ASCENDING),
+            ("endpoint", ASCENDING),
+            ("timestamp", ASCENDING),
+            ("block_height", ASCENDING)
+        ]),
+    ])
+
+    existing = set(db.blockchain_data.index_information())
+    for name in ("timestamp_1", "chain_id_1_endpoint_1", "chain_id_1_endpoint_1_timestamp_1"):
+        if name not in existing:
+            continue
+        try:
+            db.blockchain_data.drop_index(name)
+            logger.info(f"Dropped replaced index blockchain_data.{name}")
+        except OperationFailure as e:
+            logger.warning(f"Failed to drop index blockchain_data.{name}: {e}")
+
+def _create_chain_samples_index(db: Database) -> None:
+    """
+    Create the index for the chain_samples collection of polled chain state.
+
+    Args:
+        db: Target database
+    """
+    db.chain_samples.create_indexes([
+        IndexModel([
+            ("chain_id", ASCENDING),
+            ("endpoint", ASCENDING),
+            ("timestamp", ASCENDING),
+            ("block_height", ASCENDING)
+        ]),
+    ])
+
+def _move_chain_samples(db: Database) -> None:
+    """
+    Move documents of chain-scoped endpoints from the raw data into chain_samples.
+
+    Before schema version 10 polls of chain-scoped endpoints were upserted
+    into the raw data collections at the latest collected height. The
+    endpoints are those declared with scope "chain" in the configuration at
+    migration time. Documents keep their _id, so a move interrupted between
+    the copy and the delete is completed by running the step again.
+
+    Args:
+        db: Target database
+    """
+    config = get_config()
+    for chain_config in config.chains.values():
+        endpoints = [spec.name for spec in chain_config.endpoints.values() if spec.scope == "chain"]
+        for name, collection_endpoints in group_endpoints(
+            chain_config.chain_id, endpoints, config.storage_layout
+        ).items():
+            query = {"chain_id": chain_config.chain_id, "endpoint": {"$in": collection_endpoints}}
+            db[name].aggregate([
+                {"$match": query},
+                {"$project": {"chain_id": 1, "block_height": 1, "endpoint": 1, "data": 1, "timestamp": 1}},
+                {"$merge": {"into": "chain_samples", "on": "_id", "whenMatched": "keepExisting"}}
+            ], allowDiskUse=True)
+            moved = db[name].delete_many(query).deleted_count
+            if moved:
+                logger.info(f"Moved {moved} {chain_config.chain_id} chain samples from {name} to chain_samples")
+
+# Ordered list of (version, description, migration function). Append new
+# steps with the next version number; never edit a step that has shipped.
+MIGRATIONS: List[Tuple[int, str, Callable[[Database], None]]] = [
+    (1, "base indexes", _create_base_indexes),
+    (2, "status collections", _create_status_collections),
+    (3, "materialized latest documents", _populate_chain_latest),
+    (4, "block analytics collections", _create_analytics_indexes),
+    (5, "validator summaries", _create_validator_summary_indexes),
+    (6, "block events", _create_block_events),
+    (7, "block header audit index", _create_audit_index),
+    (8, "height time index", _create_height_time_indexes),
+    (9, "query-shaped blockchain_data indexes", _redesign_data_indexes),
+    (10, "chain samples", _create_chain_samples_index),
+    (11, "move chain samples out of the raw data", _move_chain_samples),
+]
+
+def get_schema_version(db: Database) -> int:
+    """
+    Get the currently applied schema version.
+
+    Args:
+        db: Target database
+
+    Returns:
+        The last applied migration version, or 0 for a fresh database
+    """
+    document = db.schema_migrations.find_one({"_id": SCHEMA_DOCUMENT_ID})
+    return document["version"] if document else 0
+
+def apply_migrations(db: Database) -> int:
+    """
+    Apply all migrations newer than the recorded schema version.
+
+    Args:
+        db: Target database
+
+    Returns:
+        The schema version after applying migrations
+    """
+    version = get_schema_version(db)
+
+    for target_version, description, migration in MIGRATIONS:
+        if target_version <= version:
+            continue
+
+        logger.info(f"Applying migration {target_version}: {description}")
+        migration(db)
+        db.schema_migrations.update_one(
+            {"_id": SCHEMA_DOCUMENT_ID},
+            {"$set": {"version": target_version}},
+            upsert=True
+        )
+        version = target_version
+
+    logger.info(f"MongoDB schema is at version {version}")
+    return version
@@ -4,67 +4,211 @@ MongoDB service for the CosmosData daemon.
 This module provides functionality for storing data in MongoDB.
 """
 import logging
-from typing import Dict, Any, Optional, List
-from pymongo import MongoClient, IndexModel, ASCENDING
+import threading
+import importlib.util
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Set, Tuple
+from pymongo import MongoClient, UpdateOne, ASCENDING, DESCENDING
+from pymongo.collection import Collection
 from pymongo.errors import PyMongoError
+from pymongo.write_concern import WriteConcern
 
-from daemon.config.config import config
+from daemon.config.config import get_config
+from daemon.models.blockchain_data import BlockchainData, Status, model_from_dict
+from daemon.services.spool import WriteSpool
+from daemon.services.derivations import DERIVATIONS
+from daemon.services.block_events import publish_batch
+from daemon.services.indexes import INDEXES
+from daemon.services.storage_layout import DATA_COLLECTION, STORAGE_LAYOUTS, data_collection_name, group_endpoints
 
 logger = logging.getLogger(__name__)
 
+# Python packages required by each wire compressor; zlib is always available
+COMPRESSOR_MODULES = {
+    "zstd": "zstandard",
+    "snappy": "snappy",
+}
+
+def _available_compressors(compressors: str) -> str:
+    """
+    Filter a compressor list down to the ones usable in this environment.
+    
+    Args:
+        compressors: Comma-separated compressor names in order of preference
+        
+    Returns:
+        Comma-separated names whose Python packages are installed
+    """
+    available = []
+    for name in (c.strip() for c in compressors.split(",") if c.strip()):
+        module = COMPRESSOR_MODULES.get(name)
+        if module and importlib.util.find_spec(module) is None:
+            logger.warning(f"Wire compressor '{name}' requires the '{module}' package, skipping it")
+            continue
+        available.append(name)
+    return ",".join(available)
+
+def _write_concern_from_options(options: Dict[str, Any]) -> WriteConcern:
+    """
+    Build a write concern from MongoClient profile options.
+    
+    Args:
+        options: MongoClient keyword arguments
+        
+    Returns:
+        Write concern with the profile's w and journal settings
+    """
+    return WriteConcern(w=options.get("w"), j=options.get("journal"))
+
+def latest_key(chain_id: str, endpoint: str) -> str:
+    """
+    Build the chain_latest document key for a chain and endpoint.
+    
+    Args:
+        chain_id: Chain identifier
+        endpoint: Endpoint type
+        
+    Returns:
+        Key in the form "<chain_id>:<endpoint>"
+    """
+    return f"{chain_id}:{endpoint}"
+
 class MongoDBService:
     """Service for interacting with MongoDB."""
     
-    def __init__(self, uri: Optional[str] = None, db_name: Optional[str] = None):
+    def __init__(self,
+                 uri: Optional[str] = None,
+                 db_name: Optional[str] = None,
+                 write_profile: Optional[str] = None,
+                 storage_layout: Optional[str] = None,
+                 spool_path: Optional[str] = None):
         """
         Initialize MongoDB connection.
         
         Args:
             uri: MongoDB connection URI (falls back to config if not provided)
             db_name: MongoDB database name (falls back to config if not provided)
+            write_profile: Client write profile (falls back to config if not provided)
+            storage_layout: Raw data collection layout (falls back to config if not provided)
+            spool_path: Write spool file (falls back to config if not provided);
+                an empty path disables spooling, so failed writes return False
         """
+        config = get_config()
         self.uri = uri or config.mongodb_uri
         self.db_name = db_name or config.mongodb_db_name
+        self.write_profile = write_profile or config.mongodb_write_profile
+        self.storage_layout = storage_layout or config.storage_layout
+        if self.storage_layout not in STORAGE_LAYOUTS:
+            raise ValueError(
+                f"Unknown storage layout '{self.storage_layout}', "
+                f"expected one of: {', '.join(STORAGE_LAYOUTS)}"
+            )
+        self.client_options = config.mongo_client_options(self.write_profile)
+        if "compressors" in self.client_options:
+            self.client_options["compressors"] = _available_compressors(self.client_options["compressors"])
+        
+        # Writes made while catching up use the backfill profile's write concern
+        self.backfill_write_concern = _write_concern_from_options(
+            config.mongo_client_options(config.mongodb_backfill_write_profile)
+        )
         self.client = None
         self.db = None
         
+        # Last stored node_info hash per chain, to skip unchanged node info
+        self._node_info_hashes: Dict[str, str] = {}
+        
+        # Partitioned data collections whose indexes have been created
+        self._indexed_collections: Set[str] = set()
+        self._indexed_collections_lock = threading.Lock()
+        
+        # Writes that fail are kept on local disk and replayed later
+        spool_path = config.spool_path if spool_path is None else spool_path
+        self.spool = None
+        if spool_path:
+            self.spool = WriteSpool(
+                spool_path,
+                config.spool_max_bytes,
+                config.spool_backpressure_timeout
+            )
+        
         self._connect()
-        self._setup_indexes()
     
     def _connect(self) -> None:
-        """Establish connection to MongoDB."""
+        """
+        Create the MongoDB client.
+        
+        The client connects in the background on first use, so this does not
+        block when the server is slow or unreachable.
+        """
         try:
-            self.client = MongoClient(self.uri)
+            self.client = MongoClient(self.uri, **self.client_options)
             self.db = self.client[self.db_name]
-            logger.info(f"Connected to MongoDB database: {self.db_name}")
+            logger.info(f"Using MongoDB database: {self.db_name} (write profile: {self.write_profile})")
         except PyMongoError as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
     
-    def _setup_indexes(self) -> None:
-        """Set up indexes for collections."""
+    def store_status(self, status: Status) -> bool:
+        """
+        Store a node status sample.
+        
+        Only the fields that change between polls are recorded in chain_status.
+        The static node_info is written to chain_node_info only when it differs
+        from the last stored version for the chain.
+        
+        Args:
+            status: Status model built from the node response
+            
+        Returns:
+            True if storage was successful, False otherwise
+        """
+        chain_id = status.chain_id
         try:
-            # Create indexes for the chains collection
-            chains_indexes = [
-                IndexModel([("chain_id", ASCENDING)], unique=True)
-            ]
-            self.db.chains.create_indexes(chains_indexes)
-            
-            # Create indexes for the blockchain_data collection
-            data_indexes = [
-                IndexModel([
-                    ("chain_id", ASCENDING),
-                    ("block_height", ASCENDING),
-                    ("endpoint", ASCENDING)
-                ], unique=True),
-                IndexModel([("timestamp", ASCENDING)]),
-                IndexModel([("chain_id", ASCENDING), ("endpoint", ASCENDING)]),
-            ]
-            self.db.blockchain_data.create_indexes(data_indexes)
-            
-            logger.info("MongoDB indexes set up successfully")
+            sample_time = datetime.fromtimestamp(status.timestamp, tz=timezone.utc)
+            node_info_hash = status.node_info_hash
+            
+            sample = status.to_sample()
+            sample.update({
+                "chain_id": chain_id,
+                "time": sample_time,
+                "node_info_hash": node_info_hash
+            })
+            self.db.chain_status.insert_one(sample)
+            
+            if node_info_hash != self._get_node_info_hash(chain_id):
+                self.db.chain_node_info.insert_one({
+                    "chain_id": chain_id,
+                    "time": sample_time,
+                    "hash": node_info_hash,
+                    "node_info": status.node_info
+                })
+                self._node_info_hashes[chain_id] = node_info_hash
+                logger.info(f"Stored updated node info for {chain_id}")
+            
+            logger.debug(f"Stored status sample for {chain_id}")
+            return True
         except PyMongoError as e:
-            logger.error(f"Failed to set up MongoDB indexes: {e}")
+            logger.error(f"Failed to store status data: {e}")
+            return False
+    
+    def _get_node_info_hash(self, chain_id: str) -> Optional[str]:
+        """
+        Get the hash of the last stored node info for a chain.
+        
+        Args:
+            chain_id: Chain identifier
+            
+        Returns:
+            The stored hash, or None if no node info has been stored yet
+        """
+        if chain_id not in self._node_info_hashes:
+            document = self.db.chain_node_info.find_one(
+                {"chain_id": chain_id},
+                {"hash": 1},
+                sort=[("time", DESCENDING)]
+            )
+            self._node_info_hashes[chain_id] = document["hash"] if document else None
+        return self._node_info_hashes[chain_id]
     
     def store_blockchain_data(self, 
                              chain_id: str, 
@@ -83,38 +227,333 @@ class MongoDBService:
             timestamp: Unix timestamp when the data was retrieved
             
         Returns:
-            True if storage was successful, False otherwise
+            True if the data was stored or spooled, False otherwise
+        """
+        item = model_from_dict({
+            "chain_id": chain_id,
+            "block_height": block_height,
+            "endpoint": endpoint,
+            "data": data,
+            "timestamp": timestamp
+        })
+        return self.store_blockchain_data_bulk([item])
+    
+    def store_blockchain_data_bulk(self,
+                                   items: List[BlockchainData],
+                                   backfill: bool = False) -> bool:
+        """
+        Store several blockchain data items in one unordered bulk write.
+        
+        If the write fails, or earlier writes are still waiting in the spool,
+        the items are appended to the spool and written by replay_spool().
+        
+        Args:
+            items: Data models to store
+            backfill: Use the backfill write concern instead of the client default
+            
+        Returns:
+            True if the items were stored or spooled, False otherwise
         """
+        if not items:
+            return True
+        
+        # Keep write order: new documents queue behind the spooled ones
+        if self.spool and self.spool.pending:
+            self.spool.append(items, backfill)
+            return True
+        
         try:
-            document = {
-                "chain_id": chain_id,
-                "block_height": block_height,
-                "endpoint": endpoint,
-                "data": data,
-                "timestamp": timestamp
-            }
-            
-            # Use upsert to handle potential duplicate entries
-            result = self.db.blockchain_data.update_one(
+            self._write_bulk(items, backfill)
+            logger.debug(f"Stored {len(items)} documents in bulk (backfill={backfill})")
+            return True
+        except PyMongoError as e:
+            if self.spool is None:
+                logger.error(f"Failed to store blockchain data in bulk: {e}")
+                return False
+            logger.warning(f"Failed to store blockchain data in bulk ({e}), spooling {len(items)} documents")
+            self.spool.append(items, backfill)
+            return True
+    
+    def store_chain_samples(self, items: List[BlockchainData]) -> bool:
+        """
+        Insert samples of chain-scoped endpoints into chain_samples.
+        
+        Every poll is kept as its own document, in the order it was taken;
+        block_height only records the latest collected height at that time,
+        so several samples can share it. The newest sample also becomes the
+        endpoint's chain_latest document. Samples are not spooled, a failed
+        poll is taken again at the endpoint's next interval.
+        
+        Args:
+            items: Data models of the polled endpoints
+            
+        Returns:
+            True if the samples were stored, False otherwise
+        """
+        if not items:
+            return True
+        
+        try:
+            self.db.chain_samples.insert_many([item.to_dict() for item in items], ordered=False)
+            self._update_latest(items)
+            publish_batch(self.db, items)
+            logger.debug(f"Stored {len(items)} chain samples")
+            return True
+        except PyMongoError as e:
+            logger.error(f"Failed to store chain samples: {e}")
+            return False
+    
+    def _write_bulk(self, items: List[BlockchainData], backfill: bool = False) -> None:
+        """
+        Write items to their data collections, chain_latest and the derived collections,
+        then announce the batch in block_events.
+        
+        Args:
+            items: Data models to store
+            backfill: Use the backfill write concern instead of the client default
+            
+        Raises:
+            PyMongoError: If any of the writes fails
+        """
+        # One bulk write per target collection; with the shared layout that
+        # is a single write
+        batches: Dict[str, List[UpdateOne]] = {}
+        for item in items:
+            name = self.data_collection(item.chain_id, item.endpoint).name
+            batches.setdefault(name, []).append(UpdateOne(
                 {
-                    "chain_id": chain_id,
-                    "block_height": block_height,
-                    "endpoint": endpoint
+                    "chain_id": item.chain_id,
+                    "block_height": item.block_height,
+                    "endpoint": item.endpoint
                 },
-                {"$set": document},
+                {"$set": item.to_dict()},
                 upsert=True
-            )
+            ))
+        
+        for name, batch in batches.items():
+            collection = self.db[name]
+            if backfill:
+                collection = collection.with_options(write_concern=self.backfill_write_concern)
+            collection.bulk_write(batch, ordered=False)
+        self._update_latest(items, backfill)
+        self._store_derived(items, backfill)
+        publish_batch(self.db, items)
+    
+    def data_collection(self, chain_id: str, endpoint: str) -> Collection:
+        """
+        Get the collection holding a chain's raw documents of an endpoint.
+        
+        Collections of the partitioned layouts are created on first write;
+        their indexes are created the first time this returns them.
+        
+        Args:
+            chain_id: Chain identifier
+            endpoint: Endpoint type
             
-            logger.debug(f"Stored {endpoint} data for {chain_id} at block {block_height}")
-            return True
+        Returns:
+            Collection for the configured storage layout
+        """
+        name = data_collection_name(chain_id, endpoint, self.storage_layout)
+        collection = self.db[name]
+        if name != DATA_COLLECTION and name not in self._indexed_collections:
+            with self._indexed_collections_lock:
+                if name not in self._indexed_collections:
+                    collection.create_indexes(INDEXES[DATA_COLLECTION])
+                    self._indexed_collections.add(name)
+        return collection
+    
+    def data_collections(self, chain_id: str, endpoints: List[str]) -> List[Tuple[Collection, List[str]]]:
+        """
+        Get the collections holding a chain's raw documents of several endpoints.
+        
+        Args:
+            chain_id: Chain identifier
+            endpoints: Endpoint types
+            
+        Returns:
+            List of (collection, endpoints stored in it)
+        """
+        return [
+            (self.data_collection(chain_id, collection_endpoints[0]), collection_endpoints)
+            for collection_endpoints in group_endpoints(chain_id, endpoints, self.storage_layout).values()
+        ]
+    
+    def replay_spool(self, batch_size: Optional[int] = None) -> int:
+        """
+        Write spooled documents to MongoDB, oldest first.
+        
+        Stops at the first failed batch; the remaining documents stay in the
+        spool for the next attempt.
+        
+        Args:
+            batch_size: Documents per bulk write (falls back to config)
+            
+        Returns:
+            Number of documents replayed
+        """
+        if self.spool is None or not self.spool.pending:
+            return 0
+        
+        batch_size = batch_size or get_config().spool_replay_batch
+        replayed = 0
+        while True:
+            ids, items, backfill = self.spool.peek(batch_size)
+            if not ids:
+                break
+            try:
+                self._write_bulk(items, backfill)
+            except PyMongoError as e:
+                logger.warning(f"Spool replay paused, MongoDB still unavailable: {e}")
+                break
+            self.spool.remove(ids)
+            replayed += len(ids)
+        
+        if replayed:
+            logger.info(f"Replayed {replayed} spooled documents, {self.spool.pending} remaining")
+        return replayed
+    
+    def _update_latest(self, items: List[BlockchainData], backfill: bool = False) -> None:
+        """
+        Upsert the materialized latest document for each chain and endpoint.
+        
+        chain_latest holds one document per (chain_id, endpoint), keyed by
+        "<chain_id>:<endpoint>", so latest-value reads are a primary key lookup.
+        The update only replaces the stored document when the new one is at
+        the same or a greater height, so out-of-order writes cannot move it back.
+        
+        Args:
+            items: Data models that were just written
+            backfill: Use the backfill write concern instead of the client default
+        """
+        newest: Dict[str, BlockchainData] = {}
+        for item in items:
+            key = latest_key(item.chain_id, item.endpoint)
+            if key not in newest or item.block_height >= newest[key].block_height:
+                newest[key] = item
+        
+        operations = []
+        for key, item in newest.items():
+            document = item.to_dict()
+            document["_id"] = key
+            operations.append(UpdateOne(
+                {"_id": key},
+                [{"$replaceWith": {"$cond": [
+                    {"$gte": [item.block_height, {"$ifNull": ["$block_height", -1]}]},
+                    {"$literal": document},
+                    "$$ROOT"
+                ]}}],
+                upsert=True
+            ))
+        
+        collection = self.db.chain_latest
+        if backfill:
+            collection = collection.with_options(write_concern=self.backfill_write_concern)
+        collection.bulk_write(operations, ordered=False)
+    
+    def _store_derived(self, items: List[BlockchainData], backfill: bool = False) -> None:
+        """
+        Upsert the derived documents of the items (block headers, validator summaries).
+        
+        Args:
+            items: Data models that were just written
+            backfill: Use the backfill write concern instead of the client default
+        """
+        for derivation in DERIVATIONS.values():
+            operations = derivation.operations(items)
+            if not operations:
+                continue
+            
+            collection = self.db[derivation.collection]
+            if backfill:
+                collection = collection.with_options(write_concern=self.backfill_write_concern)
+            collection.bulk_write(operations, ordered=False)
+    
+    def get_latest_document(self, chain_id: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest stored document for a chain and endpoint.
+        
+        Args:
+            chain_id: Chain identifier
+            endpoint: Endpoint type
+            
+        Returns:
+            The materialized latest document, or None if nothing is stored
+        """
+        try:
+            return self.db.chain_latest.find_one({"_id": latest_key(chain_id, endpoint)})
         except PyMongoError as e:
-            logger.error(f"Failed to store blockchain data: {e}")
-            return False
+            logger.error(f"Failed to retrieve latest {endpoint} document: {e}")
+            return None
+    
+    def get_range(self, chain_id: str, endpoint: str, start_height: int, end_height: int) -> List[Dict[str, Any]]:
+        """
+        Get the stored documents of an endpoint in a height range.
+        
+        Args:
+            chain_id: Chain identifier
+            endpoint: Endpoint type
+            start_height: First height (inclusive)
+            end_height: Last height (inclusive)
+            
+        Returns:
+            Documents ordered by height
+        """
+        try:
+            return list(self.data_collection(chain_id, endpoint).find(
+                {
+                    "chain_id": chain_id,
+                    "endpoint": endpoint,
+                    "block_height": {"$gte": start_height, "$lte": end_height}
+                },
+                {"_id": 0}
+            ).sort("block_height", ASCENDING))
+        except PyMongoError as e:
+            logger.error(f"Failed to retrieve {endpoint} documents {start_height}-{end_height}: {e}")
+            return []
+    
+    def recent_block_interval(self, chain_id: str, latest_height: int, samples: int) -> Optional[float]:
+        """
+        Estimate a chain's current block interval from its latest stored headers.
+        
+        Args:
+            chain_id: Chain identifier
+            latest_height: Height to look back from
+            samples: Number of blocks to look back over
+            
+        Returns:
+            Median seconds between adjacent blocks, or None if too few are stored
+        """
+        # Imported here, block_analytics imports this module
+        from daemon.services.block_analytics import recent_block_interval
+        try:
+            return recent_block_interval(self.db, chain_id, latest_height, samples)
+        except PyMongoError as e:
+            logger.error(f"Failed to retrieve block times: {e}")
+            return None
     
     def get_latest_block_height(self, chain_id: str) -> Optional[int]:
         """
         Get the latest stored block height for a specific chain.
         
+        Blocks waiting in the spool count as stored, so collection moves on
+        instead of fetching the same heights again while MongoDB is down.
+        
+        Args:
+            chain_id: Chain identifier
+            
+        Returns:
+            Latest block height as an integer, or None if no data is found
+        """
+        spooled = self.spool.max_height(chain_id) if self.spool else None
+        stored = self._get_stored_block_height(chain_id)
+        if spooled is None or stored is None:
+            return stored if spooled is None else spooled
+        return max(stored, spooled)
+    
+    def _get_stored_block_height(self, chain_id: str) -> Optional[int]:
+        """
+        Get the latest block height stored in MongoDB for a chain.
+        
         Args:
             chain_id: Chain identifier
             
@@ -122,7 +561,15 @@ class MongoDBService:
             Latest block height as an integer, or None if no data is found
         """
         try:
-            result = self.db.blockchain_data.find(
+            latest = self.db.chain_latest.find_one(
+                {"_id": latest_key(chain_id, "block")},
+                {"block_height": 1}
+            )
+            if latest:
+                return latest["block_height"]
+            
+            # Fall back to the raw data for databases without chain_latest yet
+            result = self.data_collection(chain_id, "block").find(
                 {"chain_id": chain_id, "endpoint": "block"},
                 {"block_height": 1}
             ).sort("block_height", -1).limit(1)
@@ -136,10 +583,55 @@ class MongoDBService:
             return None
     
     def close(self) -> None:
-        """Close the MongoDB connection."""
+        """Close the MongoDB connection and the spool."""
+        if self.spool:
+            self.spool.close()
         if self.client:
             self.client.close()
             logger.info("MongoDB connection closed")
 
-# Singleton instance
-mongo_service = MongoDBService() 
\ No newline at end of file
+# Singleton instance, created on first use
+_mongo_service: Optional[MongoDBService] = None
+_mongo_service_lock = threading.Lock()
+
+def init_mongo_service(**kwargs: Any) -> MongoDBService:
+    """
+    Replace the MongoDB service singleton.
+    
+    Utilities use this to open the service with their own options, e.g.
+    without the daemon's write spool.
+    
+    Args:
+        **kwargs: Arguments for MongoDBService
+        
+    Returns:
+        The new service instance
+    """
+    global _mongo_service
+    with _mongo_service_lock:
+        if _mongo_service is not None:
+            _mongo_service.close()
+        _mongo_service = MongoDBService(**kwargs)
+    return _mongo_service
+
+def get_mongo_service() -> MongoDBService:
+    """
+    Get the MongoDB service singleton, creating it on first use.
+    
+    Returns:
+        The MongoDB service instance
+    """
+    global _mongo_service
+    if _mongo_service is None:
+        with _mongo_service_lock:
+            if _mongo_service is None:
+                _mongo_service = MongoDBService()
+    return _mongo_service
+
+def close_mongo_service() -> None:
+    """Close the MongoDB service singleton if it was created."""
+    global _mongo_service
+    with _mongo_service_lock:
+        if _mongo_service is not None:
+            _mongo_service.close()
+            _mongo_service = None 
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+In-flight payload memory budget for the CosmosData daemon.
+
+Decoded block payloads of busy chains can be tens of MB each, so the number of
+them held in memory at once is bounded by a shared byte budget. Response bodies
+are accounted for as they are read (from Content-Length, or chunk by chunk when
+the length is unknown), scaled by an estimate of the decoded size. Fetchers
+that would exceed the budget wait for other payloads to be released.
+
+Bytes held while a ledger is open on the current thread are carried by that
+ledger instead of being released when the request returns, so the block
+pipeline can keep a height's payload accounted for until it has been written.
+Helper threads fetching for that height join the ledger with carry().
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from daemon.config.config import get_config
+
+logger = logging.getLogger(__name__)
+
+class Reservation:
+    """Bytes held on behalf of one unit of work."""
+
+    def __init__(self, budget: "PayloadBudget"):
+        """
+        Initialize the reservation.
+
+        Args:
+            budget: Budget the bytes are held in
+        """
+        self.budget = budget
+        self.bytes = 0
+
+    def release(self) -> None:
+        """Return the held bytes to the budget."""
+        if self.bytes:
+            self.budget.release(self.bytes)
+            self.bytes = 0
+
+class PayloadBudget:
+    """Process-wide limit on estimated resident response payload bytes."""
+
+    def __init__(self,
+                 limit: Optional[int] = None,
+                 memory_factor: Optional[float] = None,
+                 max_wait: Optional[float] = None):
+        """
+        Initialize the budget.
+
+        Args:
+            limit: Maximum bytes in flight, 0 for no limit (falls back to config)
+            memory_factor: Estimated decoded size per response byte (falls back to config)
+            max_wait: Seconds to wait for space before going over the limit, so
+                heights held for in-order writing cannot deadlock the fetchers
+                (falls back to config)
+        """
+        config = get_config()
+        self.limit = config.payload_budget_bytes if limit is None else limit
+        self.memory_factor = memory_factor or config.payload_memory_factor
+        self.max_wait = config.payload_budget_wait if max_wait is None else max_wait
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self.in_use = 0
+        self.peak = 0
+        self.waits = 0
+        self.overcommits = 0
+
+    def hold(self, response_bytes: int, already_held: int = 0) -> int:
+        """
+        Account for response bytes about to be read.
+
+        Waits while the budget is exhausted, unless nothing but the caller's
+        own response is in flight, so a single payload larger than the budget
+        can still be read.
+
+        Args:
+            response_bytes: Raw bytes of the response body (or chunk)
+            already_held: Bytes the caller already holds for the same response
+
+        Returns:
+            Bytes held, to be passed to settle() once the body is decoded
+        """
+        nbytes = int(response_bytes * self.memory_factor)
+        if not nbytes:
+            return 0
+
+        with self._cond:
+            if self._must_wait(nbytes, already_held):
+                self.waits += 1
+                deadline = time.monotonic() + self.max_wait
+                while self._must_wait(nbytes, already_held):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.overcommits += 1
+                        logger.warning(
+                            f"Payload budget exhausted for {self.max_wait}s, "
+                            f"going over the limit ({self.in_use} + {nbytes} bytes)"
+                        )
+                        break
+                    self._cond.wait(remaining)
+
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+        return nbytes
+
+    def _must_wait(self, nbytes: int, already_held: int) -> bool:
+        """Check whether holding nbytes more would exceed the limit (lock held)."""
+        others_in_use = self.in_use - already_held
+        return bool(self.limit) and others_in_use > 0 and self.in_use + nbytes > self.limit
+
+    def settle(self, nbytes: int) -> None:
+        """
+        Hand held bytes to the ledger open on this thread, or release them.
+
+        Args:
+            nbytes: Bytes returned by hold()
+        """
+        ledger = getattr(self._local, "ledger", None)
+        if ledger is not None:
+            # Helper threads may settle into the same ledger concurrently
+            with self._cond:
+                ledger.bytes += nbytes
+        else:
+            self.release(nbytes)
+
+    def release(self, nbytes: int) -> None:
+        """
+        Return bytes to the budget.
+
+        Args:
+            nbytes: Bytes held with hold() or carried by a reservation
+        """
+        if not nbytes:
+            return
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+    @contextmanager
+    def ledger(self) -> Iterator[Reservation]:
+        """
+        Carry bytes held on this thread in a reservation.
+
+        The bytes stay held after the block exits, until the reservation is
+        released.
+
+        Yields:
+            The reservation collecting the held bytes
+        """
+        reservation = Reservation(self)
+        self._local.ledger = reservation
+        try:
+            yield reservation
+        finally:
+            self._local.ledger = None
+
+    def current_ledger(self) -> Optional[Reservation]:
+        """
+        Get the reservation of the ledger open on this thread.
+
+        Returns:
+            The reservation, or None if no ledger is open
+        """
+        return getattr(self._local, "ledger", None)
+
+    @contextmanager
+    def carry(self, reservation: Optional[Reservation]) -> Iterator[None]:
+        """
+        Carry bytes held on this thread in an existing reservation.
+
+        Lets helper threads charge their requests to the ledger of the thread
+        that handed them the work. With None, bytes are released when each
+        request returns, as without a ledger.
+
+        Args:
+            reservation: Reservation from current_ledger() on the handing thread
+        """
+        previous = getattr(self._local, "ledger", None)
+        self._local.ledger = reservation
+        try:
+            yield
+        finally:
+            self._local.ledger = previous
+
+    def stats(self, reset_peak: bool = False) -> Dict[str, int]:
+        """
+        Get the budget counters.
+
+        Args:
+            reset_peak: Start a new peak measurement from the current usage
+
+        Returns:
+            Dictionary with limit, in_use, peak, waits and overcommits
+        """
+        with self._cond:
+            stats = {
+                "limit": self.limit,
+                "in_use": self.in_use,
+                "peak": self.peak,
+                "waits": self.waits,
+                "overcommits": self.overcommits
+            }
+            if reset_peak:
+                self.peak = self.in_use
+            return stats
+
+# Singleton instance, created on first use
+_payload_budget: Optional[PayloadBudget] = None
+_payload_budget_lock = threading.Lock()
+
+def get_payload_budget() -> PayloadBudget:
+    """
+    Get the payload budget singleton, creating it on first use.
+
+    Returns:
+        The payload budget instance
+    """
+    global _payload_budget
+    if _payload_budget is None:
+        with _payload_budget_lock:
+            if _payload_budget is None:
+                _payload_budget = PayloadBudget()
+    return _payload_budget
@@ -0,0 +1,348 @@
+"""
+Block collection pipeline for the CosmosData daemon.
+
+Heights are processed by three stages connected by bounded queues, so network
+and database latency overlap instead of adding up:
+
+    fetchers (N threads)  ->  transformers (M threads)  ->  writer (1 thread)
+
+Fetchers download the block, validators and height-scoped endpoints of a
+height, transformers build the data models and extract header fields, and the
+writer stores the results in bulk. The writer commits heights strictly in
+order and stops at the first height that failed, so the stored height never
+skips over a missing block. Full queues block the stage before them, and the
+number of heights in flight is bounded as a whole.
+"""
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from daemon.config.config import get_config, ChainConfig
+from daemon.models.blockchain_data import BlockchainData, Block, Validators
+from daemon.services.cosmos_client import CosmosClient
+from daemon.services.endpoint_registry import collect_height_endpoints
+from daemon.services.storage import StorageBackend
+from daemon.services.payload_budget import Reservation, get_payload_budget
+from daemon.utils.profiling import get_profiler
+
+logger = logging.getLogger(__name__)
+
+# Seconds a blocked stage waits before re-checking whether it should stop
+POLL_INTERVAL = 0.5
+
+# Queue marker telling the next stage that no more work will arrive
+_DONE = object()
+
+class HeightWork:
+    """Everything collected for one block height as it moves through the stages."""
+
+    def __init__(self, height: int):
+        """
+        Initialize the work item.
+
+        Args:
+            height: Block height
+        """
+        self.height = height
+        self.block_data: Optional[Dict[str, Any]] = None
+        self.validators_data: Optional[Dict[str, Any]] = None
+        self.items: List[BlockchainData] = []
+        self.error: Optional[Exception] = None
+        self.reservation: Optional[Reservation] = None
+
+    def release(self) -> None:
+        """Return the payload bytes of this height to the budget."""
+        if self.reservation is not None:
+            self.reservation.release()
+
+class BlockPipeline:
+    """Fetches, transforms and stores a range of block heights for one chain."""
+
+    def __init__(self,
+                 client: CosmosClient,
+                 chain_config: ChainConfig,
+                 storage: StorageBackend,
+                 timestamp: int,
+                 backfill: bool = False,
+                 fetch_workers: int = None,
+                 transform_workers: int = None,
+                 queue_size: int = None,
+                 batch_size: int = None,
+                 should_stop: Callable[[], bool] = lambda: False):
+        """
+        Initialize the pipeline.
+
+        Args:
+            client: Client for the chain
+            chain_config: Configuration of the chain
+            storage: Storage backend used by the writer
+            timestamp: Unix timestamp recorded with the collected documents
+            backfill: Use the backfill write concern
+            fetch_workers: Concurrent fetches (falls back to config)
+            transform_workers: Concurrent transformers (falls back to config)
+            queue_size: Capacity of each queue between stages (falls back to config)
+            batch_size: Documents per bulk write (falls back to config)
+            should_stop: Returns True when collection should stop early
+        """
+        config = get_config()
+        self.client = client
+        self.chain_config = chain_config
+        self.chain_id = chain_config.chain_id
+        self.storage = storage
+        self.timestamp = timestamp
+        self.backfill = backfill
+        self.fetch_workers = fetch_workers or config.pipeline_fetch_workers
+        self.transform_workers = transform_workers or config.pipeline_transform_workers
+        self.queue_size = queue_size or config.pipeline_queue_size
+        self.batch_size = batch_size or config.write_batch_size
+        self.should_stop = should_stop
+
+        self._heights: "queue.Queue[int]" = queue.Queue()
+        self._fetched: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+        self._transformed: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+        # Bounds heights in flight, including those waiting to be written in order
+        self._window = threading.Semaphore(2 * self.queue_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._fetchers_left = 0
+        self._transformers_left = 0
+        # Set once the writer has taken the transformers' _DONE off the queue
+        self._writer_done = False
+        self._max_depths = {"fetched": 0, "transformed": 0}
+
+    def queue_depths(self) -> Dict[str, int]:
+        """
+        Get the current depth of each queue.
+
+        Returns:
+            Dictionary of queue name to number of waiting items
+        """
+        return {
+            "heights": self._heights.qsize(),
+            "fetched": self._fetched.qsize(),
+            "transformed": self._transformed.qsize()
+        }
+
+    def max_queue_depths(self) -> Dict[str, int]:
+        """
+        Get the largest depth each inter-stage queue reached.
+
+        Returns:
+            Dictionary of queue name to maximum number of waiting items
+        """
+        with self._lock:
+            return dict(self._max_depths)
+
+    def run(self, heights: List[int]) -> Optional[int]:
+        """
+        Collect and store a range of heights.
+
+        The writer runs in the calling thread; fetchers and transformers run
+        in their own threads for the duration of the call.
+
+        Args:
+            heights: Ascending, contiguous block heights to collect
+
+        Returns:
+            The last height written, or None if none was
+        """
+        if not heights:
+            return None
+
+        for height in heights:
+            self._heights.put(height)
+
+        fetch_workers = min(self.fetch_workers, len(heights))
+        self._fetchers_left = fetch_workers
+        self._transformers_left = self.transform_workers
+        self._writer_done = False
+        threads = [
+            threading.Thread(target=self._fetch_loop, name=f"fetch-{self.chain_id}-{i}", daemon=True)
+            for i in range(fetch_workers)
+        ] + [
+            threading.Thread(target=self._transform_loop, name=f"transform-{self.chain_id}-{i}", daemon=True)
+            for i in range(self.transform_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            return self._write_loop(heights[0])
+        except Exception:
+            # Unblock the other stages before giving up; if the writer already
+            # saw _DONE (the final flush failed), nothing is left to drain
+            self._stop.set()
+            while not self._writer_done:
+                work = self._transformed.get()
+                if work is _DONE:
+                    break
+                work.release()
+            raise
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            logger.debug(f"Pipeline for {self.chain_id} max queue depths: {self.max_queue_depths()}")
+
+    def _put(self, target: "queue.Queue[Any]", name: str, item: Any) -> None:
+        """
+        Put an item on a bounded queue, blocking while it is full.
+
+        Args:
+            target: Destination queue
+            name: Queue name for the depth statistics
+            item: Item to enqueue
+        """
+        target.put(item)
+        depth = target.qsize()
+        with self._lock:
+            if depth > self._max_depths[name]:
+                self._max_depths[name] = depth
+
+    def _fetch_loop(self) -> None:
+        """Fetcher thread: download the raw data of heights until none are left."""
+        profiler = get_profiler()
+        budget = get_payload_budget()
+        try:
+            while not self._stop.is_set() and not self.should_stop():
+                if not self._window.acquire(timeout=POLL_INTERVAL):
+                    continue
+                try:
+                    height = self._heights.get_nowait()
+                except queue.Empty:
+                    self._window.release()
+                    break
+
+                work = HeightWork(height)
+                # Payload bytes stay held until the writer has stored the height
+                with budget.ledger() as work.reservation:
+                    try:
+                        with profiler.stage("fetch_block", self.chain_id):
+                            work.block_data = self.client.get_block(height)
+                        if "validators" in self.chain_config.enabled_endpoints:
+                            with profiler.stage("fetch_validators", self.chain_id):
+                                work.validators_data = self.client.get_validators(height)
+                        with profiler.stage("fetch_endpoints", self.chain_id):
+                            work.items = collect_height_endpoints(
+                                self.client, self.chain_config, height, self.timestamp
+                            )
+                    except Exception as e:
+                        work.error = e
+                self._put(self._fetched, "fetched", work)
+        finally:
+            with self._lock:
+                self._fetchers_left -= 1
+                last = self._fetchers_left == 0
+            if last:
+                for _ in range(self.transform_workers):
+                    self._fetched.put(_DONE)
+
+    def _transform_loop(self) -> None:
+        """Transformer thread: build data models from fetched heights."""
+        profiler = get_profiler()
+        try:
+            while True:
+                work = self._fetched.get()
+                if work is _DONE:
+                    break
+                if work.error is None:
+                    try:
+                        with profiler.stage("transform", self.chain_id):
+                            block = Block(self.chain_id, work.height, work.block_data, self.timestamp)
+                            # Extract header fields here rather than in the
+                            # writer; the block_headers derivation reads the
+                            # cached result
+                            block.header_summary()
+                            items: List[BlockchainData] = [block]
+                            if work.validators_data is not None:
+                                items.append(Validators(
+                                    self.chain_id, work.height, work.validators_data, self.timestamp
+                                ))
+                            work.items = items + work.items
+                    except Exception as e:
+                        work.error = e
+                work.block_data = work.validators_data = None
+                self._put(self._transformed, "transformed", work)
+        finally:
+            with self._lock:
+                self._transformers_left -= 1
+                last = self._transformers_left == 0
+            if last:
+                self._transformed.put(_DONE)
+
+    def _write_loop(self, first_height: int) -> Optional[int]:
+        """
+        Writer: store transformed heights in order, in bulk.
+
+        Args:
+            first_height: First height of the range
+
+        Returns:
+            The last height written, or None if none was
+        """
+        profiler = get_profiler()
+        next_height = first_height
+        ready: Dict[int, HeightWork] = {}
+        pending: List[BlockchainData] = []
+        pending_work: List[HeightWork] = []
+        last_written: Optional[int] = None
+        failed = False
+
+        def flush() -> bool:
+            nonlocal last_written
+            if not pending:
+                return True
+            try:
+                with profiler.stage("store", self.chain_id):
+                    stored = self.storage.store_blockchain_data_bulk(pending, backfill=self.backfill)
+            finally:
+                pending.clear()
+                for done in pending_work:
+                    done.release()
+            if stored:
+                last_written = pending_work[-1].height
+            pending_work.clear()
+            return stored
+
+        try:
+            while True:
+                work = self._transformed.get()
+                if work is _DONE:
+                    self._writer_done = True
+                    break
+                if failed:
+                    # Keep draining so the other stages can finish
+                    work.release()
+                    continue
+
+                ready[work.height] = work
+                while next_height in ready:
+                    work = ready.pop(next_height)
+                    if work.error is not None:
+                        logger.error(f"Failed to collect {self.chain_id} at height {work.height}: {work.error}")
+                        work.release()
+                        failed = True
+                        break
+                    pending.extend(work.items)
+                    pending_work.append(work)
+                    next_height += 1
+                    self._window.release()
+
+                    if len(pending) >= self.batch_size and not flush():
+                        failed = True
+                        break
+
+                if failed:
+                    # Later heights must not be written past the failed one
+                    self._stop.set()
+                    for work in ready.values():
+                        work.release()
+                    ready.clear()
+
+            # Heights before a failure are still written
+            flush()
+            return last_written
+        finally:
+            for work in list(ready.values()) + pending_work:
+                work.release()
@@ -0,0 +1,125 @@
+"""
+Response cache for the CosmosData daemon.
+
+This module provides a small size-bounded LRU cache with per-entry expiry for
+REST responses, used by the chain clients for slow-changing endpoints such as
+governance-controlled parameters.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+class CacheEntry:
+    """A cached response body with its validator and expiry time."""
+
+    def __init__(self, data: Dict[str, Any], etag: Optional[str], expires_at: float):
+        """
+        Initialize the cache entry.
+
+        Args:
+            data: Decoded response body
+            etag: ETag header of the response, if the server sent one
+            expires_at: Monotonic time after which the entry must be revalidated
+        """
+        self.data = data
+        self.etag = etag
+        self.expires_at = expires_at
+
+class ResponseCache:
+    """Thread-safe LRU cache of REST responses with per-entry TTLs."""
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the response cache.
+
+        Args:
+            max_entries: Maximum number of entries before the least recently
+                used one is evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def lookup(self, key: str) -> Tuple[Optional[CacheEntry], bool]:
+        """
+        Look up a cached response.
+
+        Expired entries are still returned so the caller can revalidate them
+        with their ETag, but they are not counted as hits.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (entry or None, whether the entry is still fresh)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            if entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry, True
+
+            self.misses += 1
+            return entry, False
+
+    def put(self, key: str, data: Dict[str, Any], etag: Optional[str], ttl: float) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Cache key
+            data: Decoded response body
+            etag: ETag header of the response, if any
+            ttl: Seconds the entry stays fresh
+        """
+        with self._lock:
+            self._entries[key] = CacheEntry(data, etag, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def refresh(self, key: str, ttl: float) -> None:
+        """
+        Extend the lifetime of an entry the server confirmed as unchanged.
+
+        Args:
+            key: Cache key
+            ttl: Seconds the entry stays fresh
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = time.monotonic() + ttl
+                self.revalidations += 1
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dictionary with entries, hits, misses, revalidations and evictions
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,198 @@
+"""
+Retention service for the CosmosData daemon.
+
+This module applies the per-endpoint retention policies from the chain
+configuration: old documents are either deleted (TTL) or folded into hourly or
+daily rollup documents. Work is done incrementally in small batches so that it
+can run in the background without competing with data collection.
+"""
+import logging
+import time
+from typing import Dict, Any, List, Tuple
+
+from pymongo import UpdateOne, ASCENDING
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from daemon.config.config import get_config, ChainConfig, RetentionPolicy
+from daemon.services.mongo_service import get_mongo_service
+
+logger = logging.getLogger(__name__)
+
+class RetentionService:
+    """Service that enforces retention policies on stored blockchain data."""
+
+    def __init__(self, batch_size: int = None, max_batches: int = 10):
+        """
+        Initialize the retention service.
+
+        Args:
+            batch_size: Number of documents processed per batch (falls back to config)
+            max_batches: Maximum batches per policy in a single run, so one
+                large backlog cannot starve the other policies
+        """
+        self.batch_size = batch_size or get_config().retention_batch_size
+        self.max_batches = max_batches
+
+    def run_once(self) -> None:
+        """Apply every configured retention policy once."""
+        for chain_config in list(get_config().chains.values()):
+            for policy in chain_config.retention.values():
+                try:
+                    processed = self.apply_policy(chain_config, policy)
+                    if processed:
+                        logger.info(
+                            f"Retention {policy.action} processed {processed} "
+                            f"{policy.endpoint} documents for {chain_config.chain_id}"
+                        )
+                except PyMongoError as e:
+                    logger.error(
+                        f"Retention failed for {chain_config.chain_id}/{policy.endpoint}: {e}"
+                    )
+
+    def apply_policy(self, chain_config: ChainConfig, policy: RetentionPolicy) -> int:
+        """
+        Apply a single retention policy in batches.
+
+        Args:
+            chain_config: Configuration of the chain the policy belongs to
+            policy: Retention policy to apply
+
+        Returns:
+            Number of raw documents deleted or rolled up
+        """
+        collection = self._policy_collection(chain_config, policy)
+        cutoff = int(time.time()) - policy.max_age
+        query = {
+            "chain_id": chain_config.chain_id,
+            "endpoint": policy.endpoint,
+            "timestamp": {"$lt": cutoff}
+        }
+        projection = {"_id": 1} if policy.action == "ttl" else None
+
+        processed = 0
+        for _ in range(self.max_batches):
+            batch = list(
+                collection.find(query, projection)
+                .sort([("timestamp", ASCENDING), ("block_height", ASCENDING)])
+                .limit(self.batch_size)
+            )
+            if not batch:
+                break
+
+            if policy.action == "rollup":
+                self._write_rollups(batch, policy)
+
+            ids = [doc["_id"] for doc in batch]
+            collection.delete_many({"_id": {"$in": ids}})
+            processed += len(batch)
+
+            if len(batch) < self.batch_size:
+                break
+
+        return processed
+
+    @staticmethod
+    def _policy_collection(chain_config: ChainConfig, policy: RetentionPolicy) -> Collection:
+        """
+        Get the collection holding the documents a policy applies to.
+
+        Args:
+            chain_config: Configuration of the chain the policy belongs to
+            policy: Retention policy
+
+        Returns:
+            chain_samples for chain-scoped endpoints, else the raw data collection
+        """
+        service = get_mongo_service()
+        spec = chain_config.endpoints.get(policy.endpoint)
+        if spec is not None and spec.scope == "chain":
+            return service.db.chain_samples
+        return service.data_collection(chain_config.chain_id, policy.endpoint)
+
+    def _write_rollups(self, batch: List[Dict[str, Any]], policy: RetentionPolicy) -> None:
+        """
+        Merge a batch of raw documents into their rollup buckets.
+
+        Batches are read in ascending (timestamp, block_height) order, so the
+        first batch touching a bucket sets its opening value and later batches
+        only move the close. Each bucket records the last document folded into
+        it as (through_timestamp, through_height), and documents at or below
+        that mark are skipped. A batch whose rollup was written but whose raw
+        documents were not deleted, e.g. because the daemon stopped in
+        between, is therefore not counted twice when it is read again.
+
+        Args:
+            batch: Raw documents sorted by timestamp
+            policy: Retention policy with the rollup granularity
+        """
+        collection = get_mongo_service().db.blockchain_data_rollups
+        chain_ids = {doc["chain_id"] for doc in batch}
+        bucket_starts = {doc["timestamp"] - doc["timestamp"] % policy.bucket_seconds for doc in batch}
+        watermarks = {
+            (rollup["chain_id"], rollup["bucket_start"]): (rollup["through_timestamp"], rollup["through_height"])
+            for rollup in collection.find(
+                {
+                    "chain_id": {"$in": list(chain_ids)},
+                    "endpoint": policy.endpoint,
+                    "granularity": policy.granularity,
+                    "bucket_start": {"$in": list(bucket_starts)},
+                    "through_timestamp": {"$exists": True}
+                },
+                {"chain_id": 1, "bucket_start": 1, "through_timestamp": 1, "through_height": 1}
+            )
+        }
+
+        buckets: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        for doc in batch:
+            bucket_start = doc["timestamp"] - doc["timestamp"] % policy.bucket_seconds
+            key = (doc["chain_id"], bucket_start)
+            watermark = watermarks.get(key)
+            if watermark is not None and (doc["timestamp"], doc["block_height"]) <= watermark:
+                continue
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = {
+                    "chain_id": doc["chain_id"],
+                    "bucket_start": bucket_start,
+                    "count": 0,
+                    "first_height": doc["block_height"],
+                    "first_timestamp": doc["timestamp"],
+                    "open": doc["data"]
+                }
+            bucket["count"] += 1
+            bucket["last_height"] = doc["block_height"]
+            bucket["last_timestamp"] = doc["timestamp"]
+            bucket["close"] = doc["data"]
+
+        operations = []
+        for bucket in buckets.values():
+            operations.append(UpdateOne(
+                {
+                    "chain_id": bucket["chain_id"],
+                    "endpoint": policy.endpoint,
+                    "granularity": policy.granularity,
+                    "bucket_start": bucket["bucket_start"]
+                },
+                {
+                    "$setOnInsert": {"open": bucket["open"]},
+                    "$set": {
+                        "close": bucket["close"],
+                        "through_timestamp": bucket["last_timestamp"],
+                        "through_height": bucket["last_height"]
+                    },
+                    "$inc": {"count": bucket["count"]},
+                    "$min": {
+                        "first_height": bucket["first_height"],
+                        "first_timestamp": bucket["first_timestamp"]
+                    },
+                    "$max": {
+                        "last_height": bucket["last_height"],
+                        "last_timestamp": bucket["last_timestamp"]
+                    }
+                },
+                upsert=True
+            ))
+
+        if operations:
+            collection.bulk_write(operations, ordered=False)
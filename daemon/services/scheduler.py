@@ -0,0 +1,279 @@
+"""
+Lag-aware scheduling for the CosmosData daemon.
+
+Each cycle the collector measures how far every chain is behind its tip (the
+node's latest height minus the stored height). The scheduler splits a shared
+budget of concurrent block fetches across chains in proportion to that lag,
+while every chain keeps at least one fetcher so chains already at the tip
+stay there.
+
+It also decides when each chain is polled next. A chain still behind is
+polled again right away; a chain at its tip is polled just after its next
+block is expected, from the tip's block time and the chain's recent block
+interval. Polls that find no new block back off exponentially, so a halted
+chain costs few status requests, and so do failed collections, starting
+from the chain's monitoring frequency.
+"""
+import time
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from daemon.config.config import get_config
+
+logger = logging.getLogger(__name__)
+
+def allocate_workers(lags: Dict[str, int], budget: int, min_workers: int = 1) -> Dict[str, int]:
+    """
+    Split a fetch budget across chains in proportion to their lag.
+
+    Every chain gets min_workers first; the rest of the budget is shared by
+    lagging chains by the largest remainder method. The floor is kept even
+    when the budget is smaller than the number of chains.
+
+    Args:
+        lags: Blocks behind the tip per chain
+        budget: Total concurrent fetches to share
+        min_workers: Fetchers every chain gets regardless of lag
+
+    Returns:
+        Dictionary of chain ID to number of fetchers
+    """
+    allocation = {chain_id: min_workers for chain_id in lags}
+    spare = budget - min_workers * len(lags)
+    total_lag = sum(max(lag, 0) for lag in lags.values())
+    if spare <= 0 or total_lag == 0:
+        return allocation
+
+    # A chain never gets more extra fetchers than it has blocks to fetch
+    shares = {chain_id: spare * max(lag, 0) / total_lag for chain_id, lag in lags.items()}
+    for chain_id, share in shares.items():
+        allocation[chain_id] += min(int(share), max(lags[chain_id], 0))
+    remaining = budget - sum(allocation.values())
+
+    by_remainder = sorted(shares, key=lambda chain_id: shares[chain_id] - int(shares[chain_id]), reverse=True)
+    for chain_id in by_remainder:
+        if remaining <= 0:
+            break
+        if allocation[chain_id] - min_workers < lags[chain_id]:
+            allocation[chain_id] += 1
+            remaining -= 1
+
+    return allocation
+
+class LagScheduler:
+    """Tracks per-chain lag and hands out fetch concurrency each cycle."""
+
+    def __init__(self, budget: Optional[int] = None, blocks_per_worker: Optional[int] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            budget: Concurrent block fetches shared by all chains (falls back to config)
+            blocks_per_worker: Heights collected per cycle for each fetcher (falls back to config)
+        """
+        config = get_config()
+        self.budget = budget or config.fetch_budget
+        self.blocks_per_worker = blocks_per_worker or config.blocks_per_worker
+        self.adaptive_polling = config.adaptive_polling
+        self.poll_margin = config.poll_margin
+        self.poll_min_interval = config.poll_min_interval
+        self.poll_max_interval = config.poll_max_interval
+        self._lags: Dict[str, int] = {}
+        self._allocation: Dict[str, int] = {}
+        # Latest (height, block time) reported by each chain's node
+        self._tips: Dict[str, Tuple[int, Optional[float]]] = {}
+        # Consecutive polls that found no new block
+        self._stalls: Dict[str, int] = {}
+        # Estimated seconds between blocks
+        self._intervals: Dict[str, float] = {}
+        # Consecutive collections that failed
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record_lag(self, chain_id: str, tip_height: int, stored_height: Optional[int]) -> int:
+        """
+        Record a chain's lag as measured at the start of its collection.
+
+        Args:
+            chain_id: Chain identifier
+            tip_height: Latest height reported by the node
+            stored_height: Latest stored height, or None if nothing is stored
+
+        Returns:
+            Number of blocks the chain is behind
+        """
+        lag = max(tip_height - stored_height, 0) if stored_height is not None else 0
+        with self._lock:
+            self._lags[chain_id] = lag
+        return lag
+
+    def plan_cycle(self, chain_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Compute the fetch concurrency of each chain for the next cycle.
+
+        Chains whose lag has not been measured yet get the minimum.
+
+        Args:
+            chain_ids: Chains collected in the cycle
+
+        Returns:
+            Dictionary of chain ID to number of fetchers
+        """
+        with self._lock:
+            lags = {chain_id: self._lags.get(chain_id, 0) for chain_id in chain_ids}
+            previous = self._allocation
+            self._allocation = allocate_workers(lags, self.budget)
+            allocation = dict(self._allocation)
+
+        lagging = {chain_id: workers for chain_id, workers in allocation.items() if workers > 1}
+        if lagging and allocation != previous:
+            logger.info(f"Fetch allocation for lagging chains: {lagging}")
+        return allocation
+
+    def workers_for(self, chain_id: str) -> int:
+        """
+        Get the fetch concurrency planned for a chain.
+
+        Args:
+            chain_id: Chain identifier
+
+        Returns:
+            Number of fetchers (1 if the chain was not planned)
+        """
+        with self._lock:
+            return self._allocation.get(chain_id, 1)
+
+    def max_blocks(self, chain_id: str) -> int:
+        """
+        Get the number of heights a chain may collect this cycle.
+
+        Args:
+            chain_id: Chain identifier
+
+        Returns:
+            Maximum heights to collect
+        """
+        return self.workers_for(chain_id) * self.blocks_per_worker
+
+    def record_tip(self, chain_id: str, tip_height: int, tip_time: Optional[float]) -> None:
+        """
+        Record the latest block reported by a chain's node.
+
+        Args:
+            chain_id: Chain identifier
+            tip_height: Latest height reported by the node
+            tip_time: Block time of that height as Unix seconds, if known
+        """
+        with self._lock:
+            self._failures.pop(chain_id, None)
+            previous = self._tips.get(chain_id)
+            if previous is not None and tip_height <= previous[0]:
+                self._stalls[chain_id] = self._stalls.get(chain_id, 0) + 1
+            else:
+                self._stalls[chain_id] = 0
+            self._tips[chain_id] = (tip_height, tip_time)
+
+    def record_failure(self, chain_id: str) -> None:
+        """
+        Record a collection that failed with an error.
+
+        The count is reset by the next record_tip().
+
+        Args:
+            chain_id: Chain identifier
+        """
+        with self._lock:
+            self._failures[chain_id] = self._failures.get(chain_id, 0) + 1
+
+    def record_block_interval(self, chain_id: str, interval: Optional[float]) -> None:
+        """
+        Record a chain's estimated block interval.
+
+        Args:
+            chain_id: Chain identifier
+            interval: Seconds between blocks, or None to keep the previous estimate
+        """
+        if interval:
+            with self._lock:
+                self._intervals[chain_id] = interval
+
+    def poll_delay(self, chain_id: str, fallback: float, now: Optional[float] = None) -> float:
+        """
+        Get the seconds until a chain should be polled again.
+
+        Args:
+            chain_id: Chain identifier
+            fallback: Delay to use while the chain's block interval is unknown,
+                and always when adaptive polling is disabled; failed
+                collections back off from it
+            now: Current Unix time (defaults to the system clock)
+
+        Returns:
+            Seconds to wait, between the configured minimum and maximum
+        """
+        if not self.adaptive_polling:
+            return fallback
+
+        now = time.time() if now is None else now
+        with self._lock:
+            lag = self._lags.get(chain_id, 0)
+            tip = self._tips.get(chain_id)
+            stalls = self._stalls.get(chain_id, 0)
+            interval = self._intervals.get(chain_id)
+            failures = self._failures.get(chain_id, 0)
+
+        if failures:
+            # The node is unreachable or erroring: the recorded tip and lag
+            # are stale, so wait the fallback, then twice as long after every
+            # further failure
+            delay = fallback * 2 ** min(failures - 1, 16)
+        elif lag > 0:
+            # More blocks are waiting to be collected
+            delay = self.poll_min_interval
+        elif interval is None or tip is None or tip[1] is None:
+            delay = fallback
+        else:
+            if now - tip[1] > interval:
+                # The node's tip is overdue for a successor already
+                stalls = max(stalls, 1)
+            if stalls:
+                # The expected block did not come: wait one interval, then
+                # twice as long after every further empty poll
+                delay = interval * 2 ** min(stalls - 1, 16)
+            else:
+                delay = tip[1] + interval + self.poll_margin - now
+        return min(max(delay, self.poll_min_interval), self.poll_max_interval)
+
+    def forget(self, chain_id: str) -> None:
+        """
+        Drop the recorded state of a removed chain.
+
+        Args:
+            chain_id: Chain identifier
+        """
+        with self._lock:
+            self._lags.pop(chain_id, None)
+            self._allocation.pop(chain_id, None)
+            self._tips.pop(chain_id, None)
+            self._stalls.pop(chain_id, None)
+            self._intervals.pop(chain_id, None)
+            self._failures.pop(chain_id, None)
+
+# Singleton instance, created on first use
+_scheduler: Optional[LagScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> LagScheduler:
+    """
+    Get the lag scheduler singleton, creating it on first use.
+
+    Returns:
+        The scheduler instance
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LagScheduler()
+    return _scheduler
@@ -0,0 +1,187 @@
+"""
+Write spool for the CosmosData daemon.
+
+When MongoDB is slow or unavailable, bulk writes are appended to a local SQLite
+file instead of being dropped. The spool is replayed into MongoDB in order, in
+bulk, once the server accepts writes again. Collectors are only slowed down
+(backpressure) when the spool grows past its size limit.
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+from daemon.models.blockchain_data import BlockchainData, model_from_dict
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chain_id TEXT NOT NULL,
+    block_height INTEGER NOT NULL,
+    endpoint TEXT NOT NULL,
+    backfill INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spool_chain_height ON spool (chain_id, endpoint, block_height);
+"""
+
+class WriteSpool:
+    """Append-only SQLite spool of blockchain data waiting to be written."""
+
+    def __init__(self, path: str, max_bytes: int, backpressure_timeout: float = 60.0):
+        """
+        Initialize the spool.
+
+        The SQLite file is only created on the first append, so processes
+        that never spool do not leave a file behind.
+
+        Args:
+            path: Path of the SQLite file
+            max_bytes: Spooled payload size at which appends start to block
+            backpressure_timeout: Seconds an append waits for space before
+                writing past the limit anyway
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backpressure_timeout = backpressure_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._pending = 0
+        self._bytes = 0
+
+        if os.path.exists(path):
+            with self._lock:
+                self._open()
+                self._pending, self._bytes = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM spool"
+                ).fetchone()
+            if self._pending:
+                logger.warning(f"Write spool {path} holds {self._pending} documents from a previous run")
+
+    def _open(self) -> None:
+        """Open the SQLite file and create the schema (lock held)."""
+        if self._conn is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @property
+    def pending(self) -> int:
+        """
+        Get the number of spooled documents.
+
+        Returns:
+            Documents waiting to be replayed
+        """
+        return self._pending
+
+    def append(self, items: List[BlockchainData], backfill: bool = False) -> None:
+        """
+        Append documents to the spool.
+
+        Blocks while the spool is over its size limit, up to the backpressure
+        timeout, so collectors slow down instead of filling the disk.
+
+        Args:
+            items: Data models to spool
+            backfill: Whether the documents were written with the backfill profile
+        """
+        rows = [
+            (item.chain_id, item.block_height, item.endpoint, int(backfill), json.dumps(item.to_dict()))
+            for item in items
+        ]
+        size = sum(len(row[4]) for row in rows)
+
+        with self._space:
+            if self._bytes >= self.max_bytes:
+                logger.warning(f"Write spool is full ({self._bytes} bytes), waiting for replay")
+                self._space.wait_for(lambda: self._bytes < self.max_bytes, self.backpressure_timeout)
+
+            self._open()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO spool (chain_id, block_height, endpoint, backfill, payload) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+            self._pending += len(rows)
+            self._bytes += size
+
+    def peek(self, limit: int) -> Tuple[List[int], List[BlockchainData], bool]:
+        """
+        Read the oldest spooled documents without removing them.
+
+        Args:
+            limit: Maximum number of documents
+
+        Returns:
+            Tuple of (row IDs, data models, whether all rows were backfill writes)
+        """
+        with self._lock:
+            if self._conn is None or not self._pending:
+                return [], [], False
+            rows = self._conn.execute(
+                "SELECT id, backfill, payload FROM spool ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+
+        ids = [row[0] for row in rows]
+        items = [model_from_dict(json.loads(row[2])) for row in rows]
+        backfill = bool(rows) and all(row[1] for row in rows)
+        return ids, items, backfill
+
+    def remove(self, ids: List[int]) -> None:
+        """
+        Remove replayed documents and wake up blocked appends.
+
+        Args:
+            ids: Row IDs returned by peek()
+        """
+        if not ids:
+            return
+        with self._space:
+            with self._conn:
+                size = self._conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM spool WHERE id BETWEEN ? AND ?",
+                    (ids[0], ids[-1])
+                ).fetchone()[0]
+                self._conn.execute("DELETE FROM spool WHERE id BETWEEN ? AND ?", (ids[0], ids[-1]))
+            self._pending -= len(ids)
+            self._bytes -= size
+            self._space.notify_all()
+
+    def max_height(self, chain_id: str, endpoint: str = "block") -> Optional[int]:
+        """
+        Get the highest spooled height for a chain and endpoint.
+
+        Args:
+            chain_id: Chain identifier
+            endpoint: Endpoint type
+
+        Returns:
+            Highest spooled block height, or None if nothing is spooled
+        """
+        with self._lock:
+            if self._conn is None or not self._pending:
+                return None
+            return self._conn.execute(
+                "SELECT MAX(block_height) FROM spool WHERE chain_id = ? AND endpoint = ?",
+                (chain_id, endpoint)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        """Close the SQLite file."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
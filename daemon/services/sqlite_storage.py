@@ -0,0 +1,468 @@
+"""
+Embedded SQLite storage backend for the CosmosData daemon.
+
+Stores raw documents and status samples in a single SQLite file, for edge
+deployments that cannot run mongod. The file uses write-ahead logging, so
+readers never block the writer. Each bulk store is one transaction, and
+writes from all collection threads share one connection behind a lock,
+while every thread reads through its own connection. Raw documents keep the
+fields they have in MongoDB, with the payload stored as JSON text, and
+(chain_id, endpoint, block_height) is unique and indexed for latest-height
+and range reads. Samples of chain-scoped endpoints go to chain_samples, one
+row per poll.
+
+Derived collections, retention and block events are MongoDB features and
+are not maintained here.
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+import statistics
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from daemon.config.config import get_config
+from daemon.models.blockchain_data import BlockchainData, Block, Status, model_from_dict, parse_block_time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blockchain_data (
+    id INTEGER PRIMARY KEY,
+    chain_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    block_height INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    block_time REAL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS blockchain_data_height
+    ON blockchain_data (chain_id, endpoint, block_height);
+CREATE TABLE IF NOT EXISTS chain_samples (
+    id INTEGER PRIMARY KEY,
+    chain_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    block_height INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chain_samples_time ON chain_samples (chain_id, endpoint, timestamp);
+CREATE TABLE IF NOT EXISTS chain_status (
+    id INTEGER PRIMARY KEY,
+    chain_id TEXT NOT NULL,
+    time REAL NOT NULL,
+    sample TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chain_status_time ON chain_status (chain_id, time);
+CREATE TABLE IF NOT EXISTS chain_node_info (
+    id INTEGER PRIMARY KEY,
+    chain_id TEXT NOT NULL,
+    time REAL NOT NULL,
+    hash TEXT NOT NULL,
+    node_info TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chain_node_info_time ON chain_node_info (chain_id, time);
+"""
+
+UPSERT_DATA = """
+INSERT INTO blockchain_data (chain_id, endpoint, block_height, timestamp, block_time, data)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (chain_id, endpoint, block_height) DO UPDATE SET
+    timestamp = excluded.timestamp,
+    block_time = excluded.block_time,
+    data = excluded.data
+"""
+
+# Milliseconds a connection waits for another process's write lock
+BUSY_TIMEOUT_MS = 30000
+
+def _dumps(value: Any) -> str:
+    """
+    Serialize a document to compact JSON text.
+
+    Args:
+        value: JSON-compatible value
+
+    Returns:
+        JSON text
+    """
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+class SQLiteStorage:
+    """Storage backend keeping the collected data in a local SQLite file."""
+
+    def __init__(self, path: str, synchronous: Optional[str] = None):
+        """
+        Open the SQLite file, creating it and its schema if needed.
+
+        Args:
+            path: Path of the SQLite file
+            synchronous: SQLite synchronous mode, "OFF", "NORMAL" or "FULL"
+                (falls back to config)
+        """
+        self.path = path
+        self.synchronous = (synchronous or get_config().sqlite_synchronous).upper()
+        if self.synchronous not in ("OFF", "NORMAL", "FULL"):
+            raise ValueError(f"Unknown SQLite synchronous mode '{self.synchronous}'")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+
+        # Last stored node_info hash per chain, to skip unchanged node info
+        self._node_info_hashes: Dict[str, Optional[str]] = {}
+        logger.info(f"Using SQLite storage: {path} (synchronous={self.synchronous})")
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a connection to the SQLite file.
+
+        Returns:
+            Connection in autocommit mode; transactions are opened explicitly
+        """
+        connection = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=BUSY_TIMEOUT_MS / 1000
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"PRAGMA synchronous={self.synchronous}")
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run the enclosed writes in one transaction on the write connection.
+
+        The connection is in autocommit mode, so the transaction is opened
+        explicitly; otherwise every statement would commit on its own.
+
+        Yields:
+            The write connection
+        """
+        with self._write_lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            self._writer.execute("COMMIT")
+
+    def _reader(self) -> sqlite3.Connection:
+        """
+        Get the calling thread's read connection.
+
+        Returns:
+            Connection used only for reads by this thread
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+            connection.execute("PRAGMA query_only=1")
+        return connection
+
+    def store_status(self, status: Status) -> bool:
+        """
+        Store a node status sample.
+
+        The static node_info is written only when it differs from the last
+        stored version for the chain.
+
+        Args:
+            status: Status model built from the node response
+
+        Returns:
+            True if storage was successful, False otherwise
+        """
+        chain_id = status.chain_id
+        try:
+            node_info_hash = status.node_info_hash
+            sample = status.to_sample()
+            sample["node_info_hash"] = node_info_hash
+            store_node_info = node_info_hash != self._get_node_info_hash(chain_id)
+
+            with self._transaction() as connection:
+                connection.execute(
+                    "INSERT INTO chain_status (chain_id, time, sample) VALUES (?, ?, ?)",
+                    (chain_id, status.timestamp, _dumps(sample))
+                )
+                if store_node_info:
+                    connection.execute(
+                        "INSERT INTO chain_node_info (chain_id, time, hash, node_info) VALUES (?, ?, ?, ?)",
+                        (chain_id, status.timestamp, node_info_hash, _dumps(status.node_info))
+                    )
+            if store_node_info:
+                self._node_info_hashes[chain_id] = node_info_hash
+                logger.info(f"Stored updated node info for {chain_id}")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Failed to store status data: {e}")
+            return False
+
+    def _get_node_info_hash(self, chain_id: str) -> Optional[str]:
+        """
+        Get the hash of the last stored node info for a chain.
+
+        Args:
+            chain_id: Chain identifier
+
+        Returns:
+            The stored hash, or None if no node info has been stored yet
+        """
+        if chain_id not in self._node_info_hashes:
+            row = self._reader().execute(
+                "SELECT hash FROM chain_node_info WHERE chain_id = ? ORDER BY time DESC LIMIT 1",
+                (chain_id,)
+            ).fetchone()
+            self._node_info_hashes[chain_id] = row[0] if row else None
+        return self._node_info_hashes[chain_id]
+
+    def store_blockchain_data(self,
+                              chain_id: str,
+                              block_height: int,
+                              endpoint: str,
+                              data: Dict[str, Any],
+                              timestamp: int) -> bool:
+        """
+        Store a single raw document.
+
+        Args:
+            chain_id: Chain identifier
+            block_height: Block height of the data
+            endpoint: Endpoint type (e.g., 'block', 'validators')
+            data: The data to store
+            timestamp: Unix timestamp when the data was retrieved
+
+        Returns:
+            True if the data was stored, False otherwise
+        """
+        item = model_from_dict({
+            "chain_id": chain_id,
+            "block_height": block_height,
+            "endpoint": endpoint,
+            "data": data,
+            "timestamp": timestamp
+        })
+        return self.store_blockchain_data_bulk([item])
+
+    def store_blockchain_data_bulk(self,
+                                   items: List[BlockchainData],
+                                   backfill: bool = False) -> bool:
+        """
+        Upsert several raw documents in one transaction.
+
+        Args:
+            items: Data models to store
+            backfill: Accepted for interface compatibility; SQLite writes
+                use the same durability either way
+
+        Returns:
+            True if the items were stored, False otherwise
+        """
+        if not items:
+            return True
+
+        # Serialize outside the lock so collection threads encode in parallel
+        rows = [
+            (
+                item.chain_id,
+                item.endpoint,
+                item.block_height,
+                item.timestamp,
+                parse_block_time(item.timestamp_utc) if isinstance(item, Block) else None,
+                _dumps(item.data)
+            )
+            for item in items
+        ]
+        try:
+            with self._transaction() as connection:
+                connection.executemany(UPSERT_DATA, rows)
+            logger.debug(f"Stored {len(rows)} documents in SQLite")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Failed to store blockchain data in SQLite: {e}")
+            return False
+
+    def store_chain_samples(self, items: List[BlockchainData]) -> bool:
+        """
+        Insert samples of chain-scoped endpoints, one row per poll.
+
+        Args:
+            items: Data models of the polled endpoints
+
+        Returns:
+            True if the samples were stored, False otherwise
+        """
+        if not items:
+            return True
+
+        rows = [
+            (item.chain_id, item.endpoint, item.block_height, item.timestamp, _dumps(item.data))
+            for item in items
+        ]
+        try:
+            with self._transaction() as connection:
+                connection.executemany(
+                    "INSERT INTO chain_samples (chain_id, endpoint, block_height, timestamp, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+            logger.debug(f"Stored {len(rows)} chain samples in SQLite")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Failed to store chain samples in SQLite: {e}")
+            return False
+
+    def get_latest_document(self, chain_id: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest stored document for a chain and endpoint.
+
+        Args:
+            chain_id: Chain identifier
+            endpoint: Endpoint type
+
+        Returns:
+            The newest chain sample of the endpoint, else the document at the
+            highest stored height, or None if nothing is stored
+        """
+        try:
+            row = self._reader().execute(
+                "SELECT chain_id, block_height, endpoint, data, timestamp FROM chain_samples "
+                "WHERE chain_id = ? AND endpoint = ? ORDER BY timestamp DESC, id DESC LIMIT 1",
+                (chain_id, endpoint)
+            ).fetchone()
+            if row is None:
+                row = self._reader().execute(
+                    "SELECT chain_id, block_height, endpoint, data, timestamp FROM blockchain_data "
+                    "WHERE chain_id = ? AND endpoint = ? ORDER BY block_height DESC LIMIT 1",
+                    (chain_id, endpoint)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve latest {endpoint} document: {e}")
+            return None
+        return self._document(row) if row else None
+
+    def get_latest_block_height(self, chain_id: str) -> Optional[int]:
+        """
+        Get the latest stored block height for a specific chain.
+
+        Args:
+            chain_id: Chain identifier
+
+        Returns:
+            Latest block height as an integer, or None if no data is found
+        """
+        try:
+            return self._reader().execute(
+                "SELECT MAX(block_height) FROM blockchain_data WHERE chain_id = ? AND endpoint = 'block'",
+                (chain_id,)
+            ).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve latest block height: {e}")
+            return None
+
+    def get_range(self, chain_id: str, endpoint: str, start_height: int, end_height: int) -> List[Dict[str, Any]]:
+        """
+        Get the stored documents of an endpoint in a height range.
+
+        Args:
+            chain_id: Chain identifier
+            endpoint: Endpoint type
+            start_height: First height (inclusive)
+            end_height: Last height (inclusive)
+
+        Returns:
+            Documents ordered by height
+        """
+        try:
+            rows = self._reader().execute(
+                "SELECT chain_id, block_height, endpoint, data, timestamp FROM blockchain_data "
+                "WHERE chain_id = ? AND endpoint = ? AND block_height BETWEEN ? AND ? ORDER BY block_height",
+                (chain_id, endpoint, start_height, end_height)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve {endpoint} documents {start_height}-{end_height}: {e}")
+            return []
+        return [self._document(row) for row in rows]
+
+    @staticmethod
+    def _document(row: tuple) -> Dict[str, Any]:
+        """
+        Build a raw document from a blockchain_data or chain_samples row.
+
+        Args:
+            row: (chain_id, block_height, endpoint, data, timestamp)
+
+        Returns:
+            Document with the same fields as in MongoDB
+        """
+        return {
+            "chain_id": row[0],
+            "block_height": row[1],
+            "endpoint": row[2],
+            "data": json.loads(row[3]),
+            "timestamp": row[4]
+        }
+
+    def recent_block_interval(self, chain_id: str, latest_height: int, samples: int) -> Optional[float]:
+        """
+        Estimate a chain's current block interval from its latest stored blocks.
+
+        Args:
+            chain_id: Chain identifier
+            latest_height: Height to look back from
+            samples: Number of blocks to look back over
+
+        Returns:
+            Median seconds between adjacent blocks, or None if too few are stored
+        """
+        try:
+            rows = self._reader().execute(
+                "SELECT block_height, block_time FROM blockchain_data "
+                "WHERE chain_id = ? AND endpoint = 'block' AND block_height BETWEEN ? AND ? "
+                "AND block_time IS NOT NULL ORDER BY block_height",
+                (chain_id, latest_height - samples, latest_height)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve block times: {e}")
+            return None
+
+        intervals = [
+            current[1] - previous[1]
+            for previous, current in zip(rows, rows[1:])
+            if current[0] == previous[0] + 1 and current[1] > previous[1]
+        ]
+        return statistics.median(intervals) if intervals else None
+
+    def replay_spool(self, batch_size: Optional[int] = None) -> int:
+        """
+        Nothing to replay: writes go to local disk and are never spooled.
+
+        Args:
+            batch_size: Unused
+
+        Returns:
+            Always 0
+        """
+        return 0
+
+    def close(self) -> None:
+        """Close all connections to the SQLite file."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        logger.info("SQLite storage closed")
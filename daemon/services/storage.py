@@ -0,0 +1,131 @@
+"""
+Storage backends for the CosmosData daemon.
+
+Collection only needs a few operations from its store: status samples, single
+and bulk writes of raw documents, samples of chain-scoped endpoints, the
+latest stored height and document, and height range reads. StorageBackend
+names them, so the collection loop, the pipeline and the endpoint poller work
+with any store. STORAGE_BACKEND selects the implementation:
+
+- "mongodb" (default): MongoDBService, with derived collections, the write
+  spool, retention and the API
+- "sqlite": SQLiteStorage, a single embedded file for small edge deployments
+  that cannot run mongod
+
+Maintenance tasks, migrations and most utilities work on MongoDB directly
+and are only available with the mongodb backend.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Protocol
+
+from daemon.config.config import get_config
+from daemon.models.blockchain_data import BlockchainData, Status
+
+STORAGE_BACKENDS = ("mongodb", "sqlite")
+
+class StorageBackend(Protocol):
+    """Operations the collection loop needs from a store."""
+
+    def store_status(self, status: Status) -> bool:
+        """Store a node status sample; returns True on success."""
+        ...
+
+    def store_blockchain_data(self,
+                              chain_id: str,
+                              block_height: int,
+                              endpoint: str,
+                              data: Dict[str, Any],
+                              timestamp: int) -> bool:
+        """Store a single raw document; returns True on success."""
+        ...
+
+    def store_blockchain_data_bulk(self, items: List[BlockchainData], backfill: bool = False) -> bool:
+        """Store several raw documents in one batch; returns True on success."""
+        ...
+
+    def store_chain_samples(self, items: List[BlockchainData]) -> bool:
+        """Store polled chain-scoped samples, one document per poll; returns True on success."""
+        ...
+
+    def get_latest_document(self, chain_id: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        """Get the newest document of an endpoint (highest height, or latest chain sample)."""
+        ...
+
+    def get_latest_block_height(self, chain_id: str) -> Optional[int]:
+        """Get the highest stored block height of a chain."""
+        ...
+
+    def get_range(self, chain_id: str, endpoint: str, start_height: int, end_height: int) -> List[Dict[str, Any]]:
+        """Get the documents of an endpoint between two heights (inclusive), by height."""
+        ...
+
+    def recent_block_interval(self, chain_id: str, latest_height: int, samples: int) -> Optional[float]:
+        """Estimate the median seconds between the blocks up to a height."""
+        ...
+
+    def replay_spool(self, batch_size: Optional[int] = None) -> int:
+        """Write spooled documents to the store; returns how many were written."""
+        ...
+
+    def close(self) -> None:
+        """Release the store's connections."""
+        ...
+
+def create_storage(backend: Optional[str] = None) -> StorageBackend:
+    """
+    Create a storage backend.
+
+    The mongodb backend is the MongoDB service singleton, so utilities that
+    use get_mongo_service() share its connection.
+
+    Args:
+        backend: Backend name, one of STORAGE_BACKENDS (falls back to config)
+
+    Returns:
+        The storage backend
+
+    Raises:
+        ValueError: If the backend is not defined
+    """
+    config = get_config()
+    backend = backend or config.storage_backend
+    if backend == "mongodb":
+        from daemon.services.mongo_service import get_mongo_service
+        return get_mongo_service()
+    if backend == "sqlite":
+        from daemon.services.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(config.sqlite_path)
+    raise ValueError(
+        f"Unknown storage backend '{backend}', expected one of: {', '.join(STORAGE_BACKENDS)}"
+    )
+
+# Singleton instance, created on first use
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+def get_storage() -> StorageBackend:
+    """
+    Get the configured storage backend singleton, creating it on first use.
+
+    Returns:
+        The storage backend
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+def close_storage() -> None:
+    """Close the storage backend singleton if it was created."""
+    global _storage
+    with _storage_lock:
+        if _storage is not None:
+            if get_config().storage_backend == "mongodb":
+                # Also clears the MongoDB service singleton
+                from daemon.services.mongo_service import close_mongo_service
+                close_mongo_service()
+            else:
+                _storage.close()
+            _storage = None
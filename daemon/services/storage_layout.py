@@ -0,0 +1,60 @@
+"""
+Collection layouts for raw blockchain data.
+
+By default every chain and endpoint shares the blockchain_data collection.
+STORAGE_LAYOUT can split the raw data into one collection per chain
+("blockchain_data.<chain_id>") or per chain and endpoint
+("blockchain_data.<chain_id>.<endpoint>"). Each partition then has its own,
+smaller indexes, so a chain with heavy write load does not push the index
+pages of other chains out of the cache. Documents keep the same fields in
+every layout, and the derived collections (chain_latest, block_headers, ...)
+stay shared.
+"""
+from typing import Dict, Iterable, List
+
+# Collection of the shared layout, and prefix of the partitioned layouts
+DATA_COLLECTION = "blockchain_data"
+
+STORAGE_LAYOUTS = ("shared", "chain", "chain_endpoint")
+
+def data_collection_name(chain_id: str, endpoint: str, layout: str) -> str:
+    """
+    Get the collection holding a chain's raw documents of an endpoint.
+
+    Args:
+        chain_id: Chain identifier
+        endpoint: Endpoint type
+        layout: Storage layout, one of STORAGE_LAYOUTS
+
+    Returns:
+        Collection name
+
+    Raises:
+        ValueError: If the layout is not defined
+    """
+    if layout == "shared":
+        return DATA_COLLECTION
+    if layout == "chain":
+        return f"{DATA_COLLECTION}.{chain_id}"
+    if layout == "chain_endpoint":
+        return f"{DATA_COLLECTION}.{chain_id}.{endpoint}"
+    raise ValueError(
+        f"Unknown storage layout '{layout}', expected one of: {', '.join(STORAGE_LAYOUTS)}"
+    )
+
+def group_endpoints(chain_id: str, endpoints: Iterable[str], layout: str) -> Dict[str, List[str]]:
+    """
+    Group a chain's endpoints by the collection holding them.
+
+    Args:
+        chain_id: Chain identifier
+        endpoints: Endpoint types
+        layout: Storage layout, one of STORAGE_LAYOUTS
+
+    Returns:
+        Dictionary mapping collection names to their endpoints
+    """
+    groups: Dict[str, List[str]] = {}
+    for endpoint in endpoints:
+        groups.setdefault(data_collection_name(chain_id, endpoint, layout), []).append(endpoint)
+    return groups
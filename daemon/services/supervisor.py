@@ -0,0 +1,227 @@
+"""
+Worker process supervision for the CosmosData daemon.
+
+In multi-process mode (CHAIN_PROCESSES > 0) the chains are split into groups,
+and each group is collected by its own worker process. The supervisor assigns
+the chains round-robin in chain ID order, so groups differ by at most one
+chain, and passes each worker its list of chain IDs. Each worker has its own
+clients, MongoDB connection and write spool, and runs the collection loop
+without sharing a GIL with the other groups. The supervisor starts the
+workers, restarts any that exit, and forwards signals to them. A worker that
+keeps crashing right after start is restarted with a growing delay.
+"""
+import os
+import time
+import signal
+import logging
+import multiprocessing
+from multiprocessing.process import BaseProcess
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from daemon.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+def assign_chains(chain_ids: Iterable[str], groups: int) -> List[List[str]]:
+    """
+    Split chains into worker groups of near-equal size.
+
+    Args:
+        chain_ids: Chain identifiers
+        groups: Number of worker groups
+
+    Returns:
+        Chain IDs of each group, by group index
+    """
+    assignment: List[List[str]] = [[] for _ in range(groups)]
+    for position, chain_id in enumerate(sorted(chain_ids)):
+        assignment[position % groups].append(chain_id)
+    return assignment
+
+def worker_environment(index: int, groups: int, config: Config) -> Dict[str, str]:
+    """
+    Get the environment settings of a chain group worker.
+
+    The worker gets its share of the configured chains, budgets meant for
+    the whole daemon are divided between the workers, and each worker
+    spools to its own file.
+
+    Args:
+        index: Group index of the worker
+        groups: Number of worker groups
+        config: Configuration of the supervising process
+
+    Returns:
+        Environment variables to set in the worker before it loads its config
+    """
+    environment = {
+        "CHAIN_IDS": ",".join(assign_chains(config.chains, groups)[index]),
+        "FETCH_BUDGET": str(max(1, config.fetch_budget // groups)),
+        "PAYLOAD_BUDGET_BYTES": str(config.payload_budget_bytes // groups),
+    }
+    if config.spool_path:
+        root, extension = os.path.splitext(config.spool_path)
+        environment["SPOOL_PATH"] = f"{root}-{index}{extension}"
+    return environment
+
+class WorkerSupervisor:
+    """Runs worker processes and restarts them when they exit."""
+
+    def __init__(self,
+                 target: Callable[..., None],
+                 count: int,
+                 worker_args: Callable[[int], Tuple],
+                 name: str = "chains",
+                 min_uptime: float = 60.0,
+                 max_backoff: float = 300.0):
+        """
+        Initialize the supervisor.
+
+        Args:
+            target: Worker entry point; must be importable by spawned processes
+            count: Number of worker processes
+            worker_args: Returns the target's arguments for a worker index
+            name: Process name prefix
+            min_uptime: Workers exiting sooner than this are restarted with a delay
+            max_backoff: Longest delay before restarting a crashing worker
+        """
+        self.target = target
+        self.count = count
+        self.worker_args = worker_args
+        self.name = name
+        self.min_uptime = min_uptime
+        self.max_backoff = max_backoff
+        self.restarts = 0
+
+        # Workers are spawned, not forked, so none inherits the parent's
+        # MongoDB client, threads or locks
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[Optional[BaseProcess]] = [None] * count
+        self._started = [0.0] * count
+        self._backoff = [0.0] * count
+        self._restart_at = [0.0] * count
+
+    def _spawn(self, index: int) -> None:
+        """
+        Start the worker process of a group.
+
+        Args:
+            index: Group index
+        """
+        process = self._context.Process(
+            target=self.target,
+            args=self.worker_args(index),
+            name=f"{self.name}-{index}"
+        )
+        process.start()
+        self._workers[index] = process
+        self._started[index] = time.monotonic()
+        logger.info(f"Started worker {process.name} (pid {process.pid})")
+
+    def _stop_process(self, index: int, timeout: float) -> None:
+        """
+        Wait for a worker that was asked to stop, killing it after the timeout.
+
+        Args:
+            index: Group index
+            timeout: Seconds to wait
+        """
+        process = self._workers[index]
+        if process is None:
+            return
+        process.join(max(0.0, timeout))
+        if process.is_alive():
+            logger.warning(f"Worker {process.name} did not stop in time, killing it")
+            process.kill()
+            process.join()
+        process.close()
+        self._workers[index] = None
+
+    def start(self) -> None:
+        """Start all worker processes."""
+        for index in range(self.count):
+            self._spawn(index)
+
+    def check(self) -> int:
+        """
+        Restart workers that have exited and whose restart delay has passed.
+
+        Returns:
+            Number of workers restarted
+        """
+        now = time.monotonic()
+        restarted = 0
+        for index, process in enumerate(self._workers):
+            if process is not None:
+                if process.is_alive():
+                    continue
+                uptime = now - self._started[index]
+                process.join()
+                if uptime < self.min_uptime:
+                    self._backoff[index] = min(max(self._backoff[index] * 2, 1.0), self.max_backoff)
+                else:
+                    self._backoff[index] = 0.0
+                self._restart_at[index] = now + self._backoff[index]
+                logger.error(
+                    f"Worker {process.name} exited with code {process.exitcode} after {uptime:.0f}s, "
+                    f"restarting in {self._backoff[index]:.0f}s"
+                )
+                process.close()
+                self._workers[index] = None
+
+            if now >= self._restart_at[index]:
+                self._spawn(index)
+                self.restarts += 1
+                restarted += 1
+        return restarted
+
+    def restart(self, index: int, timeout: float = 60.0) -> None:
+        """
+        Stop a worker and start it again right away, with fresh arguments.
+
+        Args:
+            index: Group index
+            timeout: Seconds to wait for the worker to stop
+        """
+        process = self._workers[index]
+        if process is not None and process.is_alive():
+            try:
+                os.kill(process.pid, signal.SIGTERM)
+            except OSError as e:
+                logger.warning(f"Failed to signal worker {process.name}: {e}")
+        self._stop_process(index, timeout)
+        self._backoff[index] = 0.0
+        self._spawn(index)
+
+    def signal_all(self, signum: int, skip: Iterable[int] = ()) -> None:
+        """
+        Send a signal to every running worker.
+
+        Args:
+            signum: Signal number
+            skip: Worker indexes not to signal, e.g. ones just restarted that
+                may not have installed their signal handlers yet
+        """
+        skip = set(skip)
+        for index, process in enumerate(self._workers):
+            if index in skip:
+                continue
+            if process is not None and process.is_alive():
+                try:
+                    os.kill(process.pid, signum)
+                except OSError as e:
+                    logger.warning(f"Failed to signal worker {process.name}: {e}")
+
+    def stop(self, timeout: float = 60.0) -> None:
+        """
+        Ask all workers to shut down and wait for them.
+
+        Workers still running after the timeout are killed.
+
+        Args:
+            timeout: Seconds to wait for all workers together
+        """
+        self.signal_all(signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        for index in range(self.count):
+            self._stop_process(index, deadline - time.monotonic())
@@ -0,0 +1,301 @@
+"""
+Utility script to audit the integrity of a chain's stored blocks.
+
+Checks that the stored blocks form one consistent chain: every block's
+last_block_hash must equal the hash of the block before it, and no heights
+may be missing. Only the extracted header fields in block_headers are read,
+through the covered index on (chain_id, block_height, hash, last_block_hash),
+so MongoDB answers from the index without loading documents. The height range
+is split into shards that worker processes check in parallel; links across
+shard boundaries are checked when the results are merged.
+
+Run it from the repository root, e.g. nightly from cron:
+
+    python -m daemon.utils.audit_chain --chain symphony-testnet-4
+    python -m daemon.utils.audit_chain --chain symphony-testnet-4 --from-height 1 --report audit.json
+
+Exits with status 1 when gaps or hash mismatches are found.
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+import concurrent.futures
+from typing import Dict, Any, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+
+from daemon.config.config import get_config
+from daemon.services.mongo_service import init_mongo_service, get_mongo_service, close_mongo_service
+
+logger = logging.getLogger(__name__)
+
+# Index that covers the audit query
+AUDIT_INDEX = [("chain_id", ASCENDING), ("block_height", ASCENDING), ("hash", ASCENDING), ("last_block_hash", ASCENDING)]
+
+# Maximum gaps and mismatches listed per shard; all are still counted
+MAX_LISTED = 1000
+
+def _init_process() -> None:
+    """Configure logging and MongoDB for the script and its worker processes."""
+    logging.basicConfig(
+        level=getattr(logging, get_config().log_level),
+        format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
+    # Never share the daemon's write spool file; failed writes fail the shard
+    init_mongo_service(spool_path="")
+
+class AuditResult:
+    """Findings of an audit over a height range."""
+
+    def __init__(self):
+        """Initialize an empty result."""
+        self.checked = 0
+        self.gap_count = 0
+        self.missing_heights = 0
+        self.mismatch_count = 0
+        self.missing_hashes = 0
+        self.gaps: List[Tuple[int, int]] = []
+        self.mismatches: List[Dict[str, Any]] = []
+        self.first: Optional[Dict[str, Any]] = None
+        self.last: Optional[Dict[str, Any]] = None
+
+    def check_link(self, previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+        """
+        Check one block against the stored block before it.
+
+        Args:
+            previous: Header fields of the previous stored block
+            current: Header fields of the current block
+        """
+        expected = previous["block_height"] + 1
+        if current["block_height"] != expected:
+            self.gap_count += 1
+            self.missing_heights += current["block_height"] - expected
+            if len(self.gaps) < MAX_LISTED:
+                self.gaps.append((expected, current["block_height"] - 1))
+            return
+
+        if not previous.get("hash") or not current.get("last_block_hash"):
+            self.missing_hashes += 1
+        elif current["last_block_hash"] != previous["hash"]:
+            self.mismatch_count += 1
+            if len(self.mismatches) < MAX_LISTED:
+                self.mismatches.append({
+                    "block_height": current["block_height"],
+                    "last_block_hash": current["last_block_hash"],
+                    "previous_hash": previous["hash"]
+                })
+
+    def merge(self, other: "AuditResult") -> None:
+        """
+        Append the result of the following height range.
+
+        Args:
+            other: Result of a range starting after this one's last height
+        """
+        if self.last and other.first:
+            self.check_link(self.last, other.first)
+        self.checked += other.checked
+        self.gap_count += other.gap_count
+        self.missing_heights += other.missing_heights
+        self.mismatch_count += other.mismatch_count
+        self.missing_hashes += other.missing_hashes
+        self.gaps.extend(other.gaps[:MAX_LISTED - len(self.gaps)])
+        self.mismatches.extend(other.mismatches[:MAX_LISTED - len(self.mismatches)])
+        self.first = self.first or other.first
+        self.last = other.last or self.last
+
+    @property
+    def ok(self) -> bool:
+        """
+        Check whether no problems were found.
+
+        Returns:
+            True if there are no gaps or hash mismatches
+        """
+        return not (self.gap_count or self.mismatch_count)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert to a JSON-serializable report.
+
+        Returns:
+            Dictionary of counts and listed findings
+        """
+        return {
+            "checked": self.checked,
+            "first_height": self.first["block_height"] if self.first else None,
+            "last_height": self.last["block_height"] if self.last else None,
+            "gap_count": self.gap_count,
+            "missing_heights": self.missing_heights,
+            "mismatch_count": self.mismatch_count,
+            "missing_hashes": self.missing_hashes,
+            "gaps": [{"from": start, "to": end} for start, end in self.gaps],
+            "mismatches": self.mismatches
+        }
+
+def audit_shard(chain_id: str, start_height: int, end_height: int) -> AuditResult:
+    """
+    Audit the stored headers of one height range.
+
+    Runs in a worker process, which opens its own MongoDB connection.
+
+    Args:
+        chain_id: Chain identifier
+        start_height: First height of the shard (inclusive)
+        end_height: Last height of the shard (inclusive)
+
+    Returns:
+        Findings for the shard
+    """
+    cursor = get_mongo_service().db.block_headers.find(
+        {"chain_id": chain_id, "block_height": {"$gte": start_height, "$lte": end_height}},
+        {"_id": 0, "block_height": 1, "hash": 1, "last_block_hash": 1},
+        batch_size=10000
+    ).sort("block_height", ASCENDING).hint(AUDIT_INDEX)
+
+    result = AuditResult()
+    previous = None
+    for row in cursor:
+        if previous is not None:
+            result.check_link(previous, row)
+        else:
+            result.first = row
+        previous = row
+        result.checked += 1
+    result.last = previous
+    return result
+
+def _height_range(chain_id: str) -> Optional[Tuple[int, int]]:
+    """
+    Get the lowest and highest stored header heights of a chain.
+
+    Args:
+        chain_id: Chain identifier
+
+    Returns:
+        Tuple of (lowest, highest) height, or None if nothing is stored
+    """
+    collection = get_mongo_service().db.block_headers
+    first = collection.find_one({"chain_id": chain_id}, {"block_height": 1}, sort=[("block_height", ASCENDING)])
+    last = collection.find_one({"chain_id": chain_id}, {"block_height": 1}, sort=[("block_height", DESCENDING)])
+    if not first:
+        return None
+    return first["block_height"], last["block_height"]
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Audit a chain's stored range.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Process exit code
+    """
+    stored_range = _height_range(args.chain)
+    if stored_range is None:
+        logger.info(f"No stored headers for {args.chain}")
+        return 0
+
+    start = args.from_height if args.from_height is not None else stored_range[0]
+    end = args.to_height if args.to_height is not None else stored_range[1]
+    shards = [
+        (shard_start, min(shard_start + args.shard_size - 1, end))
+        for shard_start in range(start, end + 1, args.shard_size)
+    ]
+    logger.info(f"Auditing {args.chain} heights {start}-{end} ({len(shards)} shards, {args.workers} workers)")
+
+    started = time.monotonic()
+    results: List[Optional[AuditResult]] = [None] * len(shards)
+
+    # Worker processes are spawned, not forked, so none inherits the
+    # parent's MongoDB client
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=context,
+        initializer=_init_process
+    ) as executor:
+        futures = {
+            executor.submit(audit_shard, args.chain, shard[0], shard[1]): index
+            for index, shard in enumerate(shards)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result()
+
+    # Merge in height order so links across shard boundaries are checked too
+    total = AuditResult()
+    for result in results:
+        total.merge(result)
+
+    # Missing heights at the ends of an explicitly requested range
+    if total.first is None:
+        total.gap_count, total.missing_heights = 1, end - start + 1
+        total.gaps.append((start, end))
+    else:
+        if total.first["block_height"] > start:
+            total.gap_count += 1
+            total.missing_heights += total.first["block_height"] - start
+            total.gaps.insert(0, (start, total.first["block_height"] - 1))
+        if total.last["block_height"] < end:
+            total.gap_count += 1
+            total.missing_heights += end - total.last["block_height"]
+            total.gaps.append((total.last["block_height"] + 1, end))
+
+    elapsed = time.monotonic() - started
+    report = total.to_dict()
+    report.update({"chain_id": args.chain, "from_height": start, "to_height": end, "seconds": round(elapsed, 1)})
+
+    logger.info(
+        f"Checked {total.checked} blocks in {elapsed:.1f}s ({total.checked / max(elapsed, 1e-9):.0f} blocks/s): "
+        f"{total.gap_count} gaps ({total.missing_heights} missing heights), "
+        f"{total.mismatch_count} hash mismatches, {total.missing_hashes} links without hashes"
+    )
+    for gap_start, gap_end in total.gaps[:20]:
+        logger.warning(f"Gap: heights {gap_start}-{gap_end} are not stored")
+    for mismatch in total.mismatches[:20]:
+        logger.warning(
+            f"Mismatch at {mismatch['block_height']}: last_block_hash {mismatch['last_block_hash']} "
+            f"!= previous hash {mismatch['previous_hash']}"
+        )
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Wrote audit report to {args.report}")
+
+    return 0 if total.ok else 1
+
+def main() -> int:
+    """
+    Parse arguments and audit.
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Audit the hash chain of stored blocks")
+    parser.add_argument("--chain", required=True, help="Chain ID to audit")
+    parser.add_argument("--from-height", type=int, help="First height (default: lowest stored)")
+    parser.add_argument("--to-height", type=int, help="Last height (default: highest stored)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--shard-size", type=int, default=1000000, help="Heights per shard")
+    parser.add_argument("--report", help="Write the full findings to this JSON file")
+    args = parser.parse_args()
+
+    _init_process()
+    try:
+        return run(args)
+    except Exception as e:
+        logger.error(f"Audit failed: {e}")
+        return 2
+    finally:
+        close_mongo_service()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+Utility script to benchmark blockchain_data index sets against its query shapes.
+
+Seeds a scratch database with synthetic documents, then for each index set
+builds the indexes and runs every query shape the daemon and the API issue
+against blockchain_data. For each shape it reports the winning plan from
+explain() (the index used, and whether MongoDB had to sort in memory), the
+keys and documents examined, and the median time over several runs. The
+scratch database is dropped afterwards. Run it from the repository root:
+
+    python -m daemon.utils.bench_indexes --heights 50000
+    python -m daemon.utils.bench_indexes legacy current --repeat 50
+
+Index sets:
+    legacy   the indexes before schema version 9
+    current  the indexes declared in daemon/services/indexes.py
+    partial  current, with the latest-by-height index replaced by one partial
+             index per endpoint
+"""
+import os
+import time
+import argparse
+import statistics
+from typing import Any, Callable, Dict, List, Tuple
+
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.collection import Collection
+from pymongo.cursor import Cursor
+
+from daemon.config.config import get_config
+from daemon.services.indexes import INDEXES, DATA_HEIGHT_INDEX
+from daemon.services.mongo_service import MongoDBService
+
+# Seconds between synthetic blocks
+BLOCK_INTERVAL = 6
+
+# Documents per insert_many while seeding
+SEED_BATCH = 5000
+
+def legacy_indexes(endpoints: List[str]) -> List[IndexModel]:
+    """
+    Get the blockchain_data indexes created before schema version 9.
+
+    Args:
+        endpoints: Seeded endpoints (unused)
+
+    Returns:
+        Index models
+    """
+    return [
+        IndexModel([("chain_id", ASCENDING), ("block_height", ASCENDING), ("endpoint", ASCENDING)], unique=True),
+        IndexModel([("timestamp", ASCENDING)]),
+        IndexModel([("chain_id", ASCENDING), ("endpoint", ASCENDING)]),
+        IndexModel([("chain_id", ASCENDING), ("endpoint", ASCENDING), ("timestamp", ASCENDING)]),
+    ]
+
+def current_indexes(endpoints: List[str]) -> List[IndexModel]:
+    """
+    Get the declared blockchain_data indexes.
+
+    Args:
+        endpoints: Seeded endpoints (unused)
+
+    Returns:
+        Index models
+    """
+    return list(INDEXES["blockchain_data"])
+
+def partial_indexes(endpoints: List[str]) -> List[IndexModel]:
+    """
+    Get the declared indexes with per-endpoint partial height indexes.
+
+    Args:
+        endpoints: Seeded endpoints, one partial index is built for each
+
+    Returns:
+        Index models
+    """
+    height_index = IndexModel(DATA_HEIGHT_INDEX).document["name"]
+    models = [model for model in INDEXES["blockchain_data"] if model.document["name"] != height_index]
+    for endpoint in endpoints:
+        models.append(IndexModel(
+            [("chain_id", ASCENDING), ("block_height", DESCENDING)],
+            name=f"{endpoint}_by_height",
+            partialFilterExpression={"endpoint": endpoint}
+        ))
+    return models
+
+INDEX_SETS: Dict[str, Callable[[List[str]], List[IndexModel]]] = {
+    "legacy": legacy_indexes,
+    "current": current_indexes,
+    "partial": partial_indexes,
+}
+
+def query_shapes(args: argparse.Namespace) -> List[Tuple[str, Callable[[Collection], Cursor]]]:
+    """
+    Get the blockchain_data query shapes issued by the daemon and the API.
+
+    Args:
+        args: Parsed command line arguments describing the seeded data
+
+    Returns:
+        List of (name, function returning the cursor for the query)
+    """
+    chain_id = "bench-0"
+    endpoint = args.endpoints[-1]
+    middle = args.heights // 2
+    start_time = args.start_time
+    mid_time = start_time + middle * BLOCK_INTERVAL
+
+    return [
+        # API latest-document fallback and the daemon's stored block height
+        ("latest by height", lambda c: c.find(
+            {"chain_id": chain_id, "endpoint": endpoint}
+        ).sort("block_height", DESCENDING).limit(1)),
+        # Single document of one height
+        ("height lookup", lambda c: c.find(
+            {"chain_id": chain_id, "block_height": middle, "endpoint": endpoint}
+        ).limit(1)),
+        # Reprocessing shards
+        ("height range", lambda c: c.find(
+            {"chain_id": chain_id, "endpoint": {"$in": [endpoint]},
+             "block_height": {"$gte": middle, "$lt": middle + 1000}}
+        )),
+        # First stored height of a reprocessing run
+        ("lowest height", lambda c: c.find(
+            {"chain_id": chain_id, "endpoint": {"$in": list(args.endpoints)}}
+        ).sort("block_height", ASCENDING).limit(1)),
+        # Time range of an endpoint
+        ("time range", lambda c: c.find(
+            {"chain_id": chain_id, "endpoint": endpoint,
+             "timestamp": {"$gte": mid_time, "$lt": mid_time + 1000 * BLOCK_INTERVAL}}
+        ).sort("timestamp", ASCENDING)),
+        # Retention batch
+        ("retention batch", lambda c: c.find(
+            {"chain_id": chain_id, "endpoint": endpoint, "timestamp": {"$lt": mid_time}},
+            {"_id": 1}
+        ).sort([("timestamp", ASCENDING), ("block_height", ASCENDING)]).limit(1000)),
+    ]
+
+def seed(collection: Collection, args: argparse.Namespace) -> int:
+    """
+    Insert synthetic documents for every chain, height and endpoint.
+
+    Args:
+        collection: Scratch blockchain_data collection
+        args: Parsed command line arguments
+
+    Returns:
+        Number of inserted documents
+    """
+    payload = os.urandom(args.payload_bytes // 2).hex()
+    batch: List[Dict[str, Any]] = []
+    inserted = 0
+    for chain in range(args.chains):
+        for height in range(1, args.heights + 1):
+            for endpoint in args.endpoints:
+                batch.append({
+                    "chain_id": f"bench-{chain}",
+                    "block_height": height,
+                    "endpoint": endpoint,
+                    "data": {"payload": payload},
+                    "timestamp": args.start_time + height * BLOCK_INTERVAL
+                })
+                if len(batch) >= SEED_BATCH:
+                    collection.insert_many(batch, ordered=False)
+                    inserted += len(batch)
+                    batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+def summarize_plan(plan: Dict[str, Any]) -> Tuple[List[str], bool]:
+    """
+    Walk a winning plan for the indexes it scans and in-memory sorts.
+
+    Args:
+        plan: winningPlan section of an explain() result
+
+    Returns:
+        Tuple of (index names or 'COLLSCAN', whether a blocking sort is used)
+    """
+    indexes: List[str] = []
+    sorts = False
+    stack = [plan]
+    while stack:
+        stage = stack.pop()
+        name = stage.get("stage", "")
+        if name in ("IXSCAN", "COUNT_SCAN", "DISTINCT_SCAN"):
+            indexes.append(stage.get("indexName", "?"))
+        elif name == "COLLSCAN":
+            indexes.append("COLLSCAN")
+        elif name == "SORT":
+            sorts = True
+        for key in ("inputStage", "queryPlan"):
+            if isinstance(stage.get(key), dict):
+                stack.append(stage[key])
+        stack.extend(stage.get("inputStages", []))
+    return indexes, sorts
+
+def run_shape(collection: Collection,
+              build: Callable[[Collection], Cursor],
+              repeat: int) -> Dict[str, Any]:
+    """
+    Explain and time a single query shape.
+
+    Args:
+        collection: Scratch blockchain_data collection
+        build: Function returning the cursor for the query
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary with the plan summary, examined counts and median time
+    """
+    explain = build(collection).explain()
+    indexes, sorts = summarize_plan(explain["queryPlanner"]["winningPlan"])
+    stats = explain.get("executionStats", {})
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(build(collection))
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "indexes": ",".join(indexes) or "?",
+        "sort": sorts,
+        "returned": stats.get("nReturned", 0),
+        "keys": stats.get("totalKeysExamined", 0),
+        "docs": stats.get("totalDocsExamined", 0),
+        "ms": statistics.median(timings) * 1000
+    }
+
+def run_index_set(collection: Collection, index_set: str, args: argparse.Namespace) -> None:
+    """
+    Build an index set and print the results of every query shape.
+
+    Args:
+        collection: Seeded scratch blockchain_data collection
+        index_set: Name of the index set
+        args: Parsed command line arguments
+    """
+    collection.drop_indexes()
+    start = time.perf_counter()
+    collection.create_indexes(INDEX_SETS[index_set](args.endpoints))
+    build_seconds = time.perf_counter() - start
+
+    sizes = collection.database.command("collStats", collection.name).get("indexSizes", {})
+    total_mb = sum(size for name, size in sizes.items() if name != "_id_") / 1e6
+    print(f"\n{index_set}: {len(sizes) - 1} indexes, {total_mb:.1f} MB, built in {build_seconds:.1f}s")
+    print(f"{'query':<18} {'ms':>9} {'keys':>9} {'docs':>9} {'returned':>9}  {'sort':<5} index")
+    for name, build in query_shapes(args):
+        result = run_shape(collection, build, args.repeat)
+        print(
+            f"{name:<18} {result['ms']:>9.2f} {result['keys']:>9} {result['docs']:>9} "
+            f"{result['returned']:>9}  {'yes' if result['sort'] else 'no':<5} {result['indexes']}"
+        )
+
+def main() -> None:
+    """Seed the scratch database and benchmark each index set."""
+    parser = argparse.ArgumentParser(description="Benchmark blockchain_data index sets")
+    parser.add_argument("index_sets", nargs="*", default=list(INDEX_SETS), choices=list(INDEX_SETS),
+                        help="Index sets to benchmark")
+    parser.add_argument("--chains", type=int, default=2, help="Synthetic chains")
+    parser.add_argument("--heights", type=int, default=20000, help="Heights per chain")
+    parser.add_argument("--endpoints", nargs="+", default=["block", "validators", "status"],
+                        help="Endpoints stored per height")
+    parser.add_argument("--payload-bytes", type=int, default=512, help="Approximate data size per document")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--db-name", default="cosmosdata_bench_indexes", help="Scratch database name")
+    args = parser.parse_args()
+    args.start_time = int(time.time()) - args.heights * BLOCK_INTERVAL
+
+    print(f"MongoDB: {get_config().mongodb_uri}, database: {args.db_name}")
+    service = MongoDBService(db_name=args.db_name, spool_path="")
+    try:
+        collection = service.db.blockchain_data
+        collection.drop()
+        start = time.perf_counter()
+        count = seed(collection, args)
+        print(f"Seeded {count} documents in {time.perf_counter() - start:.1f}s "
+              f"({args.chains} chains x {args.heights} heights x {len(args.endpoints)} endpoints)")
+
+        for index_set in args.index_sets:
+            run_index_set(collection, index_set, args)
+    finally:
+        service.client.drop_database(args.db_name)
+        service.close()
+
+if __name__ == "__main__":
+    main()
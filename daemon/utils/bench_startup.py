@@ -0,0 +1,68 @@
+"""
+Utility script to measure daemon and tool startup time.
+
+Each target is imported in a fresh interpreter so that module-level work
+(configuration loading, database connections, index creation) is included in
+the measurement. Run it from the repository root:
+
+    python -m daemon.utils.bench_startup --runs 5
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from typing import List
+
+# Modules whose import cost matters: the daemon itself, the services that
+# utility scripts and worker processes pull in, and the utility scripts
+DEFAULT_TARGETS = [
+    "daemon.main",
+    "daemon.services.client_factory",
+    "daemon.services.mongo_service",
+    "daemon.services.retention_service",
+    "daemon.utils.init_db",
+    "daemon.utils.init_symphony_db",
+]
+
+def time_import(module: str, timeout: float) -> float:
+    """
+    Time the import of a module in a fresh interpreter.
+
+    Args:
+        module: Dotted module name to import
+        timeout: Seconds after which the import is abandoned
+
+    Returns:
+        Wall-clock seconds taken, or the timeout if the import hung
+    """
+    start = time.perf_counter()
+    try:
+        subprocess.run(
+            [sys.executable, "-c", f"import {module}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+            check=False
+        )
+    except subprocess.TimeoutExpired:
+        return timeout
+    return time.perf_counter() - start
+
+def main(argv: List[str] = None) -> None:
+    """Run the startup benchmark and print a summary table."""
+    parser = argparse.ArgumentParser(description="Measure import/startup time of daemon modules")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_TARGETS, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per module")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-run timeout in seconds")
+    args = parser.parse_args(argv)
+
+    print(f"MONGODB_URI={os.environ.get('MONGODB_URI', 'mongodb://localhost:27017')}")
+    print(f"{'module':<40} {'median (s)':>10} {'max (s)':>10}")
+    for module in args.modules:
+        samples = [time_import(module, args.timeout) for _ in range(args.runs)]
+        print(f"{module:<40} {statistics.median(samples):>10.3f} {max(samples):>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Utility script to benchmark the storage backends.
+
+Writes synthetic block documents through each backend's
+store_blockchain_data_bulk from several threads, as the pipeline writers do,
+and reports the sustained docs/sec. Then it times random height range reads
+and latest height lookups against the stored data. The MongoDB backend uses
+its own scratch database and the SQLite backend a temporary file; both are
+removed afterwards. Run it from the repository root:
+
+    python -m daemon.utils.bench_storage --heights 5000 --threads 4
+    python -m daemon.utils.bench_storage sqlite --synchronous FULL --range-size 500
+"""
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+import concurrent.futures
+from typing import Any, Callable, Dict, List, Tuple
+
+from daemon.config.config import get_config
+from daemon.models.blockchain_data import Block
+from daemon.services.storage import STORAGE_BACKENDS, StorageBackend
+from daemon.utils.bench_write_profiles import make_blocks
+
+def open_mongodb(args: argparse.Namespace) -> Tuple[StorageBackend, Callable[[], None]]:
+    """
+    Open the MongoDB backend on an empty scratch database.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Tuple of (backend, function removing the scratch data)
+    """
+    from daemon.services.mongo_service import MongoDBService
+    from daemon.services.indexes import ensure_indexes
+
+    service = MongoDBService(db_name=args.db_name, spool_path="")
+    service.client.drop_database(args.db_name)
+    ensure_indexes(service.db)
+
+    def cleanup() -> None:
+        service.client.drop_database(args.db_name)
+        service.close()
+
+    print(f"mongodb: {get_config().mongodb_uri}, database: {args.db_name}")
+    return service, cleanup
+
+def open_sqlite(args: argparse.Namespace) -> Tuple[StorageBackend, Callable[[], None]]:
+    """
+    Open the SQLite backend on a file in a temporary directory.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Tuple of (backend, function removing the scratch data)
+    """
+    from daemon.services.sqlite_storage import SQLiteStorage
+
+    directory = tempfile.mkdtemp(prefix="cosmodata-bench-", dir=args.sqlite_dir)
+    storage = SQLiteStorage(f"{directory}/bench.db", synchronous=args.synchronous)
+
+    def cleanup() -> None:
+        storage.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"sqlite: {directory}/bench.db, synchronous={storage.synchronous}")
+    return storage, cleanup
+
+BACKEND_OPENERS: Dict[str, Callable[[argparse.Namespace], Tuple[StorageBackend, Callable[[], None]]]] = {
+    "mongodb": open_mongodb,
+    "sqlite": open_sqlite,
+}
+
+def ingest(storage: StorageBackend, args: argparse.Namespace) -> float:
+    """
+    Write the synthetic blocks from several threads.
+
+    Args:
+        storage: Backend to write to
+        args: Parsed command line arguments
+
+    Returns:
+        Documents stored per second
+    """
+    batches = []
+    for thread in range(args.threads):
+        blocks = make_blocks(f"bench-{thread}", 1, args.heights, args.payload_bytes)
+        batches.append([
+            blocks[i:i + args.batch_size] for i in range(0, len(blocks), args.batch_size)
+        ])
+
+    def write_all(thread_batches: List[List[Block]]) -> int:
+        return sum(
+            len(batch) for batch in thread_batches
+            if storage.store_blockchain_data_bulk(batch, backfill=args.backfill)
+        )
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads) as executor:
+        written = sum(executor.map(write_all, batches))
+    return written / (time.perf_counter() - start)
+
+def time_reads(storage: StorageBackend, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Time random height range reads and latest height lookups.
+
+    Args:
+        storage: Backend holding the ingested blocks
+        args: Parsed command line arguments
+
+    Returns:
+        Dictionary with median and 95th percentile milliseconds and the
+        documents returned per range read
+    """
+    rng = random.Random(0)
+    range_size = min(args.range_size, args.heights)
+    ranges = []
+    latest = []
+    returned = 0
+    for _ in range(args.repeat):
+        chain_id = f"bench-{rng.randrange(args.threads)}"
+        start_height = rng.randint(1, args.heights - range_size + 1)
+
+        start = time.perf_counter()
+        returned += len(storage.get_range(chain_id, "block", start_height, start_height + range_size - 1))
+        ranges.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        storage.get_latest_block_height(chain_id)
+        latest.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "range_ms": statistics.median(ranges),
+        "range_p95_ms": statistics.quantiles(ranges, n=20)[-1] if len(ranges) > 1 else ranges[0],
+        "range_docs": returned / args.repeat,
+        "latest_ms": statistics.median(latest),
+    }
+
+def main() -> None:
+    """Run the storage benchmark and print a summary table."""
+    parser = argparse.ArgumentParser(description="Benchmark the storage backends")
+    parser.add_argument("backends", nargs="*", default=list(STORAGE_BACKENDS), choices=list(STORAGE_BACKENDS),
+                        help="Backends to benchmark")
+    parser.add_argument("--heights", type=int, default=5000, help="Blocks written per thread")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent writer threads, one chain each")
+    parser.add_argument("--batch-size", type=int, default=100, help="Documents per bulk write")
+    parser.add_argument("--payload-bytes", type=int, default=4096, help="Approximate block payload size")
+    parser.add_argument("--backfill", action="store_true", help="Write as a backfill")
+    parser.add_argument("--range-size", type=int, default=100, help="Heights per range read")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed reads of each kind")
+    parser.add_argument("--db-name", default="cosmosdata_bench_storage", help="Scratch MongoDB database name")
+    parser.add_argument("--sqlite-dir", help="Directory for the scratch SQLite file (default: system temp)")
+    parser.add_argument("--synchronous", help="SQLite synchronous mode (default: SQLITE_SYNCHRONOUS)")
+    args = parser.parse_args()
+
+    results = {}
+    for backend in args.backends:
+        storage, cleanup = BACKEND_OPENERS[backend](args)
+        try:
+            docs_per_sec = ingest(storage, args)
+            results[backend] = dict(time_reads(storage, args), docs_per_sec=docs_per_sec)
+        finally:
+            cleanup()
+
+    print(f"\n{args.threads} threads x {args.heights} blocks, batches of {args.batch_size}, "
+          f"~{args.payload_bytes} bytes each; {args.repeat} reads of {args.range_size} heights")
+    print(f"{'backend':<10} {'docs/sec':>10} {'range ms':>10} {'range p95':>10} {'docs/range':>11} {'latest ms':>10}")
+    for backend, result in results.items():
+        print(
+            f"{backend:<10} {result['docs_per_sec']:>10.0f} {result['range_ms']:>10.2f} "
+            f"{result['range_p95_ms']:>10.2f} {result['range_docs']:>11.0f} {result['latest_ms']:>10.3f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Utility script to benchmark MongoDB write profiles.
+
+Writes synthetic block documents through MongoDBService.store_blockchain_data_bulk
+with each write profile and reports the sustained docs/sec. The benchmark uses
+its own scratch database, which is dropped afterwards. Run it from the
+repository root against the mongod you intend to deploy on:
+
+    python -m daemon.utils.bench_write_profiles --docs 20000 --threads 4
+"""
+import os
+import time
+import argparse
+import concurrent.futures
+from typing import List
+
+from daemon.config.config import get_config, MONGO_WRITE_PROFILES
+from daemon.models.blockchain_data import Block
+from daemon.services.mongo_service import MongoDBService
+
+def make_blocks(chain_id: str, start_height: int, count: int, payload_bytes: int) -> List[Block]:
+    """
+    Build synthetic block models of roughly the requested size.
+
+    Args:
+        chain_id: Chain identifier to use
+        start_height: First block height
+        count: Number of blocks
+        payload_bytes: Approximate size of each block's transaction data
+
+    Returns:
+        List of Block models
+    """
+    txs = [os.urandom(payload_bytes // 2).hex()]
+    now = int(time.time())
+    return [
+        Block(chain_id, height, {
+            "block_id": {"hash": f"{height:064x}"},
+            "block": {
+                "header": {
+                    "chain_id": chain_id,
+                    "height": str(height),
+                    "time": "2026-01-01T00:00:00Z",
+                    "proposer_address": "BENCHPROPOSER",
+                },
+                "data": {"txs": txs},
+            }
+        }, now)
+        for height in range(start_height, start_height + count)
+    ]
+
+def run_profile(profile: str, args: argparse.Namespace) -> float:
+    """
+    Benchmark a single write profile.
+
+    Args:
+        profile: Write profile name
+        args: Parsed command line arguments
+
+    Returns:
+        Documents written per second
+    """
+    service = MongoDBService(db_name=args.db_name, write_profile=profile, spool_path="")
+    service.db.blockchain_data.drop()
+    service.db.blockchain_data.create_index(
+        [("chain_id", 1), ("block_height", 1), ("endpoint", 1)], unique=True
+    )
+
+    per_thread = args.docs // args.threads
+    batches = []
+    for thread in range(args.threads):
+        blocks = make_blocks(f"bench-{thread}", 1, per_thread, args.payload_bytes)
+        batches.append([
+            blocks[i:i + args.batch_size] for i in range(0, len(blocks), args.batch_size)
+        ])
+
+    def write_all(thread_batches: List[List[Block]]) -> None:
+        for batch in thread_batches:
+            service.store_blockchain_data_bulk(batch, backfill=args.backfill)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(write_all, batches))
+    elapsed = time.perf_counter() - start
+
+    written = service.db.blockchain_data.count_documents({})
+    service.client.drop_database(args.db_name)
+    service.close()
+    return written / elapsed
+
+def main() -> None:
+    """Run the write profile benchmark and print a summary table."""
+    parser = argparse.ArgumentParser(description="Benchmark MongoDB write profiles")
+    parser.add_argument("profiles", nargs="*", default=list(MONGO_WRITE_PROFILES), help="Profiles to benchmark")
+    parser.add_argument("--docs", type=int, default=20000, help="Total documents per profile")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent writer threads")
+    parser.add_argument("--batch-size", type=int, default=100, help="Documents per bulk write")
+    parser.add_argument("--payload-bytes", type=int, default=4096, help="Approximate block payload size")
+    parser.add_argument("--backfill", action="store_true", help="Write with the backfill write concern")
+    parser.add_argument("--db-name", default="cosmosdata_bench", help="Scratch database name")
+    args = parser.parse_args()
+
+    print(f"MongoDB: {get_config().mongodb_uri}, database: {args.db_name}")
+    print(f"{args.docs} docs, {args.threads} threads, batches of {args.batch_size}, ~{args.payload_bytes} bytes each")
+    print(f"{'profile':<12} {'docs/sec':>12}")
+    for profile in args.profiles:
+        print(f"{profile:<12} {run_profile(profile, args):>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Utility script to find the block height at a given time.
+
+Prints the last block at or before each given time (ISO 8601 or Unix
+seconds), using stored block times and probing the chain's RPC node by
+bisection where they do not cover the time. Probed heights are remembered in
+the height_times collection. Run it from the repository root:
+
+    python -m daemon.utils.height_at --chain symphony-testnet-4 2026-01-01T00:00:00Z
+    python -m daemon.utils.height_at --chain symphony-testnet-4 --every 86400 --from 2026-01-01T00:00:00Z --to 2026-02-01T00:00:00Z
+"""
+import sys
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import List
+
+from daemon.config.config import get_config
+from daemon.models.blockchain_data import parse_block_time
+from daemon.services.client_factory import get_client_for_chain
+from daemon.services.height_index import HeightIndex
+from daemon.services.mongo_service import init_mongo_service, close_mongo_service
+
+logger = logging.getLogger(__name__)
+
+def parse_time(value: str) -> float:
+    """
+    Parse a time given on the command line.
+
+    Args:
+        value: Unix seconds or an ISO 8601 / RFC 3339 time
+
+    Returns:
+        Unix seconds
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a valid time
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = parse_block_time(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"Invalid time: {value}")
+    return parsed
+
+def main() -> int:
+    """
+    Parse arguments and print the heights.
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Find the block height at a given time")
+    parser.add_argument("--chain", required=True, help="Chain ID")
+    parser.add_argument("times", nargs="*", type=parse_time, help="Times to look up")
+    parser.add_argument("--from", dest="start", type=parse_time, help="Start of a sampled range")
+    parser.add_argument("--to", dest="end", type=parse_time, help="End of a sampled range")
+    parser.add_argument("--every", type=float, help="Seconds between samples in the range")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, get_config().log_level),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
+
+    times: List[float] = list(args.times)
+    if args.start is not None and args.end is not None and args.every:
+        sample = args.start
+        while sample <= args.end:
+            times.append(sample)
+            sample += args.every
+    if not times:
+        parser.error("give at least one time, or --from, --to and --every")
+
+    client = get_client_for_chain(args.chain)
+    try:
+        # Without the write spool: the daemon may be using its file
+        index = HeightIndex(init_mongo_service(spool_path="").db, client)
+        for timestamp in times:
+            height = index.height_at(timestamp)
+            iso = datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+            print(f"{iso}\t{height if height is not None else 'before earliest available block'}")
+        logger.info(f"Looked up {len(times)} times with {index.probes} RPC probes")
+        return 0
+    except Exception as e:
+        logger.error(f"Lookup failed: {e}")
+        return 1
+    finally:
+        client.close()
+        close_mongo_service()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,12 +8,12 @@ import os
 import sys
 import logging
 from dotenv import load_dotenv
-from pymongo import MongoClient, IndexModel, ASCENDING
+from pymongo import MongoClient
 
-# Add the daemon directory to the path so we can import from daemon modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the repository root to the path so we can import from daemon modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from config.config import config
+from daemon.services.migrations import apply_migrations
 
 # Load environment variables
 load_dotenv()
@@ -47,25 +47,10 @@ def init_mongodb(mongo_uri=None, db_name=None):
         
         logger.info(f"Connected to MongoDB database: {db_name}")
         
-        # Create indexes for the chains collection
-        chains_indexes = [
-            IndexModel([("chain_id", ASCENDING)], unique=True)
-        ]
-        db.chains.create_indexes(chains_indexes)
+        # Create the collections and indexes the daemon uses
+        apply_migrations(db)
         
-        # Create indexes for the blockchain_data collection
-        data_indexes = [
-            IndexModel([
-                ("chain_id", ASCENDING),
-                ("block_height", ASCENDING),
-                ("endpoint", ASCENDING)
-            ], unique=True),
-            IndexModel([("timestamp", ASCENDING)]),
-            IndexModel([("chain_id", ASCENDING), ("endpoint", ASCENDING)]),
-        ]
-        db.blockchain_data.create_indexes(data_indexes)
-        
-        logger.info("MongoDB indexes set up successfully")
+        logger.info("MongoDB collections and indexes set up successfully")
         
         # Add Symphony chain configuration
         # First, remove any existing Symphony config to avoid duplicates
@@ -0,0 +1,42 @@
+"""
+Utility script to apply database migrations.
+
+Creates the collections and indexes the daemon needs. The daemon also applies
+pending migrations at startup, so this is mainly useful when preparing a
+database ahead of deployment. Run it from the repository root:
+
+    python -m daemon.utils.migrate
+"""
+import logging
+import sys
+
+from daemon.config.config import get_config
+from daemon.services.mongo_service import init_mongo_service, close_mongo_service
+from daemon.services.migrations import apply_migrations
+
+def main() -> int:
+    """
+    Apply pending migrations to the configured database.
+
+    Returns:
+        Process exit code
+    """
+    logging.basicConfig(
+        level=getattr(logging, get_config().log_level),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
+    logger = logging.getLogger(__name__)
+
+    try:
+        # Without the write spool: the daemon may be using its file
+        apply_migrations(init_mongo_service(spool_path="").db)
+        return 0
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        return 1
+    finally:
+        close_mongo_service()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Utility script to copy raw data into another storage layout.
+
+Copies the raw documents of each chain and endpoint from the collections of
+one STORAGE_LAYOUT into those of another (see
+daemon/services/storage_layout.py). The height range of every chain and
+endpoint is split into shards that a pool of worker processes copies in
+parallel batches. Documents are upserted on (chain_id, block_height,
+endpoint), so an interrupted copy can simply be run again. The source
+collections are left untouched.
+
+Stop the daemon, copy, set STORAGE_LAYOUT for the daemon and the API, then
+start them again. Run it from the repository root:
+
+    python -m daemon.utils.migrate_layout --to-layout chain
+    python -m daemon.utils.migrate_layout --from-layout chain --to-layout chain_endpoint --chain symphony-testnet-4
+"""
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+import concurrent.futures
+from typing import List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+
+from daemon.config.config import get_config
+from daemon.services.indexes import INDEXES
+from daemon.services.storage_layout import DATA_COLLECTION, STORAGE_LAYOUTS, data_collection_name
+from daemon.services.mongo_service import init_mongo_service, get_mongo_service, close_mongo_service
+
+logger = logging.getLogger(__name__)
+
+def _init_process() -> None:
+    """Configure logging and MongoDB for the script and its worker processes."""
+    logging.basicConfig(
+        level=getattr(logging, get_config().log_level),
+        format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
+    # Never share the daemon's write spool file; failed writes fail the shard
+    init_mongo_service(spool_path="")
+
+def copy_shard(chain_id: str,
+               endpoint: str,
+               from_layout: str,
+               to_layout: str,
+               start_height: int,
+               end_height: int,
+               batch_size: int) -> int:
+    """
+    Copy the raw documents of one chain, endpoint and height range.
+
+    Runs in a worker process, which opens its own MongoDB connection.
+
+    Args:
+        chain_id: Chain identifier
+        endpoint: Endpoint type
+        from_layout: Layout to read from
+        to_layout: Layout to write to
+        start_height: First height of the shard (inclusive)
+        end_height: Last height of the shard (inclusive)
+        batch_size: Documents per bulk write
+
+    Returns:
+        Number of documents copied
+    """
+    service = get_mongo_service()
+    source = service.db[data_collection_name(chain_id, endpoint, from_layout)]
+    target = service.db[data_collection_name(chain_id, endpoint, to_layout)].with_options(
+        write_concern=service.backfill_write_concern
+    )
+
+    cursor = source.find(
+        {"chain_id": chain_id, "endpoint": endpoint, "block_height": {"$gte": start_height, "$lte": end_height}},
+        {"_id": 0},
+        batch_size=batch_size
+    )
+
+    copied = 0
+    operations = []
+    for document in cursor:
+        operations.append(ReplaceOne(
+            {"chain_id": chain_id, "block_height": document["block_height"], "endpoint": endpoint},
+            document,
+            upsert=True
+        ))
+        if len(operations) >= batch_size:
+            target.bulk_write(operations, ordered=False)
+            copied += len(operations)
+            operations = []
+    if operations:
+        target.bulk_write(operations, ordered=False)
+        copied += len(operations)
+    return copied
+
+def _height_range(chain_id: str, endpoint: str, layout: str) -> Optional[Tuple[int, int]]:
+    """
+    Get the lowest and highest stored heights of a chain's endpoint.
+
+    Args:
+        chain_id: Chain identifier
+        endpoint: Endpoint type
+        layout: Layout to look in
+
+    Returns:
+        Tuple of (lowest, highest) height, or None if nothing is stored
+    """
+    collection = get_mongo_service().db[data_collection_name(chain_id, endpoint, layout)]
+    query = {"chain_id": chain_id, "endpoint": endpoint}
+    first = collection.find_one(query, {"block_height": 1}, sort=[("block_height", ASCENDING)])
+    last = collection.find_one(query, {"block_height": 1}, sort=[("block_height", DESCENDING)])
+    if not first:
+        return None
+    return first["block_height"], last["block_height"]
+
+def _stored_endpoints(chain_id: str, layout: str) -> List[str]:
+    """
+    Get the endpoints a chain has raw documents for.
+
+    Args:
+        chain_id: Chain identifier
+        layout: Layout to look in
+
+    Returns:
+        Sorted endpoint types
+    """
+    db = get_mongo_service().db
+    if layout == "chain_endpoint":
+        prefix = f"{DATA_COLLECTION}.{chain_id}."
+        return sorted(
+            name[len(prefix):] for name in db.list_collection_names()
+            if name.startswith(prefix)
+        )
+    return sorted(db[data_collection_name(chain_id, "", layout)].distinct("endpoint", {"chain_id": chain_id}))
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Copy the selected chains into the target layout.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Process exit code
+    """
+    if args.from_layout == args.to_layout:
+        logger.error(f"Source and target layout are both '{args.to_layout}'")
+        return 1
+
+    db = get_mongo_service().db
+    chains = args.chain or sorted(get_config().chains)
+
+    # (chain_id, endpoint, start, end) per shard
+    shards: List[Tuple[str, str, int, int]] = []
+    for chain_id in chains:
+        for endpoint in _stored_endpoints(chain_id, args.from_layout):
+            stored_range = _height_range(chain_id, endpoint, args.from_layout)
+            if stored_range is None:
+                continue
+            # Indexes first, so the upserts find existing documents quickly
+            db[data_collection_name(chain_id, endpoint, args.to_layout)].create_indexes(INDEXES[DATA_COLLECTION])
+            shards.extend(
+                (chain_id, endpoint, shard_start, min(shard_start + args.shard_size - 1, stored_range[1]))
+                for shard_start in range(stored_range[0], stored_range[1] + 1, args.shard_size)
+            )
+
+    if not shards:
+        logger.info(f"No raw data found in the '{args.from_layout}' layout for {chains}")
+        return 0
+    logger.info(
+        f"Copying {len(chains)} chains from '{args.from_layout}' to '{args.to_layout}' "
+        f"({len(shards)} shards, {args.workers} workers)"
+    )
+
+    started = time.monotonic()
+    total = 0
+    completed = 0
+    failed = 0
+
+    # Worker processes are spawned, not forked, so none inherits the
+    # parent's MongoDB client
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=context,
+        initializer=_init_process
+    ) as executor:
+        futures = {
+            executor.submit(
+                copy_shard, chain_id, endpoint, args.from_layout, args.to_layout, start, end, args.batch_size
+            ): (chain_id, endpoint, start, end)
+            for chain_id, endpoint, start, end in shards
+        }
+        for future in concurrent.futures.as_completed(futures):
+            chain_id, endpoint, start, end = futures[future]
+            try:
+                total += future.result()
+                completed += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"Copy of {chain_id}/{endpoint} {start}-{end} failed: {e}")
+                continue
+
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"{completed}/{len(shards)} shards, {total} documents copied "
+                f"({total / max(elapsed, 1e-9):.0f} docs/s)"
+            )
+
+    if failed:
+        logger.error(f"{failed} shards failed; run the copy again to retry them")
+        return 1
+    logger.info(f"Copied {total} documents. Set STORAGE_LAYOUT={args.to_layout} for the daemon and the API.")
+    return 0
+
+def main() -> int:
+    """
+    Parse arguments and copy.
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Copy raw data into another storage layout")
+    parser.add_argument("--from-layout", choices=STORAGE_LAYOUTS, default="shared",
+                        help="Layout the data is stored in now (default: shared)")
+    parser.add_argument("--to-layout", choices=STORAGE_LAYOUTS, default=get_config().storage_layout,
+                        help="Layout to copy into (default: STORAGE_LAYOUT)")
+    parser.add_argument("--chain", action="append",
+                        help="Chain ID to copy, may be repeated (default: all configured chains)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--shard-size", type=int, default=10000, help="Heights per shard")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per bulk write")
+    args = parser.parse_args()
+
+    _init_process()
+    try:
+        return run(args)
+    except Exception as e:
+        logger.error(f"Layout copy failed: {e}")
+        return 1
+    finally:
+        close_mongo_service()
+
+if __name__ == "__main__":
+    sys.exit(main())
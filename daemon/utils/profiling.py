@@ -0,0 +1,195 @@
+"""
+Profiling support for the CosmosData daemon.
+
+When enabled (``python -m daemon.main --profile``), code wrapped in
+``profiler.stage(...)`` records wall and CPU time per chain and stage, which is
+logged as a breakdown after every monitoring cycle. Stages are also kept as
+Chrome trace events that can be written to a JSON file and opened in
+chrome://tracing or Perfetto, and whole chain collections can be captured with
+cProfile every N cycles. When disabled every hook is a cheap no-op.
+"""
+import os
+import json
+import time
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on buffered trace events, so a long profiling run cannot grow
+# memory without limit
+MAX_TRACE_EVENTS = 1_000_000
+
+class Profiler:
+    """Collects per-stage timings, trace events and cProfile dumps."""
+
+    def __init__(self,
+                 enabled: bool = False,
+                 output_dir: str = "profiles",
+                 pstats_every: int = 0,
+                 trace: bool = False):
+        """
+        Initialize the profiler.
+
+        Args:
+            enabled: Whether stage timings are recorded
+            output_dir: Directory for pstats and trace files
+            pstats_every: Dump a cProfile of each chain collection every N
+                cycles (0 disables cProfile)
+            trace: Whether to keep trace events for a Chrome trace file
+        """
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.pstats_every = pstats_every
+        self.trace = trace
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], List[float]] = {}
+        self._events: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str, chain_id: Optional[str] = None) -> Iterator[None]:
+        """
+        Time a stage of work.
+
+        Args:
+            name: Stage name (e.g., 'fetch_block', 'store')
+            chain_id: Chain the work belongs to
+        """
+        if not self.enabled:
+            yield
+            return
+
+        chain_id = chain_id or "-"
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            with self._lock:
+                stats = self._stats.setdefault((chain_id, name), [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += wall
+                stats[2] += cpu
+                if self.trace and len(self._events) < MAX_TRACE_EVENTS:
+                    self._events.append({
+                        "name": name,
+                        "cat": chain_id,
+                        "ph": "X",
+                        "ts": (wall_start - self._origin) * 1e6,
+                        "dur": wall * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": {"chain_id": chain_id, "cpu_ms": cpu * 1e3}
+                    })
+
+    @contextmanager
+    def cycle_profile(self, cycle: int, chain_id: str) -> Iterator[None]:
+        """
+        Capture a cProfile of the enclosed work on selected cycles.
+
+        cProfile only sees the thread it is enabled on, so each chain's
+        collection is profiled and dumped separately. Python 3.12+ allows a
+        single active profiler per process, so chains whose collection
+        overlaps one being profiled are skipped for that cycle.
+
+        Args:
+            cycle: Monitoring cycle number
+            chain_id: Chain being collected
+        """
+        if not (self.enabled and self.pstats_every and cycle % self.pstats_every == 0):
+            yield
+            return
+
+        if not self._cprofile_lock.acquire(blocking=False):
+            logger.debug(f"cProfile busy, not profiling {chain_id} in cycle {cycle}")
+            yield
+            return
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._cprofile_lock.release()
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"cycle-{cycle:06d}-{chain_id}.pstats")
+            profile.dump_stats(path)
+            logger.info(f"Wrote cProfile stats to {path}")
+
+    def report(self, reset: bool = True) -> str:
+        """
+        Format the per-chain, per-stage timing breakdown.
+
+        Args:
+            reset: Clear the accumulated timings afterwards
+
+        Returns:
+            Table of call counts, wall time and CPU time
+        """
+        with self._lock:
+            stats = sorted(self._stats.items())
+            if reset:
+                self._stats = {}
+
+        lines = [f"{'chain':<24} {'stage':<20} {'calls':>6} {'wall (s)':>10} {'cpu (s)':>10} {'avg wall (ms)':>14}"]
+        for (chain_id, name), (count, wall, cpu) in stats:
+            lines.append(
+                f"{chain_id:<24} {name:<20} {int(count):>6} {wall:>10.3f} {cpu:>10.3f} {wall / count * 1e3:>14.1f}"
+            )
+        return "\n".join(lines)
+
+    def write_trace(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Write the collected trace events as a Chrome trace JSON file.
+
+        Args:
+            path: Output file (defaults to trace-<pid>.json in the output directory)
+
+        Returns:
+            Path of the written file, or None if tracing is disabled
+        """
+        if not (self.enabled and self.trace):
+            return None
+
+        path = path or os.path.join(self.output_dir, f"trace-{os.getpid()}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._lock:
+            events = list(self._events)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        logger.info(f"Wrote {len(events)} trace events to {path}")
+        return path
+
+# Singleton instance; disabled until init_profiler() is called
+_profiler = Profiler()
+
+def init_profiler(**kwargs: Any) -> Profiler:
+    """
+    Replace the profiler singleton.
+
+    Args:
+        **kwargs: Arguments for Profiler
+
+    Returns:
+        The new profiler instance
+    """
+    global _profiler
+    _profiler = Profiler(**kwargs)
+    return _profiler
+
+def get_profiler() -> Profiler:
+    """
+    Get the profiler singleton.
+
+    Returns:
+        The profiler instance
+    """
+    return _profiler
@@ -0,0 +1,269 @@
+"""
+Utility script to rebuild derived collections from stored raw data.
+
+Reads existing raw documents of a chain and height range, runs the
+current model and extraction code on them and bulk-writes the derived
+collections (see daemon/services/derivations.py). The range is split into
+shards that a pool of worker processes handles in parallel. No requests are
+made to chain nodes.
+
+Progress is checkpointed in the reprocess_checkpoints collection as the
+highest height below which every shard is done, so an interrupted run
+continues from there with --resume. Run it from the repository root:
+
+    python -m daemon.utils.reprocess --chain symphony-testnet-4
+    python -m daemon.utils.reprocess --chain symphony-testnet-4 --derivations validator_summaries \\
+        --from-height 1000000 --to-height 2000000 --workers 8
+"""
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+import concurrent.futures
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+
+from daemon.config.config import get_config
+from daemon.models.blockchain_data import model_from_dict
+from daemon.services.derivations import DERIVATIONS
+from daemon.services.mongo_service import init_mongo_service, get_mongo_service, close_mongo_service
+
+logger = logging.getLogger(__name__)
+
+def _init_process() -> None:
+    """Configure logging and MongoDB for the script and its worker processes."""
+    logging.basicConfig(
+        level=getattr(logging, get_config().log_level),
+        format="%(asctime)s - %(processName)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
+    # Never share the daemon's write spool file; failed writes fail the shard
+    init_mongo_service(spool_path="")
+
+def reprocess_shard(chain_id: str,
+                    start_height: int,
+                    end_height: int,
+                    derivation_names: List[str],
+                    batch_size: int) -> Tuple[int, int]:
+    """
+    Rebuild the derived documents of one height range.
+
+    Runs in a worker process, which opens its own MongoDB connection.
+
+    Args:
+        chain_id: Chain identifier
+        start_height: First height of the shard (inclusive)
+        end_height: Last height of the shard (inclusive)
+        derivation_names: Derivations to apply
+        batch_size: Raw documents per bulk write
+
+    Returns:
+        Tuple of (raw documents read, derived documents written)
+    """
+    service = get_mongo_service()
+    db = service.db
+    derivations = [DERIVATIONS[name] for name in derivation_names]
+    endpoints = sorted({derivation.endpoint for derivation in derivations})
+
+    read = 0
+    written = 0
+    batch = []
+
+    def flush() -> int:
+        count = 0
+        for derivation in derivations:
+            operations = derivation.operations(batch)
+            if operations:
+                db[derivation.collection].bulk_write(operations, ordered=False)
+                count += len(operations)
+        batch.clear()
+        return count
+
+    # Endpoints may be stored in separate collections (see STORAGE_LAYOUT)
+    for collection, collection_endpoints in service.data_collections(chain_id, endpoints):
+        cursor = collection.find(
+            {
+                "chain_id": chain_id,
+                "endpoint": {"$in": collection_endpoints},
+                "block_height": {"$gte": start_height, "$lte": end_height}
+            },
+            {"_id": 0},
+            batch_size=batch_size
+        )
+        for document in cursor:
+            batch.append(model_from_dict(document))
+            read += 1
+            if len(batch) >= batch_size:
+                written += flush()
+    written += flush()
+
+    return read, written
+
+def _height_range(chain_id: str, endpoints: List[str]) -> Optional[Tuple[int, int]]:
+    """
+    Get the lowest and highest stored heights of a chain's raw documents.
+
+    Args:
+        chain_id: Chain identifier
+        endpoints: Endpoints to consider
+
+    Returns:
+        Tuple of (lowest, highest) height, or None if nothing is stored
+    """
+    lowest = None
+    highest = None
+    for collection, collection_endpoints in get_mongo_service().data_collections(chain_id, endpoints):
+        query = {"chain_id": chain_id, "endpoint": {"$in": collection_endpoints}}
+        first = collection.find_one(query, {"block_height": 1}, sort=[("block_height", ASCENDING)])
+        last = collection.find_one(query, {"block_height": 1}, sort=[("block_height", DESCENDING)])
+        if not first:
+            continue
+        lowest = first["block_height"] if lowest is None else min(lowest, first["block_height"])
+        highest = last["block_height"] if highest is None else max(highest, last["block_height"])
+    if lowest is None:
+        return None
+    return lowest, highest
+
+def _checkpoint_id(chain_id: str, derivation_names: List[str]) -> str:
+    """
+    Build the checkpoint document key of a run.
+
+    Args:
+        chain_id: Chain identifier
+        derivation_names: Derivations of the run
+
+    Returns:
+        Key in the form "<chain_id>:<derivation>,<derivation>"
+    """
+    return f"{chain_id}:{','.join(sorted(derivation_names))}"
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Reprocess a chain's stored raw data.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Process exit code
+    """
+    unknown = [name for name in args.derivations if name not in DERIVATIONS]
+    if unknown:
+        logger.error(f"Unknown derivations {unknown}, available: {sorted(DERIVATIONS)}")
+        return 1
+
+    db = get_mongo_service().db
+    endpoints = sorted({DERIVATIONS[name].endpoint for name in args.derivations})
+    stored_range = _height_range(args.chain, endpoints)
+    if stored_range is None:
+        logger.info(f"No stored {endpoints} documents for {args.chain}")
+        return 0
+
+    start = args.from_height if args.from_height is not None else stored_range[0]
+    end = args.to_height if args.to_height is not None else stored_range[1]
+
+    checkpoint_id = _checkpoint_id(args.chain, args.derivations)
+    if args.resume:
+        checkpoint = db.reprocess_checkpoints.find_one({"_id": checkpoint_id})
+        if checkpoint:
+            start = max(start, checkpoint["done_through"] + 1)
+            logger.info(f"Resuming {checkpoint_id} after height {checkpoint['done_through']}")
+
+    if start > end:
+        logger.info("Nothing to reprocess")
+        return 0
+
+    shards = [
+        (shard_start, min(shard_start + args.shard_size - 1, end))
+        for shard_start in range(start, end + 1, args.shard_size)
+    ]
+    logger.info(
+        f"Reprocessing {args.chain} heights {start}-{end} into {args.derivations} "
+        f"({len(shards)} shards, {args.workers} workers)"
+    )
+
+    started = time.monotonic()
+    total_read = 0
+    total_written = 0
+    done: Dict[int, bool] = {}
+    next_shard = 0
+
+    # Worker processes are spawned, not forked, so none inherits the
+    # parent's MongoDB client
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=context,
+        initializer=_init_process
+    ) as executor:
+        futures = {
+            executor.submit(reprocess_shard, args.chain, shard[0], shard[1], args.derivations, args.batch_size): index
+            for index, shard in enumerate(shards)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            try:
+                read, written = future.result()
+            except Exception as e:
+                logger.error(f"Shard {shards[index][0]}-{shards[index][1]} failed: {e}")
+                continue
+
+            total_read += read
+            total_written += written
+            done[index] = True
+
+            # The checkpoint only advances over contiguous completed shards
+            while done.get(next_shard):
+                next_shard += 1
+            if next_shard:
+                db.reprocess_checkpoints.update_one(
+                    {"_id": checkpoint_id},
+                    {"$set": {"done_through": shards[next_shard - 1][1], "updated": int(time.time())}},
+                    upsert=True
+                )
+
+            elapsed = time.monotonic() - started
+            logger.info(
+                f"{len(done)}/{len(shards)} shards, {total_read} documents read, "
+                f"{total_written} written ({total_read / elapsed:.0f} docs/s)"
+            )
+
+    failed = len(shards) - len(done)
+    if failed:
+        logger.error(f"{failed} shards failed; rerun with --resume to retry from the checkpoint")
+        return 1
+    return 0
+
+def main() -> int:
+    """
+    Parse arguments and reprocess.
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Rebuild derived collections from stored raw data")
+    parser.add_argument("--chain", required=True, help="Chain ID to reprocess")
+    parser.add_argument("--derivations", nargs="+", default=sorted(DERIVATIONS),
+                        help=f"Derivations to rebuild (default: all of {sorted(DERIVATIONS)})")
+    parser.add_argument("--from-height", type=int, help="First height (default: lowest stored)")
+    parser.add_argument("--to-height", type=int, help="Last height (default: highest stored)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--shard-size", type=int, default=10000, help="Heights per shard")
+    parser.add_argument("--batch-size", type=int, default=500, help="Raw documents per bulk write")
+    parser.add_argument("--resume", action="store_true", help="Continue after the last checkpoint")
+    args = parser.parse_args()
+
+    _init_process()
+    try:
+        return run(args)
+    except Exception as e:
+        logger.error(f"Reprocess failed: {e}")
+        return 1
+    finally:
+        close_mongo_service()
+
+if __name__ == "__main__":
+    sys.exit(main())